@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+'''模型输出JSON解析对比：原正则截取方式与线性扫描修复方式的速度及容错能力
+
+1. 语料校验：逐条解析典型的异常输出（benchmarks/data/model_output_corpus.jsonl），与期望结果比对；
+   现有语料均为按线上常见缺陷人工构造（source为synthetic），收录真实失败输出时source记为captured
+2. 性能测试：构造不同规模的评分项输出（JSON之后附带含花括号的说明文字）及其截断版本，统计解析耗时
+
+用法：
+    python benchmarks/json_repair_benchmark.py [--corpus 语料文件] [--sizes 100 1000 10000] [--repeat 5]
+'''
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.json_repair import extract_json  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "model_output_corpus.jsonl")
+
+
+def legacy_parse(content: str):
+    """原实现：去除代码块标记后贪婪匹配最外层花括号"""
+    content = content.replace("```json", "").replace("```", "").strip()
+    match = re.search(r'\{.*\}', content, re.DOTALL)
+    if not match:
+        raise ValueError("未找到JSON内容")
+    return json.loads(match.group(0))
+
+
+PARSERS = {"legacy": legacy_parse, "scanner": extract_json}
+
+
+def synthetic_output(items: int) -> str:
+    """构造含items个评分项的模型输出，末尾附带含花括号的说明文字"""
+    criteria = [
+        {
+            "itemName": f"第{i}项：近三年类似项目业绩，每提供一个得{i % 5 + 1}分",
+            "score": float(i % 20),
+            "itemTag": "项目业绩",
+            "TagCondition": [{"fieldName": "projectAmount", "judge": "GEQ", "condition": [4000000.00]}]
+        }
+        for i in range(items)
+    ]
+    body = json.dumps({"retCode": "0000", "retMessage": "解析成功", "criteria": criteria}, ensure_ascii=False, indent=2)
+    return f"```json\n{body}\n```\n说明：如有遗漏，可按{{\"itemName\": ...}}格式补充。"
+
+
+def run_corpus(path: str) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    print(f"语料校验（{len(cases)}条）")
+    passed = {name: 0 for name in PARSERS}
+    for case in cases:
+        marks = []
+        for name, parse in PARSERS.items():
+            try:
+                ok = parse(case["output"]) == case["expected"]
+            except ValueError:
+                ok = False
+            passed[name] += ok
+            marks.append(f"{name}: {'通过' if ok else '失败'}")
+        print(f"  {case['name']:<30} {'  '.join(marks)}  （{case['defect']}，{case.get('source', 'synthetic')}）")
+    print("  " + "  ".join(f"{name}通过 {count}/{len(cases)}" for name, count in passed.items()))
+
+
+def run_benchmark(sizes: list, repeat: int) -> None:
+    print("\n性能测试（每组取最短耗时；截断输出保留前90%，需走修复流程）")
+    for items in sizes:
+        text = synthetic_output(items)
+        variants = {"完整": (text, items), "截断": (text[:int(len(text) * 0.9)], None)}
+        for variant, (content, expected) in variants.items():
+            cells = []
+            for name, parse in PARSERS.items():
+                best = float("inf")
+                ok = True
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    try:
+                        count = len(parse(content).get("criteria", []))
+                        ok = ok and (count == expected if expected else count > 0)
+                    except ValueError:
+                        ok = False
+                    best = min(best, time.perf_counter() - start)
+                cells.append(f"{name}: {best * 1000:>9.2f}ms {'正确' if ok else '错误'}")
+            print(f"  评分项{items:>6}个 {variant}  长度{len(content) / 1024:>9.1f}KB  " + "  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型输出JSON解析速度与容错能力对比")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="异常输出语料（JSON Lines：name/defect/source/output/expected）")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000], help="合成输出的评分项数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每组重复次数")
+    args = parser.parse_args()
+
+    run_corpus(args.corpus)
+    run_benchmark(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''PDF文本提取后端对比：统计各后端的提取速度（页/秒）及与pdfplumber的字符级差异
+
+用法：
+    python benchmarks/pdf_backend_benchmark.py <PDF文件或目录> [--backends pdfplumber pdfium pymupdf]
+'''
+import os
+import sys
+import time
+import argparse
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.pdf_backends import PDF_TEXT_BACKENDS  # noqa: E402
+
+REFERENCE_BACKEND = "pdfplumber"
+
+
+def collect_pdfs(paths: list) -> list:
+    """收集待测试的PDF文件（目录递归查找）"""
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                pdfs.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(".pdf"))
+        elif path.lower().endswith(".pdf"):
+            pdfs.append(path)
+    return pdfs
+
+
+def char_similarity(reference: str, candidate: str) -> float:
+    """去除空白后按字符比较的相似度（0~1），空白差异不计入"""
+    a = "".join(reference.split())
+    b = "".join(candidate.split())
+    if not a and not b:
+        return 1.0
+    return SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def run_backend(backend, pdf_path: str) -> tuple:
+    """返回(页文本列表, 耗时秒数)"""
+    start = time.perf_counter()
+    page_count = backend.page_count(pdf_path)
+    pages = backend.extract_pages(pdf_path, 0, page_count)
+    return pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF文本提取后端速度与一致性对比")
+    parser.add_argument("paths", nargs="+", help="PDF文件或包含PDF的目录")
+    parser.add_argument("--backends", nargs="+", default=list(PDF_TEXT_BACKENDS), help="参与对比的后端")
+    args = parser.parse_args()
+
+    pdfs = collect_pdfs(args.paths)
+    if not pdfs:
+        print("未找到PDF文件")
+        return
+
+    backends = []
+    for name in args.backends:
+        backend = PDF_TEXT_BACKENDS.get(name)
+        if backend is None or not backend.is_available():
+            print(f"跳过不可用的后端: {name}")
+            continue
+        backends.append(backend)
+    if REFERENCE_BACKEND not in [b.name for b in backends]:
+        print(f"需要{REFERENCE_BACKEND}作为差异对比基准")
+        return
+
+    totals = {b.name: {"pages": 0, "seconds": 0.0, "similarity": 0.0} for b in backends}
+    for pdf_path in pdfs:
+        print(f"\n{pdf_path}")
+        results = {b.name: run_backend(b, pdf_path) for b in backends}
+        reference_pages = results[REFERENCE_BACKEND][0]
+        for name, (pages, seconds) in results.items():
+            similarity = sum(
+                char_similarity(ref, cand) for ref, cand in zip(reference_pages, pages)
+            ) / max(len(reference_pages), 1)
+            totals[name]["pages"] += len(pages)
+            totals[name]["seconds"] += seconds
+            totals[name]["similarity"] += similarity * len(pages)
+            print(
+                f"  {name:<12} 页数: {len(pages):>4}  耗时: {seconds:>7.2f}秒  "
+                f"速度: {len(pages) / max(seconds, 1e-9):>7.1f}页/秒  字符相似度: {similarity:.2%}"
+            )
+
+    print(f"\n汇总（{len(pdfs)}个文件，相似度以{REFERENCE_BACKEND}为基准）")
+    for name, total in totals.items():
+        pages = max(total["pages"], 1)
+        print(
+            f"  {name:<12} 总页数: {total['pages']:>5}  速度: {total['pages'] / max(total['seconds'], 1e-9):>7.1f}页/秒  "
+            f"字符差异率: {1 - total['similarity'] / pages:.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
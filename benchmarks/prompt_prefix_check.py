@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+'''提示词前缀一致性检查：确认各提取请求的system消息部分逐字节一致，可被服务端前缀缓存复用
+
+以替换后的大模型客户端（记录请求并返回固定结果）执行ExtractService的各提取流程，检查实际发送的请求：
+1. 同一进程内用不同文档执行，同一提取阶段的system消息（含约束解码版本）须逐字节一致，
+   序列化后的公共前缀须完整覆盖system消息
+2. 不同哈希种子（PYTHONHASHSEED）的子进程中各阶段system消息的摘要须一致
+
+覆盖的流程：基础信息（规则提取后补充缺失字段、全部字段交给模型两种情况，含二次提取）、
+商务评分（评分整理和按评分内容筛选表结构后的评分项提取）、目录提取，以及超长文档的分段提取
+
+用法：
+    python benchmarks/prompt_prefix_check.py
+检查不通过时以非零状态码退出。
+'''
+import os
+import sys
+import json
+import logging
+import hashlib
+import subprocess
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from services import extract_service as extract_module  # noqa: E402
+from services.extract_service import ExtractService  # noqa: E402
+from services.llm_client import llm_client  # noqa: E402
+from services.schema_index import schema_index  # noqa: E402
+from services.output_schemas import with_guided_decoding  # noqa: E402
+
+DOCUMENTS = [
+    "第一章 招标公告\n项目编号：2024-JL05-W1813\n项目名称：智能化管控及信息化设备\n开标时间：2025年2月9日9时00分\n"
+    "第二章 评标办法\n价格分30分，近三年类似项目业绩每个得2分，最多10分。\n附件一：投标函\n附件十：综合实力",
+    "第一章 采购公告\n采购项目编号：ZB-2025-0031\n预算金额：397万元\n投标保证金：人民币肆拾伍万元整\n"
+    "第二章 评分标准\n注册资本不低于1000万元得5分；具有ISO9001认证得3分。\n附件二：法定代表人授权书"
+]
+
+# 各提取阶段的固定返回结果（评分整理阶段原样返回文档内容，使后续筛选的表结构随文档变化）
+STAGE_RESULTS = {
+    "base_info": {
+        "返回状态": {"retCode": "0000", "retMessage": ""},
+        "projectInfo": {"projectCode": "2024-JL05-W1813", "projectName": "智能化管控及信息化设备"},
+        "bidContactInfo": {}, "bidBond": {}
+    },
+    "base_info_result": {
+        "retCode": "0000", "retMessage": "",
+        "projectInfo": {"projectCode": "2024-JL05-W1813", "projectName": "智能化管控及信息化设备"},
+        "bidContactInfo": {}, "bidBond": {}
+    },
+    "score_criteria": {"retCode": "0000", "retMessage": "", "criteria": []},
+    "catalogue": {"retCode": "0000", "retMessage": "", "catalogue": []}
+}
+
+# 各执行方案对提取模块配置的替换
+SCENARIOS = {
+    "default": {"BASE_EXTRACT_MODE": "two_stage"},
+    "no_rules": {"BASE_EXTRACT_MODE": "two_stage", "BASE_RULE_ENABLED": False},
+    "map_reduce": {"MAP_REDUCE_THRESHOLD_TOKENS": 20, "MAP_REDUCE_SEGMENT_TOKENS": 40}
+}
+
+
+class RecordingClient:
+    """替换llm_client.chat_structured：记录实际请求（及其约束解码版本），返回各阶段的固定结果"""
+
+    def __init__(self):
+        self.calls = []  # [(阶段名, 请求, 约束解码请求)]
+
+    def chat_structured(self, payload: dict, spec: dict, name: str, parse, on_progress=None):
+        self.calls.append((name, payload, with_guided_decoding(payload, spec, name)))
+        if name == "score_summary":
+            document = payload["messages"][-1]["content"]
+            return {"返回状态": {"retCode": "0000", "retMessage": ""}, "scoreCriteria": document}
+        return json.loads(json.dumps(STAGE_RESULTS[name]))
+
+
+@contextmanager
+def patched(recorder: RecordingClient, overrides: dict):
+    originals = {name: getattr(extract_module, name) for name in overrides}
+    original_chat = llm_client.chat_structured
+    llm_client.chat_structured = recorder.chat_structured
+    for name, value in overrides.items():
+        setattr(extract_module, name, value)
+    try:
+        yield
+    finally:
+        llm_client.chat_structured = original_chat
+        for name, value in originals.items():
+            setattr(extract_module, name, value)
+
+
+def run_extractors(document: str, overrides: dict) -> list:
+    """按指定配置对文档执行各提取流程，返回实际发送的请求"""
+    recorder = RecordingClient()
+    with patched(recorder, overrides):
+        ExtractService.extract_base_info(document)
+        ExtractService.extract_business_score(document)
+        ExtractService.extract_catalogue(document, "BID-0001")
+    return recorder.calls
+
+
+def collect() -> dict:
+    """{(方案, 文档序号): [(阶段名, 请求, 约束解码请求)]}"""
+    return {
+        (scenario, i): run_extractors(document, overrides)
+        for scenario, overrides in SCENARIOS.items()
+        for i, document in enumerate(DOCUMENTS)
+    }
+
+
+def system_bytes(payload: dict) -> bytes:
+    # 与大模型客户端相同的序列化方式
+    return json.dumps(payload["messages"][0]).encode("utf-8")
+
+
+def common_prefix_length(a: bytes, b: bytes) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+def system_digests(calls: dict) -> dict:
+    digests = {}
+    for records in calls.values():
+        for name, payload, guided in records:
+            for variant, request in (("plain", payload), ("guided", guided)):
+                digests[f"{name}/{variant}"] = hashlib.sha256(system_bytes(request)).hexdigest()
+    return dict(sorted(digests.items()))
+
+
+def check_in_process(calls: dict) -> bool:
+    print("同一进程内不同文档、不同执行方案的实际请求")
+    ok = True
+    stages = {}
+    for records in calls.values():
+        for name, payload, guided in records:
+            for variant, request in (("plain", payload), ("guided", guided)):
+                stages.setdefault((name, variant), []).append(request)
+
+    for (name, variant), requests in sorted(stages.items()):
+        systems = {system_bytes(request) for request in requests}
+        system = requests[0]["messages"][0]
+        size = len(json.dumps({"messages": [system]}).encode("utf-8")) - 2
+        bodies = [json.dumps(request).encode("utf-8") for request in requests]
+        shared = min(common_prefix_length(bodies[0], body) for body in bodies)
+        passed = system["role"] == "system" and len(systems) == 1 and shared >= size
+        ok = ok and passed
+        print(
+            f"  {name:<18} {variant:<7} 请求{len(requests):>3}次  system消息 {size:>6}字节  "
+            f"公共前缀 {shared:>6}字节  {'通过' if passed else '失败（system消息随文档变化）'}"
+        )
+
+    for scenario in SCENARIOS:
+        names = [sorted({name for name, _, _ in calls[(scenario, i)]}) for i in range(len(DOCUMENTS))]
+        if any(n != names[0] for n in names):
+            ok = False
+            print(f"  {scenario}方案下各文档经过的提取阶段不同：{names}")
+    return ok
+
+
+def check_across_processes() -> bool:
+    print("不同哈希种子进程间的system消息摘要")
+    results = []
+    for seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--digests"],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    ok = results[0] == results[1]
+    for key in results[0]:
+        print(f"  {key:<26} {results[0][key][:16]}  {'通过' if results[0][key] == results[1].get(key) else '失败'}")
+    return ok
+
+
+def main():
+    # 只输出检查结果，不输出提取流程的日志
+    logging.disable(logging.WARNING)
+    if not os.path.exists(schema_index.path):
+        schema_index.path = os.path.join(ROOT, "doc", "tendering-struct.txt")
+    calls = collect()
+    if "--digests" in sys.argv:
+        print(json.dumps(system_digests(calls)))
+        return
+    ok = check_in_process(calls)
+    ok = check_across_processes() and ok
+    print("检查通过" if ok else "检查失败：存在随请求变化的前缀内容")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+'''章节顺序检查：确认按编号规则和标题样式识别的章标题编号按出现顺序递增
+
+以demo/招标文件.docx（OOXML直接解析，分册和表单为标题样式，章标题为普通段落）构建章节索引，
+检查各章编号严格递增，且第二章中引用其他章节的列表条目（"第五章 技术标准和要求…"）未被识别为章标题
+
+用法：
+    python benchmarks/section_order_check.py
+检查不通过时以非零状态码退出。
+'''
+import os
+import sys
+import logging
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from services.file_service import FileService  # noqa: E402
+from services.field_normalizer import chinese_number  # noqa: E402
+from services.section_index import SectionIndexService, NUMBERED_HEADINGS  # noqa: E402
+
+DOCX_PATH = os.path.join(ROOT, "demo", "招标文件.docx")
+LIST_ITEM = "第五章 技术标准和要求"
+
+
+def main():
+    logging.disable(logging.WARNING)
+    _, text = FileService.load_document(DOCX_PATH)
+    index = SectionIndexService.build(None, text)
+    chapter_pattern = NUMBERED_HEADINGS[0][2]
+    chapters = [s for s in index.sections if s["level"] == 1 and chapter_pattern.match(s["title"])]
+    numbers = [chinese_number(chapter_pattern.match(s["title"]).group(1)) for s in chapters]
+
+    for section in chapters:
+        print(f"  {section['start']:>6}  {section['title']}")
+    checks = {
+        "章编号递增": all(a < b for a, b in zip(numbers, numbers[1:])),
+        "列表条目未识别为章": not any(s["title"].startswith(LIST_ITEM) for s in index.sections)
+    }
+    for name, passed in checks.items():
+        print(f"  {name:<10} {'通过' if passed else '失败'}")
+    ok = all(checks.values())
+    print("检查通过" if ok else "检查失败")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
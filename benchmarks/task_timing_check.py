@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+'''任务耗时统计检查：确认各阶段每页耗时按入队时估计所用的页数记录，不同格式的文档交替处理时统计值保持合理
+
+依次以execute_task执行一个Word任务（demo/招标文件.docx，OOXML直接解析，文本中没有分页符）和一个PDF任务，
+处理函数按任务页数模拟固定的每页耗时；检查每个任务后记录的提取阶段每页耗时与模拟值一致，
+且按统计值估计的预计耗时与页数成比例（按文本计页时Word任务会被计为1页，每页耗时被放大为整篇耗时）
+
+Redis替换为内存实现，文档缓存和临时文件清理不启用，不修改任何文件
+
+用法：
+    python benchmarks/task_timing_check.py
+检查不通过时以非零状态码退出。
+'''
+import os
+import sys
+import time
+import logging
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from config import RedisKey, PAGE_SEPARATOR  # noqa: E402
+from services import file_service as file_module  # noqa: E402
+from services.redis_service import redis_service  # noqa: E402
+from services.document_size import estimate_pages  # noqa: E402
+from services.task_registry import get_task_type  # noqa: E402
+from tasks.task_runner import execute_task  # noqa: E402
+
+DOCX_PATH = os.path.join(ROOT, "demo", "招标文件.docx")
+PDF_PAGES = 20
+SECONDS_PER_PAGE = 0.002  # 模拟的提取阶段每页耗时
+TOLERANCE = 3.0  # 统计值与模拟值之比允许的范围（计时误差）
+
+
+class MemoryRedis:
+    """检查涉及的Redis命令的内存实现"""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def set(self, key, value, *args, **kwargs):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def hget(self, key, field):
+        value = self.hashes.get(key, {}).get(field.encode())
+        return None if value is None else str(value).encode()
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value
+
+    def hgetall(self, key):
+        return {k: str(v).encode() for k, v in self.hashes.get(key, {}).items()}
+
+
+def simulated_handler(task, pdf_path, pdf_content, on_progress):
+    """按任务页数模拟提取耗时"""
+    time.sleep(SECONDS_PER_PAGE * task["pages"])
+    return {"retCode": "0000", "retMessage": "解析成功"}
+
+
+def run_task(task_type: str, file_path: str, pages: int) -> float:
+    """执行任务，返回记录后的提取阶段每页耗时"""
+    execute_task(task_type, {"task_id": f"check-{pages}", "bid": "CHECK", "file_path": file_path, "pages": pages})
+    rates = redis_service.client.hgetall(RedisKey.TASK_TIMINGS.format(task_type=task_type))
+    return float(rates[b"extract"])
+
+
+def main():
+    logging.disable(logging.WARNING)
+    task_type = "base"
+    spec = get_task_type(task_type)
+    original = (redis_service.client, spec._handler, file_module.DOCUMENT_CACHE_ENABLED,
+                file_module.FileService.clean_temp_files, file_module.FileService.load_document)
+    redis_service.client = MemoryRedis()
+    spec._handler = simulated_handler
+    file_module.DOCUMENT_CACHE_ENABLED = False
+    file_module.FileService.clean_temp_files = staticmethod(lambda file_path: None)
+    load_document = file_module.FileService.load_document
+
+    def load(file_path, task_type=None):
+        # PDF任务不依赖PDF解析库：返回按页分隔的文本
+        if file_path.endswith(".pdf"):
+            return file_path, PAGE_SEPARATOR.join(f"第{i + 1}页 评分标准" for i in range(PDF_PAGES))
+        return load_document(file_path, task_type)
+    file_module.FileService.load_document = staticmethod(load)
+
+    ok = True
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+        pdf.write(b"%PDF-1.4\n")
+        pdf.flush()
+        try:
+            docx_pages = estimate_pages(DOCX_PATH)
+            for name, file_path, pages in (("docx", DOCX_PATH, docx_pages), ("pdf", pdf.name, PDF_PAGES)):
+                rate = run_task(task_type, file_path, pages)
+                passed = SECONDS_PER_PAGE / TOLERANCE <= rate <= SECONDS_PER_PAGE * TOLERANCE
+                ok = ok and passed
+                print(f"  {name:<5} {pages:>4}页  提取阶段每页耗时 {rate * 1000:>8.2f}ms"
+                      f"（模拟值 {SECONDS_PER_PAGE * 1000:.2f}ms）  {'通过' if passed else '失败'}")
+
+            small = redis_service.get_expected_duration(task_type, 10)
+            large = redis_service.get_expected_duration(task_type, 100)
+            passed = abs(large / small - 10) < 0.01
+            ok = ok and passed
+            print(f"  预计耗时 10页 {small:.3f}秒  100页 {large:.3f}秒  {'通过' if passed else '失败'}")
+        finally:
+            (redis_service.client, spec._handler, file_module.DOCUMENT_CACHE_ENABLED,
+             clean_temp_files, load_document) = original
+            file_module.FileService.clean_temp_files = staticmethod(clean_temp_files)
+            file_module.FileService.load_document = staticmethod(load_document)
+
+    print("检查通过" if ok else "检查失败：耗时统计与页数不一致")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+'''文本压缩检查：确认页眉、页脚、页码和水印被去除，而正文中跨页重复的短行完整保留
+
+构造8页的评分表文本：每页有相同的页眉页脚、随页变化的页码和逐页出现的水印（位于页首或页尾，位置因页而异），
+正文中有各页逐字相同的条目序号、分值（"3分"、"10分"）、"合计"、"是否满足：是"等短行
+
+用法：
+    python benchmarks/text_compact_check.py
+检查不通过时以非零状态码退出。
+'''
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PAGE_SEPARATOR  # noqa: E402
+from services.text_compactor import compact_text  # noqa: E402
+
+PAGES = 8
+HEADER = "某某单位智能化管控及信息化设备采购项目招标文件"
+FOOTER = "招标代理机构：某某招标有限公司"
+WATERMARK = "仅供投标使用"
+# 各页正文中反复出现的短行
+BODY_LINES = ["1", "2", "3分", "10分", "合计", "100", "是否满足：是", "具有有效营业执照（第1项）。"]
+
+
+def build_page(index: int) -> list:
+    lines = [
+        HEADER,
+        f"第{index + 1}节 评分细则（{index + 1}）",
+        f"本节说明评分项的计分方法，适用于第{index + 1}包。",
+        *BODY_LINES,
+        f"第{index + 1}节说明结束，下一节为第{index + 2}节。",
+        f"如有疑问请联系代理机构（第{index + 1}节）。",
+        FOOTER,
+        f"- {index + 1} -"
+    ]
+    # 水印文字在奇数页位于页面内容开头，偶数页位于末尾
+    return [WATERMARK] + lines if index % 2 else lines + [WATERMARK]
+
+
+def main():
+    logging.disable(logging.WARNING)
+    text = PAGE_SEPARATOR.join("\n".join(build_page(i)) for i in range(PAGES))
+    pages = [page.split("\n") for page in compact_text(text, "score").split(PAGE_SEPARATOR)]
+
+    checks = {
+        "页数不变": len(pages) == PAGES,
+        "没有空白页": all(any(lines) for lines in pages),
+        "正文重复短行全部保留": all(lines.count(line) == 1 for lines in pages for line in BODY_LINES),
+        "页眉页脚已去除": not any(HEADER in lines or FOOTER in lines for lines in pages),
+        "页码已去除": not any(line.startswith("- ") for lines in pages for line in lines),
+        "水印已去除（至多保留首次出现）": sum(lines.count(WATERMARK) for lines in pages) <= 1
+    }
+    for name, passed in checks.items():
+        print(f"  {name:<12} {'通过' if passed else '失败'}")
+    ok = all(checks.values())
+    print("检查通过" if ok else "检查失败")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 import os
 import logging
 from enum import Enum
-from tempfile import TemporaryDirectory
+from tempfile import TemporaryDirectory, gettempdir
 
 # 日志配置
 # 在config.py中
@@ -38,10 +38,190 @@ else:
 SUPPORTED_EXTENSIONS = ['.docx', '.xlsx', '.pptx', '.doc', '.xls', '.ppt', '.pdf']
 EXTRACT_API_URL = "http://192.168.230.29:8000/v1/chat/completions"
 DB_STRUCT_PATH = "/home/zjtx/Qwen_TenderParser/doc/tendering-struct.txt"  # 数据库结构文件路径
+SCHEMA_INDEX_MAX_TABLES = 6  # 评分提示词中最多引用的相关表数量
+SCHEMA_INDEX_MAX_COLUMNS = 15  # 每张表最多引用的相关字段数量
+# 基础信息提取模式：single（单次调用，本地校验规范化，校验不通过时回退二次调用）/ two_stage（始终两次调用）
+BASE_EXTRACT_MODE = "single"
+# 基础信息规则提取：按招标文件的固定表述（项目编号：、开标时间：、人民币…元、账号：等）本地提取字段，
+# 置信度达到阈值的字段直接采用，其余字段再调用大模型补充
+BASE_RULE_ENABLED = True
+BASE_RULE_CONFIDENCE = 0.8
+BASE_RULE_GAP_TOKEN_BUDGET = 3000  # 补充提取时只发送与缺失字段相关的段落，估算token上限
+
+# 大模型调用配置
+LLM_CONNECT_TIMEOUT = 10  # 建立连接超时（秒）
+LLM_READ_TIMEOUT = 600  # 等待响应超时（秒），长文档推理耗时较长
+LLM_MAX_RETRIES = 2  # 5xx或连接错误时的最大重试次数
+LLM_BACKOFF_BASE = 2.0  # 重试退避基数（秒），按指数增长并加随机抖动
+LLM_BACKOFF_MAX = 30.0  # 单次退避上限（秒）
+LLM_MAX_CONCURRENCY = 4  # 每个进程同时进行的大模型请求上限
+LLM_POOL_SIZE = 8  # 每个进程保持的HTTP连接数
+# 结构化输出约束解码：guided_json（vLLM扩展参数）/ response_format（OpenAI兼容参数）/ off（仅提示词约束）
+# 服务端不支持时自动回退到仅提示词约束
+LLM_GUIDED_DECODING = "guided_json"
+# 流式输出：边生成边校验JSON结构，并上报任务进度；
+# 结构错误（修复后仍无法解析）时中止生成，改用非流式请求重新生成；
+# 超出长度上限时停止接收，已生成的部分按截断输出修复解析，结果的retMessage中注明输出被截断
+LLM_STREAM_ENABLED = True
+LLM_STREAM_MAX_TOKENS = 8192  # 单次生成的token数上限（服务端未返回用量时按增量片段数计，vLLM每个片段约一个token）
+LLM_STREAM_USAGE_STATS = True  # 请求服务端在每个增量片段中返回已生成token数（stream_options，vLLM的continuous_usage_stats）
+LLM_STREAM_PROGRESS_INTERVAL = 2.0  # 任务进度上报的最小间隔（秒）
+
+# 大模型响应缓存（相同模型、提示词和采样参数的请求直接复用历史响应）
+LLM_CACHE_ENABLED = True
+LLM_CACHE_TTL = 7 * 24 * 3600  # 缓存有效期（秒）
+LLM_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 缓存总大小上限，超出后按LRU淘汰
+LLM_CACHE_MODEL_TAG = "qwen-default"  # 请求未指定model时计入缓存键的模型标识，服务端更换模型后需修改以使旧缓存失效
+
+# 消费者运行模式：sync（每进程串行处理单个任务）/ async（每进程基于asyncio并发处理多个任务）
+CONSUMER_MODE = "sync"
+ASYNC_CONSUMER_CONCURRENCY = 4  # 异步模式下每个消费者进程同时处理的任务数（各任务类型共用）
+
+# 任务队列：Redis Streams，每种任务类型一个消费者组；消费者批量读取任务（XREADGROUP COUNT），处理完成后确认（XACK），
+# 消费者异常退出时其未确认的任务空闲超时后由其他消费者认领（XAUTOCLAIM），可横向增加消费者而不丢失、不重复处理任务
+TASK_STREAM_GROUP = "tender_workers"
+TASK_STREAM_BATCH_SIZE = 4  # 单次最多读取的任务数；同步模式串行处理，每次只读取1个，避免任务积压在单个消费者上
+TASK_STREAM_BLOCK_MS = 5000  # 各任务类型均无任务时阻塞等待入队通知的时长（毫秒）
+TASK_STREAM_CLAIM_IDLE_MS = 5 * 60 * 1000  # 未确认任务空闲超过该时长视为所属消费者已退出，可被其他消费者认领
+TASK_STREAM_HEARTBEAT_INTERVAL = 60  # 处理中任务的续期间隔（秒），须明显小于认领超时，长耗时任务不会被误认领
+TASK_STREAM_MAX_DELIVERIES = 3  # 任务最多投递次数，超出后（如反复导致消费者崩溃）标记为失败并确认
+
+# 任务优先级调度：等待中的任务按"预计耗时最短优先 + 等待老化"排序，存于各任务类型的有序集合中，
+# 消费者取任务时按顺序转入任务流（由任务流保证处理中任务不丢失）；
+# 排序分值 = 预计耗时 - 显式优先级 × TASK_PRIORITY_STEP + TASK_AGING_RATE × 入队时间戳，
+# 即每等待1秒，排序相当于预计耗时减少TASK_AGING_RATE秒，大文档等待足够久后一定会被处理
+TASK_AGING_RATE = 1.0
+TASK_PRIORITY_STEP = 600  # 显式优先级每高1级，相当于预计耗时减少的秒数
+TASK_BYTES_PER_PAGE = 50 * 1024  # 无法读取页数的文件按大小折算页数
+TASK_TIMING_EWMA_ALPHA = 0.2  # 各阶段每页耗时的指数加权平均系数，越大越偏重最近的任务
+TASK_STAGE_SECONDS_PER_PAGE = {  # 尚无历史耗时记录时各阶段的每页耗时（秒）
+    "load": 0.3,  # PDF转换和文本提取
+    "extract": 1.0  # 规则和大模型提取
+}
+
+# 消费者进程池：各任务类型共用一个进程池，每个进程从所有任务流中取任务；主进程启动监督进程，
+# 按各任务流合计的积压任务数和最早任务的等待时长在min~max之间增减消费者进程，并重启异常退出的进程；
+# 缩容时进程处理完当前任务后退出
+WORKER_POOL = {
+    # min/max: 进程数上下限；tasks_per_worker: 积压任务数达到该值时扩容，每该数量个积压任务增加一个进程；
+    # max_wait: 积压任务不足tasks_per_worker但最早任务等待超过该秒数时也扩容；idle: 无积压持续该秒数后减少一个进程
+    "min": 2,
+    "max": 8,
+    "tasks_per_worker": 2,
+    "max_wait": 30,
+    "idle": 300
+}
+WORKER_SUPERVISOR_INTERVAL = 5  # 检查积压和进程存活的间隔（秒）
+WORKER_SCALE_COOLDOWN = 30  # 两次扩缩容的最小间隔（秒），等待新进程启动并开始消费
+# 各任务类型的调度权重：消费者按赤字轮询（Deficit Round Robin）从有积压的任务流中取任务，
+# 多个任务流同时积压时各类型获得的处理次数与权重成正比，只有一个任务流积压时全部处理能力用于该任务流
+TASK_SCHEDULE_WEIGHTS = {
+    "base": 1,
+    "score": 1,
+    "catalogue": 1,
+    "full": 1
+}
+WORKER_STOP_TIMEOUT = 60  # 停止服务时等待进程处理完当前任务的时长（秒），超时后强制终止，未确认的任务由其他消费者认领
+
+# 文本提取配置
+PAGE_SEPARATOR = "\f"  # 各页（幻灯片）文本之间的固定分隔符，串行与并行提取结果一致，后续可按页切分
+PDF_PARALLEL_ENABLED = True
+PDF_PARALLEL_MIN_PAGES = 60  # 页数达到该值时启用多进程分片提取
+PDF_PARALLEL_WORKERS = min(4, os.cpu_count() or 1)  # 分片提取的进程数
+PDF_PARALLEL_SHARD_PAGES = 20  # 每个分片的页数
+
+# 文档分块检索：长文档只将与任务相关的文本块发送给大模型（BM25，中文二字词）
+CHUNK_SIZE = 800  # 文本块字符数
+CHUNK_OVERLAP = 200  # 相邻文本块重叠字符数
+CHUNK_RETRIEVAL = {  # 各提取任务的查询词、token预算及固定保留的开头文本块数
+    "base": {
+        "enabled": True,
+        "queries": ["项目编号", "项目名称", "采购人", "招标人", "开标时间", "投标截止时间", "开标地点",
+                    "预算金额", "最高限价", "保证金", "开户行", "账号", "户名", "联系人", "联系电话", "代理机构"],
+        "token_budget": 6000,
+        "pin_leading": 2  # 招标公告通常位于文档开头
+    },
+    "score": {
+        "enabled": True,
+        "queries": ["评分", "分值", "评分标准", "评标办法", "得分", "满分", "业绩", "商务", "资质", "价格分"],
+        "token_budget": 12000,
+        "pin_leading": 0
+    },
+    "catalogue": {
+        "enabled": True,
+        "queries": ["附件", "目录", "投标文件格式", "响应文件格式", "应答文件格式", "授权书", "承诺函", "偏离表"],
+        "token_budget": 12000,
+        "pin_leading": 0
+    }
+}
+
+# 超长文档分段提取：发送给大模型的内容超出阈值时按页和章节切分，各段并发提取后合并
+MAP_REDUCE_ENABLED = True
+MAP_REDUCE_THRESHOLD_TOKENS = 24000  # 估算token数超过该值时启用分段
+MAP_REDUCE_SEGMENT_TOKENS = 12000  # 每段的估算token上限
+MAP_REDUCE_MAX_WORKERS = 4  # 同一任务同时提取的分段数
+
+# 章节索引：文档解析后由PDF书签、标题字号和编号规则（第X章、附件X等）构建带页码范围的章节树
+SECTION_INDEX_ENABLED = True
+SECTION_INDEX_BACKEND = "pymupdf"  # 读取书签和字号的后端，依赖未安装时回退到pdfplumber
+SECTION_INDEX_MIN_ITEMS = 3  # 投标文件格式目录至少包含的条目数
+SECTION_INDEX_CATALOGUE_CONFIDENCE = 0.8  # 目录置信度达到该值时目录任务直接返回，不再调用大模型
+SECTION_INDEX_CHAPTERS = {
+    # 各提取任务优先使用的章节（按标题关键词匹配），章节超出分块检索的token预算时仍走分块检索
+    "score": ["评标办法", "评分办法", "评审办法", "评分标准", "评标方法", "评审标准"]
+}
+
+# 文本压缩：去除各页重复的页眉、页脚、页码和水印行，合并多余空白，清空封面和空白页（保留页分隔符，页码不变）
+TEXT_COMPACT_ENABLED = True
+TEXT_COMPACT_MIN_PAGES = 4  # 页数达到该值时才识别跨页重复的行
+TEXT_COMPACT_REPEAT_RATIO = 0.5  # 页首页尾同一位置的行（忽略数字）在至少该比例的页中出现时视为页眉页脚
+TEXT_COMPACT_WATERMARK_RATIO = 0.9  # 页首页尾范围内的短行（不忽略数字，位置可不同）在至少该比例的页中逐字出现时视为水印
+TEXT_COMPACT_EDGE_LINES = 3  # 页首、页尾各检查的行数
+TEXT_COMPACT_DROP_COVER = {
+    "base": False,  # 项目名称、招标人等基础信息常取自封面
+    "score": True,
+    "catalogue": True
+}
+
+# 评分表格提取：按关键词识别评分相关页，仅对这些页提取表格并渲染为TSV，替代原始文本发送给模型
+SCORE_TABLE_ENABLED = True
+SCORE_TABLE_BACKEND = "pdfplumber"  # 表格识别效果最好的后端，依赖未安装时回退到pdfplumber
+SCORE_TABLE_KEYWORDS = ["评分标准", "评分因素", "评审因素", "评分项", "评分细则", "评审标准", "分值", "得分"]
+SCORE_TABLE_MIN_HITS = 2  # 页面至少命中的不同关键词数
+SCORE_TABLE_MAX_PAGES = 20  # 单个文档最多提取表格的页数
+
+# PDF文本提取后端（pdfplumber / pdfium / pymupdf），依赖未安装时自动回退到pdfplumber
+PDF_TEXT_BACKEND_DEFAULT = "pdfplumber"
+PDF_TEXT_BACKEND_BY_TASK = {
+    "base": "pdfplumber",
+    "score": "pdfplumber",  # 评分标准多在表格中，保留pdfplumber的版面还原
+    "catalogue": "pymupdf",  # 目录只需标题文本，使用速度最快的引擎
+    "full": "pdfplumber"  # 综合解析只提取一次文本供三项提取共用，按评分表格的需要保留版面还原
+}
+
+# OOXML直接解析（.docx/.pptx不经PDF转换，直接从压缩包XML中提取文本）
+OOXML_FAST_PATH_ENABLED = True
+OOXML_EXTENSIONS = ['.docx', '.pptx']
 
 # 临时目录
 TEMP_DIR = TemporaryDirectory(prefix="tender_")
 
+# 文档缓存配置（按上传文件的SHA-256复用PDF转换结果和提取文本，多个消费者进程共享）
+DOCUMENT_CACHE_ENABLED = True
+DOCUMENT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "documents")
+DOCUMENT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 缓存总大小上限（2GB），超出后按LRU淘汰
+
+# LibreOffice常驻转换进程池配置
+# 需要可导入uno模块的Python解释器：服务进程的解释器不能导入时，由LIBREOFFICE_UNO_PYTHON指定的解释器
+# （未配置时依次查找soffice所在目录的python、系统python3）执行转换脚本；均不可用时回退到命令行转换（每次冷启动soffice）
+LIBREOFFICE_POOL_ENABLED = True
+LIBREOFFICE_UNO_PYTHON = None  # 可导入uno的解释器路径，如/opt/libreoffice/program/python、/usr/bin/python3（python3-uno）
+LIBREOFFICE_POOL_SIZE = 2  # 每个消费者进程内的常驻soffice实例数
+LIBREOFFICE_MAX_CONVERSIONS = 50  # 单个实例转换次数达到上限后重启，避免内存持续增长
+LIBREOFFICE_CONVERT_TIMEOUT = 120  # 单次转换超时（秒）
+LIBREOFFICE_STARTUP_TIMEOUT = 30  # 实例启动超时（秒）
+LIBREOFFICE_PROFILE_ROOT = os.path.join(gettempdir(), "tender_lo_profiles")  # 各实例独立的用户配置目录
+
 # 任务状态枚举
 class TaskStatus(str, Enum):
     PENDING = "pending"
@@ -80,4 +260,43 @@ class RedisKey:
     CATALOGUE_TASK_QUEUE = "catalogue_task:queue"  # 对应原CATALOGUE_TASK_QUEUE_KEY
     CATALOGUE_TASK_STATUS = "catalogue_task:status:{task_id}"  # 对应原CATALOGUE_TASK_STATUS_KEY
     CATALOGUE_TASK_RESULT = "catalogue_task:result:{task_id}"  # 对应原CATALOGUE_TASK_RESULT_KEY
-    CATALOGUE_TASK_BID_MAPPING = "catalogue_task:bid:mapping:{bid}"  # 对应原CATALOGUE_TASK_BID_MAPPING
\ No newline at end of file
+    CATALOGUE_TASK_BID_MAPPING = "catalogue_task:bid:mapping:{bid}"  # 对应原CATALOGUE_TASK_BID_MAPPING
+
+    # 任务流键（Redis Streams，替代上面的列表队列；启动时列表中遗留的任务迁移到流中）
+    BASE_TASK_STREAM = "task:stream"
+    SCORE_TASK_STREAM = "score_task:stream"
+    CATALOGUE_TASK_STREAM = "catalogue_task:stream"
+
+    # 等待中任务的有序集合（score为调度分值，越小越先处理），取出时转入任务流
+    BASE_TASK_PENDING = "task:pending"
+    SCORE_TASK_PENDING = "score_task:pending"
+    CATALOGUE_TASK_PENDING = "catalogue_task:pending"
+    # 与等待集合成员相同、score为入队时间的有序集合，用于直接取最早入队任务的等待时长
+    BASE_TASK_ENQUEUED = "task:enqueued"
+    SCORE_TASK_ENQUEUED = "score_task:enqueued"
+    CATALOGUE_TASK_ENQUEUED = "catalogue_task:enqueued"
+
+    # 综合解析任务键（一次提交同时完成基础信息、评分标准和目录提取，各项结果写入上面对应任务类型的键）
+    FULL_TASK_STREAM = "full_task:stream"
+    FULL_TASK_PENDING = "full_task:pending"
+    FULL_TASK_ENQUEUED = "full_task:enqueued"
+    FULL_TASK_STATUS = "full_task:status:{task_id}"
+    FULL_TASK_RESULT = "full_task:result:{task_id}"
+    FULL_TASK_BID_MAPPING = "full_task:bid:mapping:{bid}"
+
+    # 任务调度键
+    TASK_NOTIFY = "task:notify"  # 列表，入队时写入，空闲消费者阻塞等待
+    TASK_TIMINGS = "task:timings:{task_type}"  # 哈希，各阶段每页耗时的加权平均
+
+    # 任务进度键（流式生成过程中的已输出条目数等）
+    BASE_TASK_PROGRESS = "task:progress:{task_id}"
+    SCORE_TASK_PROGRESS = "score_task:progress:{task_id}"
+    CATALOGUE_TASK_PROGRESS = "catalogue_task:progress:{task_id}"
+    FULL_TASK_PROGRESS = "full_task:progress:{task_id}"
+
+    # 大模型响应缓存键
+    LLM_CACHE_ENTRY = "llm_cache:entry:{key}"
+    LLM_CACHE_LRU = "llm_cache:lru"  # 有序集合，score为最近访问时间
+    LLM_CACHE_SIZES = "llm_cache:sizes"  # 哈希，各条目字节数
+    LLM_CACHE_BYTES = "llm_cache:bytes"  # 缓存总字节数
+    LLM_CACHE_STATS = "llm_cache:stats"  # 哈希，hits/misses计数
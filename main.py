@@ -6,10 +6,10 @@ import uvicorn
 from routes.base_task_routes import base_router
 from routes.score_task_routes import score_router
 from routes.catalogue_task_routes import catalogue_router
-from tasks.base_task import run_base_consumer
-from tasks.score_task import run_score_consumer
-from tasks.catalogue_task import run_catalogue_consumer
-from config import logger
+from routes.full_task_routes import full_router
+from routes.llm_cache_routes import llm_cache_router
+from tasks.supervisor import run_supervisor
+from config import logger, CONSUMER_MODE, WORKER_STOP_TIMEOUT
 
 # 初始化FastAPI应用
 app = FastAPI(title="招标信息处理服务")
@@ -18,22 +18,21 @@ app = FastAPI(title="招标信息处理服务")
 app.include_router(base_router)
 app.include_router(score_router)
 app.include_router(catalogue_router)
+app.include_router(full_router)
+app.include_router(llm_cache_router)
 
 if __name__ == "__main__":
-    # 启动基础任务消费者
-    base_consumer = Process(target=run_base_consumer, daemon=True)
-    base_consumer.start()
-    logger.info("基础任务消费者进程启动")
-    
-    # 启动评分任务消费者
-    score_consumer = Process(target=run_score_consumer, daemon=True)
-    score_consumer.start()
-    logger.info("评分任务消费者进程启动")
-
-    # 启动目录任务消费者
-    catalogue_consumer = Process(target=run_catalogue_consumer, daemon=True)
-    catalogue_consumer.start()
-    logger.info("目录任务消费者进程启动")
+    # 监督进程按各队列合计的积压在WORKER_POOL配置的上下限之间增减共用的消费者进程（每个进程处理所有任务类型）；
+    # 消费者进程需要创建子进程，因此监督进程不能设为守护进程，退出时由主进程显式终止
+    supervisor = Process(target=run_supervisor, daemon=False, name="consumer_supervisor")
+    supervisor.start()
+    logger.info(f"消费者监督进程已启动，pid: {supervisor.pid}，运行模式: {CONSUMER_MODE}")
 
     # 启动API服务
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    try:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
+    finally:
+        # 监督进程通知消费者处理完当前任务后退出，超时后强制终止
+        supervisor.terminate()
+        supervisor.join(timeout=WORKER_STOP_TIMEOUT + 15)
+        logger.info("任务消费者进程已停止")
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+'''综合解析任务API路由：一次提交同时完成基础信息、评分标准和目录提取，
+各项结果也可通过原有的基础、评分、目录结果接口按bid查询'''
+from routes.task_routes import create_task_router
+
+full_router = create_task_router(
+    "full",
+    tags=["综合解析任务"],
+    submit_path="/api/full_analysis_tasks",
+    submit_summary="提交综合解析任务（基础信息、商务评分标准、目录）",
+    result_path="/api/full_analysis_results",
+    result_summary="查询综合解析任务结果"
+)
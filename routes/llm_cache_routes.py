@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+'''大模型响应缓存统计API路由'''
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services.llm_cache import llm_response_cache
+
+llm_cache_router = APIRouter(tags=["大模型响应缓存"])
+
+@llm_cache_router.get("/api/llm_cache/stats", summary="查询大模型响应缓存命中统计")
+async def get_llm_cache_stats():
+    try:
+        return JSONResponse(llm_response_cache.stats())
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"message": f"查询缓存统计失败：{str(e)}"}
+        )
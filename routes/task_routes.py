@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+'''任务API路由工厂：按注册的任务类型生成提交任务和查询结果两个接口'''
+import os
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import JSONResponse
+from config import SUPPORTED_EXTENSIONS, TEMP_DIR, TaskStatus
+from services.redis_service import redis_service
+from services.task_registry import get_task_type
+
+
+def create_task_router(task_type: str, tags: list, submit_path: str, submit_summary: str,
+                       result_path: str, result_summary: str) -> APIRouter:
+    spec = get_task_type(task_type)
+    router = APIRouter(tags=tags)
+
+    @router.post(submit_path, summary=submit_summary)
+    async def create_task(
+        bid: str = Form(..., description="投标编号"),
+        file: UploadFile = File(..., description="待处理文件"),
+        priority: int = Form(0, description="优先级，越大越先处理，默认0")
+    ):
+        # 有子任务时，子任务类型已有处理中的同bid任务也不能提交（bid映射会被覆盖）
+        for checked_type in (task_type,) + spec.subtasks:
+            existing_task_id = redis_service.get_task_id_by_bid(checked_type, bid)
+            if not existing_task_id:
+                continue
+            existing_status = redis_service.get_task_status(checked_type, existing_task_id)
+            if existing_status in [TaskStatus.PENDING.value, TaskStatus.PROCESSING.value]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"该投标编号（{bid}）已有任务在处理中（任务ID: {existing_task_id}），请稍后再试"
+                )
+
+        # 校验文件类型
+        file_ext = os.path.splitext(file.filename)[1].lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的文件类型，支持：{SUPPORTED_EXTENSIONS}"
+            )
+
+        try:
+            # 保存临时文件（加入task_id避免重名）
+            task_id = redis_service.generate_task_id()
+            file_path = os.path.join(TEMP_DIR.name, f"{bid}_{task_id}_{file.filename}")
+            with open(file_path, "wb") as f:
+                content = await file.read()
+                f.write(content)
+
+            # 创建任务
+            task_data = redis_service.add_task(task_type, task_id, bid, file_path, priority)
+
+            response = {
+                "task_id": task_id,
+                spec.bid_field: bid,
+                "status": TaskStatus.PENDING.value,
+                "message": f"{spec.title}已提交"
+            }
+            if spec.subtasks:
+                response["subtasks"] = task_data["subtasks"]
+            return JSONResponse(response)
+        except Exception as e:
+            return JSONResponse(
+                status_code=500,
+                content={"message": f"创建{spec.label}任务失败：{str(e)}"}
+            )
+
+    @router.get(result_path, summary=result_summary)
+    async def get_result(bid: str):
+        task_id = redis_service.get_task_id_by_bid(task_type, bid)
+        if not task_id:
+            raise HTTPException(status_code=404, detail=f"未找到该bid的{spec.label}任务")
+
+        status = redis_service.get_task_status(task_type, task_id)
+        if not status:
+            raise HTTPException(status_code=404, detail=f"{spec.label}任务状态不存在")
+
+        result = redis_service.get_task_result(task_type, task_id)
+        if status == TaskStatus.SUCCESS.value and result:
+            return JSONResponse(result)
+
+        # 处理中或失败状态（处理中时附带流式生成进度）
+        processing = status in [TaskStatus.PENDING.value, TaskStatus.PROCESSING.value]
+        response = spec.make_result(
+            bid,
+            "0001" if processing else "9999",
+            "解析中" if processing else (result or {}).get("retMessage", "解析失败")
+        )
+        if status == TaskStatus.PROCESSING.value:
+            progress = redis_service.get_task_progress(task_type, task_id)
+            if progress:
+                response["progress"] = progress
+        return JSONResponse(response)
+
+    return router
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+'''文档缓存：按上传文件的SHA-256缓存转换后的PDF和各提取方式的文本，供各类任务复用'''
+import os
+import uuid
+import shutil
+import hashlib
+from config import logger, DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_BYTES
+
+# 缓存条目内的文件名（文本按提取方式分别存放，如content.pdfplumber.txt、content.ooxml.txt）
+CACHED_PDF_NAME = "document.pdf"
+CACHED_TEXT_NAME = "content.{variant}.txt"
+
+
+class DocumentCacheService:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        logger.info(f"初始化文档缓存，目录: {self.cache_dir}，容量上限: {self.max_bytes/1024/1024:.0f}MB")
+
+    @staticmethod
+    def compute_digest(file_path: str) -> str:
+        """计算文件内容的SHA-256摘要（分块读取，避免大文件占用内存）"""
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _entry_dir(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest)
+
+    def get_pdf(self, digest: str) -> str:
+        """查询缓存的PDF，命中返回路径，未命中返回None"""
+        entry_dir = self._entry_dir(digest)
+        pdf_path = os.path.join(entry_dir, CACHED_PDF_NAME)
+        if not os.path.exists(pdf_path):
+            return None
+        self._touch(entry_dir)
+        logger.info(f"文档缓存命中PDF: {digest}")
+        return pdf_path
+
+    def link_pdf(self, digest: str, dest_path: str) -> str:
+        """将缓存的PDF硬链接到dest_path（跨文件系统时复制），返回dest_path；未缓存或已被淘汰时返回None
+
+        任务使用自己的链接而非缓存中的路径，缓存条目在任务处理期间被其他进程淘汰时不影响读取
+        """
+        src_path = self.get_pdf(digest)
+        if not src_path:
+            return None
+        tmp_path = f"{dest_path}.{os.getpid()}.{uuid.uuid4().hex}"
+        try:
+            try:
+                os.link(src_path, tmp_path)
+            except OSError:
+                shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return dest_path
+        except OSError as e:
+            # 条目可能正被其他进程淘汰，按未命中处理
+            logger.warning(f"链接缓存PDF失败（{digest}）: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def get_text(self, digest: str, variant: str) -> str:
+        """查询指定提取方式的缓存文本，未命中返回None"""
+        entry_dir = self._entry_dir(digest)
+        text_path = os.path.join(entry_dir, CACHED_TEXT_NAME.format(variant=variant))
+        if not os.path.exists(text_path):
+            logger.info(f"文档缓存未命中: {digest}（{variant}）")
+            return None
+
+        try:
+            with open(text_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            self._touch(entry_dir)
+            logger.info(f"文档缓存命中: {digest}（{variant}），文本长度: {len(content)}字符")
+            return content
+        except Exception as e:
+            # 条目可能正被其他进程淘汰，按未命中处理
+            logger.warning(f"读取文档缓存失败（{digest}）: {str(e)}")
+            return None
+
+    @staticmethod
+    def _touch(entry_dir: str) -> None:
+        """更新访问时间，作为LRU淘汰依据"""
+        try:
+            os.utime(entry_dir, None)
+        except OSError:
+            pass
+
+    def put(self, digest: str, variant: str, pdf_path: str, content: str) -> str:
+        """写入缓存，返回缓存中的PDF路径（无PDF时返回None）"""
+        entry_dir = self._entry_dir(digest)
+        text_name = CACHED_TEXT_NAME.format(variant=variant)
+        tmp_suffix = f"{os.getpid()}.{uuid.uuid4().hex}"
+        try:
+            if os.path.isdir(entry_dir):
+                # 条目已存在：补充本次的文本和缺失的PDF，均先写临时文件再原子替换
+                self._write_file(entry_dir, text_name, tmp_suffix, content=content)
+                if pdf_path and not os.path.exists(os.path.join(entry_dir, CACHED_PDF_NAME)):
+                    self._write_file(entry_dir, CACHED_PDF_NAME, tmp_suffix, src_path=pdf_path)
+                logger.info(f"文档缓存条目已更新: {digest}（{variant}）")
+            else:
+                # 新条目：先写入临时目录再整体重命名，避免其他进程读到不完整的条目
+                tmp_dir = os.path.join(self.cache_dir, f".{digest}.{tmp_suffix}")
+                try:
+                    os.makedirs(tmp_dir)
+                    if pdf_path and os.path.exists(pdf_path):
+                        shutil.copyfile(pdf_path, os.path.join(tmp_dir, CACHED_PDF_NAME))
+                    with open(os.path.join(tmp_dir, text_name), "w", encoding="utf-8") as f:
+                        f.write(content)
+                    os.rename(tmp_dir, entry_dir)
+                    logger.info(f"文档已写入缓存: {digest}（{variant}）")
+                except OSError:
+                    # 其他进程已同时创建了该条目，改为补充写入
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                    if not os.path.isdir(entry_dir):
+                        raise
+                    return self.put(digest, variant, pdf_path, content)
+        except Exception as e:
+            logger.warning(f"写入文档缓存失败（{digest}）: {str(e)}")
+            return pdf_path
+
+        self._evict()
+        cached_pdf = os.path.join(entry_dir, CACHED_PDF_NAME)
+        return cached_pdf if os.path.exists(cached_pdf) else None
+
+    @staticmethod
+    def _write_file(entry_dir: str, name: str, tmp_suffix: str, content: str = None, src_path: str = None) -> None:
+        tmp_path = os.path.join(entry_dir, f".{name}.{tmp_suffix}")
+        if src_path:
+            shutil.copyfile(src_path, tmp_path)
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        os.replace(tmp_path, os.path.join(entry_dir, name))
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    def _evict(self) -> None:
+        """缓存总大小超过上限时，按最近访问时间淘汰最旧的条目"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                size = self._dir_size(path)
+                entries.append((os.path.getmtime(path), size, path))
+                total += size
+            except OSError:
+                continue
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted += 1
+        logger.info(f"文档缓存超出容量上限，已淘汰{evicted}个条目，当前大小: {total/1024/1024:.2f}MB")
+
+
+# 单例实例
+document_cache_service = DocumentCacheService(DOCUMENT_CACHE_DIR, DOCUMENT_CACHE_MAX_BYTES)
@@ -11,8 +11,8 @@ LastEditTime: 2025-08-20 17:45:57
 """目录筛选与结构化服务（基于Qwen预处理）"""
 import json
 import uuid
-import requests
 from config import logger, CATALOG_TAG_MAPPING, EXTRACT_API_URL
+from services.llm_client import llm_client
 
 class CatalogueService:
     @staticmethod
@@ -58,13 +58,8 @@ class CatalogueService:
             }
             
             # 调用Qwen API
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(EXTRACT_API_URL, headers=headers, data=json.dumps(payload))
-            response.raise_for_status()
-            
-            # 解析结果
-            qwen_result = response.json()["choices"][0]["message"]["content"].strip()
-            result_data = json.loads(qwen_result)
+            logger.info(f"向Qwen API发送请求，URL: {EXTRACT_API_URL}")
+            result_data = llm_client.chat_content(payload, parse=json.loads)
             
             # 结构校验与修正
             if "catalogue" not in result_data:
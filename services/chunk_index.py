@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+'''文档分块检索：将文档切分为重叠文本块，按中文二字词建立BM25索引，为各提取任务挑选相关段落'''
+import re
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from config import logger, PAGE_SEPARATOR, CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_RETRIEVAL
+
+CJK_RUN_PATTERN = re.compile(r'[一-鿿]+')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+CJK_CHAR_PATTERN = re.compile(r'[一-鿿　-〿＀-￯]')
+# 被跳过的内容之间的标记
+GAP_MARKER = "\n……\n"
+# BM25参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 最近使用的文档索引数量（同一文档被多个提取任务使用时复用）
+INDEX_CACHE_SIZE = 4
+
+
+def tokenize_terms(text: str) -> list:
+    """切分检索词（保留重复以统计词频）：中文按相邻二字切分，英文数字按单词切分"""
+    terms = []
+    for run in CJK_RUN_PATTERN.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    terms.extend(w for w in WORD_PATTERN.findall(text.lower()) if len(w) > 1)
+    return terms
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中文及全角字符按1个，其余按4个字符1个"""
+    cjk = len(CJK_CHAR_PATTERN.findall(text))
+    return cjk + (len(text) - cjk) // 4
+
+
+def split_chunks(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list:
+    """切分为[(起始位置, 结束位置), ...]，相邻块重叠overlap个字符，块边界尽量落在换页或换行处"""
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            # 在块的后半段寻找换页符或换行符作为边界
+            cut = max(text.rfind(PAGE_SEPARATOR, start + size // 2, end), text.rfind("\n", start + size // 2, end))
+            if cut > start:
+                end = cut + 1
+        chunks.append((start, end))
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class ChunkIndex:
+    """单个文档的BM25分块索引"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.chunks = split_chunks(text)
+        self.term_freqs = [Counter(tokenize_terms(text[s:e])) for s, e in self.chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        df = Counter()
+        for tf in self.term_freqs:
+            df.update(tf.keys())
+        total = len(self.chunks)
+        self.idf = {term: math.log(1 + (total - n + 0.5) / (n + 0.5)) for term, n in df.items()}
+
+    def score(self, queries: list) -> list:
+        """返回各文本块对查询词集合的BM25得分"""
+        query_terms = set()
+        for query in queries:
+            query_terms.update(tokenize_terms(query))
+        query_terms &= self.idf.keys()
+
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.avg_length or 1))
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (BM25_K1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, queries: list, token_budget: int, pin_leading: int = 0) -> str:
+        """按得分从高到低选取文本块直至达到token预算，按原文顺序合并输出（跳过处以省略标记分隔）"""
+        scores = self.score(queries)
+        order = list(range(min(pin_leading, len(self.chunks))))
+        order += sorted(
+            (i for i in range(len(self.chunks)) if i >= pin_leading and scores[i] > 0),
+            key=lambda i: -scores[i]
+        )
+
+        selected = []
+        used = 0
+        for i in order:
+            start, end = self.chunks[i]
+            tokens = estimate_tokens(self.text[start:end])
+            if used + tokens > token_budget:
+                continue
+            selected.append(i)
+            used += tokens
+
+        # 按原文顺序合并重叠或相邻的块
+        spans = []
+        for i in sorted(selected):
+            start, end = self.chunks[i]
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        return GAP_MARKER.join(self.text[s:e] for s, e in spans)
+
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_index(text: str) -> ChunkIndex:
+    """获取文档的分块索引（按内容摘要缓存最近使用的几个文档）"""
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    with _index_lock:
+        index = _index_cache.get(digest)
+        if index is not None:
+            _index_cache.move_to_end(digest)
+            return index
+    index = ChunkIndex(text)
+    with _index_lock:
+        _index_cache[digest] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def select_by_queries(text: str, queries: list, token_budget: int, pin_leading: int = 0, label: str = "") -> str:
+    """按查询词集合和token预算挑选相关段落；文档未超出预算时原样返回，未命中任何查询词时返回完整文档"""
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    index = get_index(text)
+    selected = index.select(queries, token_budget, pin_leading)
+    if not selected.strip():
+        logger.warning(f"[{label}]分块检索未命中任何查询词，使用完整文档")
+        return text
+    logger.info(
+        f"[{label}]分块检索完成，文本块{len(index.chunks)}个，"
+        f"文本长度: {len(text)} -> {len(selected)}字符，估算token: {estimate_tokens(selected)}"
+    )
+    return selected
+
+
+def select_relevant(text: str, task_type: str) -> str:
+    """按任务类型的查询词集合和token预算挑选相关段落；文档未超出预算或未配置时原样返回"""
+    options = CHUNK_RETRIEVAL.get(task_type)
+    if not options or not options.get("enabled", True):
+        return text
+    return select_by_queries(text, options["queries"], options["token_budget"], options.get("pin_leading", 0), task_type)
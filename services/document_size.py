@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+'''文档规模估计：提交任务时读取页数（PDF页数、Word文档属性中的页数、幻灯片数），无法读取时按文件大小折算'''
+import os
+import re
+import zipfile
+from config import logger, TASK_BYTES_PER_PAGE
+from services.pdf_backends import get_pdf_backend
+
+APP_PAGES_PATTERN = re.compile(rb'<Pages>(\d+)</Pages>')
+SLIDE_PATTERN = re.compile(r'^ppt/slides/slide\d+\.xml$')
+
+
+def _read_pages(file_path: str, ext: str):
+    if ext == ".pdf":
+        # 只读取页面树，不解析页面内容
+        return get_pdf_backend("pymupdf").page_count(file_path)
+    if ext == ".docx":
+        with zipfile.ZipFile(file_path) as zf:
+            match = APP_PAGES_PATTERN.search(zf.read("docProps/app.xml"))
+            return int(match.group(1)) if match else None
+    if ext == ".pptx":
+        with zipfile.ZipFile(file_path) as zf:
+            return sum(1 for name in zf.namelist() if SLIDE_PATTERN.match(name))
+    return None
+
+
+def estimate_pages(file_path: str) -> int:
+    """文档页数，无法读取时按TASK_BYTES_PER_PAGE折算，至少为1"""
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        pages = _read_pages(file_path, ext)
+        if pages:
+            return pages
+    except Exception as e:
+        logger.warning(f"读取文档页数失败，按文件大小估计: {file_path}，{str(e)}")
+    return max(1, round(os.path.getsize(file_path) / TASK_BYTES_PER_PAGE))
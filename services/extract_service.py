@@ -2,10 +2,45 @@
 '''信息提取服务：调用API解析文本内容'''
 import os
 import json
-import requests
-import re
-from json import JSONDecodeError
-from config import EXTRACT_API_URL, DB_STRUCT_PATH, EXTRACT_API_URL
+import time
+from config import (
+    EXTRACT_API_URL,
+    DB_STRUCT_PATH,
+    BASE_EXTRACT_MODE,
+    BASE_RULE_ENABLED,
+    BASE_RULE_CONFIDENCE,
+    BASE_RULE_GAP_TOKEN_BUDGET,
+    MAP_REDUCE_ENABLED,
+    MAP_REDUCE_THRESHOLD_TOKENS,
+    MAP_REDUCE_SEGMENT_TOKENS,
+    CHUNK_RETRIEVAL,
+    SECTION_INDEX_CHAPTERS,
+    PAGE_SEPARATOR
+)
+from services.schema_index import schema_index
+from services.llm_client import llm_client
+from services.json_repair import repair_json, TRUNCATED_KEY
+from services.chunk_index import select_relevant, select_by_queries, estimate_tokens
+from services.field_rules import extract_fields, field_labels
+from services.table_extract import tabulate_pages
+from services.map_reduce import split_segments, map_segments, merge_partials, status_code
+from services.field_normalizer import normalize_datetime, normalize_amount
+from services.prompts import (
+    build_payload,
+    BASE_INFO_SYSTEM_PROMPT,
+    BASE_INFO_RESULT_SYSTEM_PROMPT,
+    SCORE_SUMMARY_SYSTEM_PROMPT,
+    SCORE_CRITERIA_SYSTEM_PROMPT,
+    CATALOGUE_SYSTEM_PROMPT,
+    OFFICIAL_CATALOGUE_MAPPING
+)
+from services.output_schemas import (
+    BASE_INFO_SPEC,
+    BASE_INFO_RESULT_SPEC,
+    SCORE_SUMMARY_SPEC,
+    SCORE_CRITERIA_SPEC,
+    CATALOGUE_SPEC
+)
 # 在文件顶部导入logging模块（如果已有则忽略）
 import logging
 from logging.handlers import RotatingFileHandler
@@ -42,85 +77,219 @@ console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_format)
 logger.addHandler(console_handler)
 
+def parse_model_json(content: str) -> dict:
+    """解析模型返回的JSON：线性扫描截取首个完整JSON对象（忽略代码块标记及前后多余内容），并修复常见格式缺陷
+
+    输出被截断、经补全后才能解析时，结果中带有TRUNCATED_KEY标记
+    """
+    try:
+        result, truncated = repair_json(content)
+    except ValueError as e:
+        # 输出错误详情和原始内容，方便调试
+        logger.error(f"Qwen返回JSON解析失败：{str(e)}，原始内容：{content[:500]}...")
+        raise Exception(f"Qwen返回结果格式错误：{str(e)}")
+    if not isinstance(result, dict):
+        raise Exception("Qwen返回结果中未找到有效的JSON内容")
+    if truncated:
+        logger.warning(f"Qwen返回内容被截断，已补全未闭合的部分，结果可能不完整，原始内容末尾：...{content[-200:]}")
+        result[TRUNCATED_KEY] = True
+    return result
+
+
+def note_truncated(message: str, truncated: bool) -> str:
+    """模型输出曾被截断时在retMessage中注明结果可能不完整"""
+    if not truncated:
+        return message
+    return f"{message or '解析成功'}（模型输出被截断，结果可能不完整）"
+
+
+# 基础信息各部分的字段
+BASE_INFO_FIELDS = {
+    "projectInfo": ["projectCode", "projectName", "customerName", "bidOpenTime",
+                    "bidDeadlineTime", "bidAddress", "budgetAmount"],
+    "bidContactInfo": ["bidAgentOrg", "agentContactPerson", "agentContactPhone"],
+    "bidBond": ["bondAccountNumber", "bondAccountName", "bondAccountBranch",
+                "bondAmount", "bondDeadlineTime"]
+}
+BASE_REQUIRED_FIELDS = {"projectCode", "projectName"}
+BASE_DATETIME_FIELDS = {"bidOpenTime", "bidDeadlineTime", "bondDeadlineTime"}
+BASE_AMOUNT_FIELDS = {"budgetAmount", "bondAmount"}
+
+
+def normalize_base_info(data: dict) -> tuple:
+    """按接口字段规范化基础信息（日期、金额统一格式），返回(各部分字典, 校验问题列表)"""
+    sections = {}
+    problems = []
+    for section, fields in BASE_INFO_FIELDS.items():
+        raw = data.get(section)
+        if not isinstance(raw, dict):
+            problems.append(f"缺少{section}")
+            raw = {}
+        values = {}
+        for field in fields:
+            value = raw.get(field)
+            if value is None:
+                value = ""
+            if field in BASE_DATETIME_FIELDS:
+                normalized = normalize_datetime(value)
+            elif field in BASE_AMOUNT_FIELDS:
+                normalized = normalize_amount(value)
+            else:
+                normalized = str(value).strip()
+            if normalized is None:
+                problems.append(f"{field}格式无法识别: {value}")
+                normalized = str(value)
+            elif field in BASE_REQUIRED_FIELDS and not normalized:
+                problems.append(f"{field}为空")
+            values[field] = normalized
+        sections[section] = values
+    return sections, problems
+
+
+def apply_rule_fields(data: dict, accepted: dict) -> dict:
+    """用规则提取且置信度达标的字段值覆盖模型结果中的对应字段"""
+    for section, fields in BASE_INFO_FIELDS.items():
+        if not isinstance(data.get(section), dict):
+            data[section] = {}
+        for field in fields:
+            if field in accepted:
+                data[section][field] = accepted[field]
+    return data
+
+
+def stage_progress(on_progress, stage: str, item_keys: dict = None):
+    """将流式生成进度转换为任务进度：当前阶段、已生成片段数及已输出的条目数
+
+    item_keys：{进度字段名: 对应数组的键名（含约束解码短键）}，如{"criteria": ("criteria", "cr")}
+    """
+    if on_progress is None:
+        return None
+
+    def report(progress: dict) -> None:
+        data = {"stage": stage, "tokens": progress["tokens"]}
+        for name, keys in (item_keys or {}).items():
+            data[name] = sum(progress["items"].get(k, 0) for k in keys)
+        try:
+            on_progress(data)
+        except Exception as e:
+            logger.warning(f"任务进度上报失败: {str(e)}")
+    return report
+
+
 class ExtractService:
     @staticmethod
-    def extract_base_info(pdf_content: str) -> dict:
-        """提取基础招标信息（优化版：先经Qwen处理PDF内容）"""
-        logger.info("=== 开始执行基础招标信息提取流程 ===")
+    def _first_stage(content: str, system_prompt: str, content_title: str, spec: dict, name: str,
+                     report=None, join_keys: tuple = (), instructions: str = "") -> dict:
+        """首次提取：内容超出分段阈值时按页和章节切分，有限并发地逐段提取后合并结果
+
+        instructions为随任务变化的补充说明，放在user消息中文档内容之前
+        """
+        extra = [instructions] if instructions else []
+        if not MAP_REDUCE_ENABLED or estimate_tokens(content) <= MAP_REDUCE_THRESHOLD_TOKENS:
+            payload = build_payload(system_prompt, *extra, f"{content_title}\n{content}")
+            return llm_client.chat_structured(payload, spec, name, parse_model_json, report)
+
+        segments = split_segments(content, MAP_REDUCE_SEGMENT_TOKENS)
+        logger.info(f"[{name}]内容估算token超过{MAP_REDUCE_THRESHOLD_TOKENS}，切分为{len(segments)}段分别提取")
+
+        def extract(i: int, segment: str) -> dict:
+            payload = build_payload(system_prompt, *extra, f"{content_title}（第{i + 1}/{len(segments)}段）\n{segment}")
+            return llm_client.chat_structured(payload, spec, name, parse_model_json, report)
+
+        partials = map_segments(segments, extract, name)
+        succeeded = [p for p in partials if p and status_code(p) == "0000"]
+        if not succeeded:
+            raise Exception(f"分段提取全部失败（共{len(segments)}段）")
+        logger.info(f"[{name}]分段提取完成，成功{len(succeeded)}/{len(segments)}段，开始合并结果")
+        return merge_partials(succeeded, join_keys)
+
+    @staticmethod
+    def _chapter_content(sections, task_type: str, content: str = None) -> str:
+        """从章节索引中取任务对应章节的原文；未找到或超出分块检索的token预算时返回空字符串
+
+        传入content（与原文页数一致的替换版本，如评分页替换为表格TSV）时按章节页码范围从中截取
+        """
+        keywords = SECTION_INDEX_CHAPTERS.get(task_type)
+        if sections is None or not keywords:
+            return ""
+        chapter = sections.chapter(keywords)
+        if chapter is None:
+            return ""
+        if content is None:
+            text = sections.text[chapter["start"]:chapter["end"]].strip()
+        else:
+            pages = content.split(PAGE_SEPARATOR)
+            text = PAGE_SEPARATOR.join(pages[chapter["page_start"]:chapter["page_end"] + 1]).strip()
+        budget = CHUNK_RETRIEVAL.get(task_type, {}).get("token_budget")
+        if not text or (budget and estimate_tokens(text) > budget):
+            return ""
+        logger.info(
+            f"[{task_type}]使用章节索引中的「{chapter['title']}」（第{chapter['page_start'] + 1}-{chapter['page_end'] + 1}页），"
+            f"文本长度: {len(text)}字符"
+        )
+        return text
+
+    @staticmethod
+    def _score_content(pdf_content: str, sections, pdf_path: str) -> str:
+        """评分标准提取的输入：有PDF时评分相关页替换为表格TSV（有评标办法章节时只处理该章节的页），
+        再优先取评标办法章节，否则按分块检索"""
+        if not pdf_path:
+            return ExtractService._chapter_content(sections, "score") or select_relevant(pdf_content, "score")
+        keywords = SECTION_INDEX_CHAPTERS.get("score")
+        chapter = sections.chapter(keywords) if sections is not None and keywords else None
+        page_range = (chapter["page_start"], chapter["page_end"]) if chapter else None
+        content = tabulate_pages(pdf_path, pdf_content, page_range)
+        return ExtractService._chapter_content(sections, "score", content) or select_relevant(content, "score")
+
+    @staticmethod
+    def extract_base_info(pdf_content: str, on_progress=None) -> dict:
+        """提取基础招标信息
+
+        先按规则本地提取，置信度达标的字段直接采用，全部达标时不调用Qwen；
+        其余字段只发送相关段落给Qwen补充提取。
+        single模式下首次调用即按最终结构返回，本地校验并规范化日期和金额后直接使用，
+        校验不通过时再进行二次提取；two_stage模式始终两次调用
+        """
+        logger.info(f"=== 开始执行基础招标信息提取流程（模式: {BASE_EXTRACT_MODE}） ===")
+        start = time.time()
         try:
+            # 0. 规则提取
+            accepted = {}
+            if BASE_RULE_ENABLED:
+                rule_fields = extract_fields(pdf_content)
+                accepted = {f: v for f, (v, confidence) in rule_fields.items() if confidence >= BASE_RULE_CONFIDENCE}
+                logger.info(
+                    f"规则提取字段{len(rule_fields)}个，置信度达标{len(accepted)}个: "
+                    + "，".join(f"{f}({c})" for f, (_, c) in rule_fields.items())
+                )
+            gaps = [f for fields in BASE_INFO_FIELDS.values() for f in fields if f not in accepted]
+            if not gaps:
+                sections, _ = normalize_base_info(apply_rule_fields({}, accepted))
+                result = {"retCode": "0000", "retMessage": "解析成功", **sections}
+                logger.info(f"基础招标信息提取完成（规则提取全部字段，未调用Qwen），耗时: {time.time() - start:.2f}秒")
+                return result
+
             # 1. 调用Qwen预处理PDF内容
             logger.info("准备调用Qwen API进行PDF内容预处理")
-            qwen_payload = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""请帮我从提供的文件中提取指定信息，并按照以下结构化格式返回结果。具体要求如下：
-
-                        1. 整体结构：返回内容需包含1个状态信息和3个字典（Dict），分别为"返回状态"、"projectInfo"、"bidContactInfo"、"bidBond"，每个部分包含对应的字段。
-
-                        2. 各字段详细要求：
-                        - 返回状态：
-                            - retCode：字符串类型，取值范围为"0000"（返回成功）、"0001"（解析中）、"9999"（解释失败），示例："0000"
-                            - retMessage：字符串类型，用于说明错误原因，若返回成功则留空，示例：""
-
-                        - projectInfo（项目信息）：
-                            - projectCode：字符串类型，必填项，示例："2024-JL05-W1813"
-                            - projectName：字符串类型，必填项，示例："智能化管控及信息化设备"
-                            - customerName：字符串类型，非必填项，示例："中国解放军陆军工程大学"
-                            - bidOpenTime：字符串类型，格式为"YYYY-MM-DD HH24:MM:SS"，示例："2025-02-09 09:00:00"
-                            - bidDeadlineTime：字符串类型，格式同上，示例："2025-02-09 09:00:00"
-                            - bidAddress：字符串类型，示例："江苏徐州"
-                            - budgetAmount：十进制数类型，保留两位小数（去除千位分隔符），示例："3970000.00"
-
-                        - bidContactInfo（招标联系方式）：
-                            - bidAgentOrg：字符串类型
-                            - agentContactPerson：字符串类型
-                            - agentContactPhone：字符串类型
-
-                        - bidBond（投标保证金）：
-                            - bondAccountNumber：字符串类型
-                            - bondAccountName：字符串类型
-                            - bondAccountBranch：字符串类型
-                            - bondAmount：十进制数类型，保留两位小数（去除千位分隔符），示例："450000.00"
-                            - bondDeadlineTime：字符串类型，格式为"YYYY-MM-DD HH24:MM:SS"
-
-                        3. 补充说明：
-                        - 若文件中无对应信息，该字段留空即可
-                        - 请严格按照上述格式（包括字段名称、类型、格式要求）返回，避免遗漏或格式错误
-
-                        请处理以下PDF文件内容,返回符合要求的结构化数据，不要多余的内容：
-                        {pdf_content}"""
-                    }
-                ],
-                "stream": False
-            }
+            if accepted:
+                # 只需补充缺失字段：按这些字段的标签检索相关段落
+                relevant_content = select_by_queries(
+                    pdf_content, field_labels(gaps), BASE_RULE_GAP_TOKEN_BUDGET,
+                    CHUNK_RETRIEVAL["base"].get("pin_leading", 0), "base_gap"
+                )
+                instructions = "【仅需提取以下字段，其余字段留空】\n" + "、".join(gaps)
+            else:
+                # 长文档只发送与基础信息相关的文本块
+                relevant_content = select_relevant(pdf_content, "base")
+                instructions = ""
             
-            qwen_headers = {"Content-Type": "application/json"}
             logger.info(f"向Qwen API发送请求，URL: {EXTRACT_API_URL}")
-            qwen_response = requests.post(EXTRACT_API_URL, headers=qwen_headers, data=json.dumps(qwen_payload))
-            qwen_response.raise_for_status()
-            logger.info("Qwen API请求成功，状态码: %d", qwen_response.status_code)
-            
-            # 解析Qwen返回结果
-            logger.info("开始解析Qwen返回结果")
-            qwen_result = qwen_response.json()["choices"][0]["message"]["content"].strip()
-            qwen_result = qwen_result.replace("```json", "").replace("```", "").strip()
-            # processed_content = json.loads(qwen_result)
-            # 新增：用正则提取首个完整JSON对象（处理多余内容）
-            json_pattern = r'\{.*\}'  # 匹配最外层的{}包裹的内容
-            match = re.search(json_pattern, qwen_result, re.DOTALL)  # re.DOTALL让.匹配换行符
-            if not match:
-                raise Exception("Qwen返回结果中未找到有效的JSON内容")
-            cleaned_json_str = match.group(0)
-
-            # 新增：尝试解析并捕获错误
-            try:
-                processed_content = json.loads(cleaned_json_str)
-            except JSONDecodeError as e:
-                # 输出错误详情和原始内容，方便调试
-                logger.error(f"Qwen返回JSON解析失败：{str(e)}，原始内容：{cleaned_json_str[:500]}...")
-                raise Exception(f"Qwen返回结果格式错误：{str(e)}")
+            processed_content = ExtractService._first_stage(
+                relevant_content, BASE_INFO_SYSTEM_PROMPT, "【文件内容】", BASE_INFO_SPEC, "base_info",
+                stage_progress(on_progress, "基础信息提取"), instructions=instructions
+            )
             logger.info("Qwen返回结果解析完成，获取预处理数据")
+            truncated = processed_content.pop(TRUNCATED_KEY, False)
 
             # 检查Qwen处理状态
             ret_code = processed_content.get("返回状态", {}).get("retCode")
@@ -129,51 +298,46 @@ class ExtractService:
                 error_msg = processed_content.get("retMessage", "未知错误")
                 logger.error(f"Qwen处理失败，错误信息: {error_msg}")
                 raise Exception(f"Qwen处理失败：{error_msg}")
-            
+            first_elapsed = time.time() - start
+
+            apply_rule_fields(processed_content, accepted)
+
+            if BASE_EXTRACT_MODE == "single":
+                sections, problems = normalize_base_info(processed_content)
+                if not problems:
+                    result = {"retCode": "0000", "retMessage": note_truncated("解析成功", truncated), **sections}
+                    logger.info(
+                        f"基础招标信息提取完成（单次调用），返回状态: {result['retCode']}，"
+                        f"耗时: {first_elapsed:.2f}秒"
+                    )
+                    return result
+                logger.warning(f"单次提取结果校验未通过，回退到二次提取: {problems}")
+
             # 2. 使用处理后的内容调用提取API
             logger.info("准备调用提取API进行二次处理")
-            payload = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""请帮我从提供的内容中提取指定信息，并按照以下结构化格式返回结果：
-                        【提取要求】
-                        1. 整体结构：包含"返回状态"、"projectInfo"、"bidContactInfo"、"bidBond"
-                        2. 各字段详细要求：
-                        - 返回状态：retCode（"0000"/"0001"/"9999"）、retMessage
-                        - projectInfo：projectCode、projectName、customerName、bidOpenTime（YYYY-MM-DD HH24:MM:SS）、bidDeadlineTime、bidAddress、budgetAmount（两位小数）
-                        - bidContactInfo：bidAgentOrg、agentContactPerson、agentContactPhone
-                        - bidBond：bondAccountNumber、bondAccountName、bondAccountBranch、bondAmount（两位小数）、bondDeadlineTime
-                        3. 补充说明：无信息则字段留空，严格按格式返回
-
-                        【处理后的内容】
-                        {json.dumps(processed_content)}"""
-                    }
-                ],
-                "stream": False
-            }
+            payload = build_payload(BASE_INFO_RESULT_SYSTEM_PROMPT, f"【处理后的内容】\n{json.dumps(processed_content)}")
             
-            headers = {"Content-Type": "application/json"}
             logger.info(f"向提取API发送请求，URL: {EXTRACT_API_URL}")
-            response = requests.post(EXTRACT_API_URL, headers=headers, data=json.dumps(payload))
-            response.raise_for_status()
-            logger.info("提取API请求成功，状态码: %d", response.status_code)
-            
-            # 解析最终响应
-            logger.info("开始解析提取API返回结果")
-            core_content = response.json()["choices"][0]["message"]["content"].strip()
-            core_content = core_content.replace("```json", "").replace("```", "").strip()
-            extracted_data = json.loads(core_content)
+            extracted_data = llm_client.chat_structured(
+                payload, BASE_INFO_RESULT_SPEC, "base_info_result", parse_model_json,
+                stage_progress(on_progress, "基础信息二次提取")
+            )
             logger.info("提取API返回结果解析完成")
+            truncated = extracted_data.pop(TRUNCATED_KEY, False) or truncated
             
+            sections, problems = normalize_base_info(apply_rule_fields(extracted_data, accepted))
+            if problems:
+                logger.warning(f"二次提取结果存在未能规范化的字段: {problems}")
             result = {
                 "retCode": extracted_data.get("retCode", "0000"),
-                "retMessage": extracted_data.get("retMessage", "解析成功"),
-                "projectInfo": extracted_data.get("projectInfo", {}),
-                "bidContactInfo": extracted_data.get("bidContactInfo", {}),
-                "bidBond": extracted_data.get("bidBond", {})
+                "retMessage": note_truncated(extracted_data.get("retMessage", "解析成功"), truncated),
+                **sections
             }
-            logger.info(f"基础招标信息提取完成，返回状态: {result['retCode']}")
+            total_elapsed = time.time() - start
+            logger.info(
+                f"基础招标信息提取完成（二次调用），返回状态: {result['retCode']}，"
+                f"首次调用耗时: {first_elapsed:.2f}秒，总耗时: {total_elapsed:.2f}秒"
+            )
             return result
             
         except Exception as e:
@@ -183,72 +347,24 @@ class ExtractService:
             logger.info("=== 基础招标信息提取流程结束 ===")
     
     @staticmethod
-    def extract_business_score(pdf_content: str) -> dict:
-        """提取商务评分标准（优化版：先经Qwen处理PDF内容）"""
+    def extract_business_score(pdf_content: str, on_progress=None, sections=None, pdf_path: str = None) -> dict:
+        """提取商务评分标准（优化版：先经Qwen处理PDF内容）
+
+        传入章节索引且其中有评标办法章节时，只发送该章节原文；
+        传入PDF路径时评分相关页的表格以TSV形式发送
+        """
         logger.info("=== 开始执行商务评分标准提取流程 ===")
         try:
             # 1. 调用Qwen预处理PDF内容
             logger.info("准备调用Qwen API进行商务评分内容预处理")
-            qwen_payload = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""请帮我从提供的PDF文件中提取商务评分标准相关信息，具体包括但不限于以下可能涉及的方面：
-                        - 价格部分的评分规则（如基准价设定、价格偏差对应的分值计算方式等）
-                        - 财务状况的评分标准（如注册资本、净资产、盈利能力等指标的评分依据）
-                        - 商业信誉的评分细则（如是否有不良记录、获得的荣誉资质等对应的分值）
-                        - 履约能力相关的评分标准（如类似项目业绩的数量、规模及对应分值等）
-
-                        请按照以下结构化格式返回结果，不要多余的内容：
-
-                        1. 整体结构：返回内容需包含状态信息和商务评分标准文段，分别为"返回状态"和"scoreCriteria"。
-
-                        2. 各字段详细要求：
-                        - 返回状态：
-                            - retCode：字符串类型，取值范围为"0000"（返回成功）、"0001"（解析中）、"9999"（解析失败），示例："0000"
-                            - retMessage：字符串类型，用于说明错误原因，若返回成功则留空，示例：""
-
-                        - scoreCriteria（商务评分标准文段）：
-                            字符串类型，**必须是整合所有维度信息的连贯自然段落**，需包含价格、财务状况、商业信誉、履约能力等各维度的具体评分规则、补充说明、最高分值及评分方法等内容。  
-                            ▶ 禁止使用任何结构化格式（如字典、数组、分点、标题、层级划分等），仅以连贯的文字串联所有信息；  
-                            ▶ 语言需流畅，逻辑清晰，按维度自然过渡（如“价格部分的评分规则为...；财务状况方面...；商业信誉评分则依据...；履约能力评分主要考察...”）。
-
-                        3. 补充说明：
-                        - 若文件中无对应信息，scoreCriteria字段留空即可
-                        - 请严格按照上述格式（包括字段名称、类型要求）返回，**尤其确保scoreCriteria为单一连贯段落，无任何结构化元素**
-
-                        请处理以下PDF文件内容，返回符合要求的结构化数据：
-                        {pdf_content}"""
-                    }
-                ],
-                "stream": False
-            }
+            relevant_content = ExtractService._score_content(pdf_content, sections, pdf_path)
             
-            qwen_headers = {"Content-Type": "application/json"}
             logger.info(f"向Qwen API发送请求，URL: {EXTRACT_API_URL}")
-            qwen_response = requests.post(EXTRACT_API_URL, headers=qwen_headers, data=json.dumps(qwen_payload))
-            qwen_response.raise_for_status()
-            logger.info("Qwen API请求成功，状态码: %d", qwen_response.status_code)
-            
-            # 解析Qwen返回结果
-            logger.info("开始解析Qwen返回结果")
-            qwen_result = qwen_response.json()["choices"][0]["message"]["content"].strip()
-            qwen_result = qwen_result.replace("```json", "").replace("```", "").strip()
-            # processed_content = json.loads(qwen_result)
-            # 新增：用正则提取首个完整JSON对象（处理多余内容）
-            json_pattern = r'\{.*\}'  # 匹配最外层的{}包裹的内容
-            match = re.search(json_pattern, qwen_result, re.DOTALL)  # re.DOTALL让.匹配换行符
-            if not match:
-                raise Exception("Qwen返回结果中未找到有效的JSON内容")
-            cleaned_json_str = match.group(0)
-
-            # 新增：尝试解析并捕获错误
-            try:
-                processed_content = json.loads(cleaned_json_str)
-            except JSONDecodeError as e:
-                # 输出错误详情和原始内容，方便调试
-                logger.error(f"Qwen返回JSON解析失败：{str(e)}，原始内容：{cleaned_json_str[:500]}...")
-                raise Exception(f"Qwen返回结果格式错误：{str(e)}")
+            processed_content = ExtractService._first_stage(
+                relevant_content, SCORE_SUMMARY_SYSTEM_PROMPT, "【文件内容】", SCORE_SUMMARY_SPEC, "score_summary",
+                stage_progress(on_progress, "评分标准整理"), join_keys=("scoreCriteria",)
+            )
+            truncated = processed_content.pop(TRUNCATED_KEY, False)
             
             # 检查Qwen处理状态
             ret_code = processed_content.get("返回状态", {}).get("retCode")
@@ -264,117 +380,25 @@ class ExtractService:
 
             # 2. 使用处理后的内容调用提取API
             logger.info("准备调用提取API进行商务评分标准提取")
-            example_json = '''{
-                                "retCode": "0000",
-                                "retMessage": "解析成功",
-                                "criteria": [
-                                    {
-                                    "itemName": "比较合同签订时间在投标（报价）截止时间前三年以内（截止时间前三个月内不计）的主要产品（智能交互屏、录播设备、虚拟化服务器集群）的销售业绩，按销售金额计算。项目合同金额大于400万 ",
-                                    "score": 15,
-                                    "itemName": "项目业绩",
-                                    "quantity": 8,
-                                    "TagCondition": [
-                                        {
-                                        "fieldName": "projectDate",
-                                        "judge": "BETWEEN",
-                                        "condition": ["2022-07", "2025-7"]
-                                        },
-                                        {
-                                        "fieldName": "projectName",
-                                        "judge": "LIKE",
-                                        "condition": ["智能交互屏", "录播设备", "虚拟化集群"]
-                                        },
-                                        {
-                                        "fieldName": "projectAmount",
-                                        "judge": "GEQ",
-                                        "condition": [4000000.00]
-                                        }
-                                    ]
-                                    },
-                                    {
-                                    "itemName": "涉及国家秘密的计算机信息系统集成资质乙级（含乙级）以上资质、ISO9001、ISO270001",
-                                    "score": 10,
-                                    "itemName": "公司资质",
-                                    "TagCondition": [
-                                        {
-                                        "fieldName": "projectName",
-                                        "judge": "like",
-                                        "condition": ["涉及国家秘密的计算机信息系统集成资质乙级", "ISO9001", "ISO270001"]
-                                        }
-                                    ]
-                                    },
-                                    {
-                                    "itemName": "团队人员要求5人，研究生、具备高级工程师、网络工程师证书、PMP证书",
-                                    "score": 10,
-                                    "itemName": "人员要求",
-                                    "quantity": 5,
-                                    "TagCondition": [
-                                        {
-                                        "fieldName": "certificateName",
-                                        "judge": "like",
-                                        "condition": ["高级工程师", "网络工程师", "PMP证书"]
-                                        }
-                                    ]
-                                    }
-                                ]
-                                }'''
-            
-            # 检查数据库结构文件
-            logger.info(f"检查数据库结构文件是否存在: {DB_STRUCT_PATH}")
-            if not os.path.exists(DB_STRUCT_PATH):
-                logger.error(f"数据库结构文件不存在: {DB_STRUCT_PATH}")
-                raise Exception(f"数据库结构文件不存在：{DB_STRUCT_PATH}")
             
-            # 读取数据库结构文件
-            logger.info("读取数据库结构文件内容")
-            with open(DB_STRUCT_PATH, "r", encoding="utf-8") as f:
-                db_struct = f.read()
-            logger.info(f"数据库结构文件读取完成，内容长度: {len(db_struct)}字符")
+            # 从数据库结构索引中筛选与评分标准相关的表和字段（索引在文件修改后自动重建）
+            logger.info(f"按评分标准检索相关数据表，结构文件: {DB_STRUCT_PATH}")
+            db_struct = schema_index.render(refined_pdf_content)
+            logger.info(f"相关数据表结构筛选完成，内容长度: {len(db_struct)}字符")
             
-            payload = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""请结合以下数据库表结构信息和PDF文件内容，提取商务评分标准并生成结构化数据：
-                        
-                        【数据库表结构参考】
-                        {db_struct}
-                        
-                        【提取要求】
-                        1. 从PDF中识别所有评分项，每个评分项需包含：
-                        - itemName：评分项完整描述（字符串类型）
-                        - score：该项分值（数字类型，保留两位小数）
-                        - itemTag：业务标签（如"项目业绩"、"公司资质"、"人员要求"等）
-                        - quantity：数量要求（无则留空，数字类型）
-                        - TagCondition：条件数组，每个条件包含：
-                            - fieldName：对应数据库表字段名（需从表结构中匹配，字符串类型）
-                            - judge：判断方式（如BETWEEN、LIKE、GEQ、LEQ、EQ等）
-                            - condition：条件值数组（根据判断方式填写对应格式值）
-                        
-                        2. 返回格式示例：
-                        {example_json}
-                        
-                        3. 补充说明：无法匹配字段则fieldName留空，无信息则criteria为空数组
-                        
-                        【处理后的内容】
-                        {refined_pdf_content}"""
-                    }
-                ],
-                "stream": False
-            }
+            payload = build_payload(
+                SCORE_CRITERIA_SYSTEM_PROMPT,
+                f"【数据库表结构参考】（格式：表名（表注释），下列字段名 类型 注释）\n{db_struct}",
+                f"【处理后的内容】\n{refined_pdf_content}"
+            )
             
-            headers = {"Content-Type": "application/json"}
             logger.info(f"向提取API发送请求，URL: {EXTRACT_API_URL}")
-            response = requests.post(EXTRACT_API_URL, headers=headers, data=json.dumps(payload))
-            response.raise_for_status()
-            logger.info("提取API请求成功，状态码: %d", response.status_code)
-            
-            # 解析最终响应
-            logger.info("开始解析提取API返回结果")
-            core_content = response.json()["choices"][0]["message"]["content"].strip()
-            core_content = core_content.replace("```json", "").replace("```", "").strip()
-            extracted_data = json.loads(core_content)
+            extracted_data = llm_client.chat_structured(
+                payload, SCORE_CRITERIA_SPEC, "score_criteria", parse_model_json,
+                stage_progress(on_progress, "评分项提取", {"criteria": ("criteria", "cr")})
+            )
             logger.info("提取API返回结果解析完成")
+            truncated = extracted_data.pop(TRUNCATED_KEY, False) or truncated
             
             # 结构校验
             logger.info("对提取结果进行结构校验和修正")
@@ -390,7 +414,7 @@ class ExtractService:
             
             result = {
                 "retCode": extracted_data.get("retCode", "0000"),
-                "retMessage": extracted_data.get("retMessage", "解析成功"),
+                "retMessage": note_truncated(extracted_data.get("retMessage", "解析成功"), truncated),
                 "criteria": extracted_data.get("criteria", [])
             }
             logger.info(f"商务评分标准提取完成，返回状态: {result['retCode']}，共提取{len(result['criteria'])}项评分标准")
@@ -403,108 +427,15 @@ class ExtractService:
             logger.info("=== 商务评分标准提取流程结束 ===")
 
     @staticmethod
-    def extract_catalogue(pdf_content: str, bid: str) -> dict:
+    def extract_catalogue(pdf_content: str, bid: str, on_progress=None) -> dict:
         """提取并结构化目录信息"""
         logger.info("=== 开始执行目录信息提取流程 ===")
         try:
-            # 定义目录结构-业务标签对照表
-            logger.info("加载目录结构-业务标签对照表")
-            official_catalogue_mapping = {
-                "附件一：投标函": [],
-                "附件二：法定代表人授权书": [],
-                "附件三：报价一览表": [],
-                "附件四：商务条款偏离表": [],
-                "附件五：服务条款偏离表": [],
-                "附件六：合同条款偏离表": [],
-                "附件七：营业执照": [],
-                "附件八：江苏银行开户证明": [],
-                "附件九：承诺函": [],
-                "附件十：综合实力": ["企业规模", "财务状况", "资质证书", "荣誉奖项"],
-                "附件十一：业绩经验": ["项目业绩"],
-                "附件十二：项目组成员": ["人员信息"],
-                "附件十三：招标业务能力": [],
-                "附件十四：自有专家库": [],
-                "附件十五：服务方案": ["服务方案"],
-                "附件十六：沟通、协调方案": [],
-                "附件十七：内部管理制度": [],
-                "附件十八：增值服务": [],
-                "附件十九：其他材料": [],
-                "附件二十：反商业贿赂承诺书": []
-            }
-            logger.info(f"目录结构-业务标签对照表加载完成，共包含{len(official_catalogue_mapping)}项对照关系")
+            logger.info(f"目录结构-业务标签对照表共包含{len(OFFICIAL_CATALOGUE_MAPPING)}项对照关系")
             
             # 调用Qwen提取并筛选目录
             logger.info("准备调用Qwen API进行目录信息提取")
-            qwen_payload = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"""
-                        # 任务指令（必须严格执行）
-                        基于用户提供的「文件内容」和「标签对应规则」，完成以下操作：
-                        1. 筛选：仅提取文件中真实存在的应答/投标相关文件，不虚构、不遗漏；
-                        2. 打标：按「标签对应规则」为提取的文件添加业务标签，无匹配标签则填空数组[]；
-                        3. 输出：严格按指定JSON格式返回结果，不可添加任何多余文本（如解释、注释）。
-
-                        # 核心参考信息
-                        ## 1. 输出格式（固定不可修改）
-                        ```json
-                        {{
-                            "retCode": "0000",
-                            "retMessage": "解析成功",
-                            "catalogue": [
-                                {{
-                                    "itemName": "________", // 文件中真实存在的应答文件格式/投标文件格式，不虚构、不遗漏（如“法定代表人/负责人授权委托书”“业绩情况表”）
-                                    "itemTag": ["________"] // 仅从“2. 标签对应规则”提取匹配标签，无匹配则填[]
-                                }}
-                            ]
-                        }}
-                        ```
-
-                        ## 2. 标签对应规则（唯一依据，不可新增/修改）
-                        | 目录结构                | 唯一业务标签                          |
-                        |-------------------------|---------------------------------------|
-                        | 附件一：投标函          | []                                    |
-                        | 附件二：法定代表人授权书| []                                    |
-                        | 附件三：报价一览表      | []                                    |
-                        | 附件四：商务条款偏离表  | []                                    |
-                        | 附件五：服务条款偏离表  | []                                    |
-                        | 附件六：合同条款偏离表  | []                                    |
-                        | 附件七：营业执照        | []                                    |
-                        | 附件八：江苏银行开户证明| []                                    |
-                        | 附件九：承诺函          | []                                    |
-                        | 附件十：综合实力        | ["企业规模", "财务状况", "资质证书", "荣誉奖项"] |
-                        | 附件十一：业绩经验      | ["项目业绩"]                          |
-                        | 附件十二：项目组成员    | ["人员信息"]                          |
-                        | 附件十三：招标业务能力  | []                                    |
-                        | 附件十四：自有专家库    | []                                    |
-                        | 附件十五：服务方案      | ["服务方案"]                          |
-                        | 附件十六：沟通、协调方案| []                                    |
-                        | 附件十七：内部管理制度  | []                                    |
-                        | 附件十八：增值服务      | []                                    |
-                        | 附件十九：其他材料      | []                                    |
-                        | 附件二十：反商业贿赂承诺书| []                                  |
-
-                        ## 3. 提取规则（必须遵守）
-                        1. 仅保留文件中真实存在的应答文件格式/投标文件格式目录下的所有内容，不虚构、不遗漏；
-                        2. 基于上传文件中「应答文件格式 / 投标文件格式目录下真实存在的全部内容」，完成 “提取文件名称 + 按规则打标”，确保不遗漏任何一个真实存在的 itemName，不虚构未提及的内容；
-                        3. “itemName”需完整依据文件内容填写，不得捏造、篡改；
-                        4. “itemTag”需准确依据标签对应规则获取，反映文件内容所对应的业务标签，不得遗漏；
-                        5. 若单个文件对应多个标签（如“资质证书”属于“附件十：综合实力”），需将所有标签列入“itemTag”；
-                        6. 文件中无对应“目录结构”的内容（如“社保缴纳证明”），“itemTag”填[]。
-
-                        ## 4. 错误案例（禁止出现以下情况）
-                        - 错误1：将“法定代表人/负责人授权委托书”简写为“法人授权书”；
-                        - 错误2：“附件十：综合实力”的itemTag遗漏“荣誉奖项”标签；
-                        - 错误3：输出结果中包含“已完成解析”“结果如下”等JSON外多余文字。
-
-
-                        # 处理文件内容：
-                        {pdf_content}"""
-                    }
-                ],
-                "stream": False
-            }
+            relevant_content = select_relevant(pdf_content, "catalogue")
             # qwen_payload = {
             #     "messages": [
             #         {
@@ -555,32 +486,17 @@ class ExtractService:
             #     "stream": False
             # }
             
-            qwen_headers = {"Content-Type": "application/json"}
-            qwen_response = requests.post(EXTRACT_API_URL, headers=qwen_headers, data=json.dumps(qwen_payload))
-            qwen_response.raise_for_status()
-            
-            # 解析Qwen返回结果
-            qwen_result = qwen_response.json()["choices"][0]["message"]["content"].strip()
-            qwen_result = qwen_result.replace("```json", "").replace("```", "").strip()
-            # processed_content = json.loads(qwen_result)
-            # 新增：用正则提取首个完整JSON对象（处理多余内容）
-            json_pattern = r'\{.*\}'  # 匹配最外层的{}包裹的内容
-            match = re.search(json_pattern, qwen_result, re.DOTALL)  # re.DOTALL让.匹配换行符
-            if not match:
-                raise Exception("Qwen返回结果中未找到有效的JSON内容")
-            cleaned_json_str = match.group(0)
-
-            # 新增：尝试解析并捕获错误
-            try:
-                processed_content = json.loads(cleaned_json_str)
-            except JSONDecodeError as e:
-                # 输出错误详情和原始内容，方便调试
-                logger.error(f"Qwen返回JSON解析失败：{str(e)}，原始内容：{cleaned_json_str[:500]}...")
-                raise Exception(f"Qwen返回结果格式错误：{str(e)}")
+            logger.info(f"向Qwen API发送请求，URL: {EXTRACT_API_URL}")
+            processed_content = ExtractService._first_stage(
+                relevant_content, CATALOGUE_SYSTEM_PROMPT, "# 处理文件内容：", CATALOGUE_SPEC, "catalogue",
+                stage_progress(on_progress, "目录提取", {"catalogue": ("catalogue", "c")})
+            )
             
             # 结构校验与修正
             if "catalogue" not in processed_content:
                 processed_content["catalogue"] = []
+            if processed_content.pop(TRUNCATED_KEY, False):
+                processed_content["retMessage"] = note_truncated(processed_content.get("retMessage"), True)
             
             return processed_content
             
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+'''招标字段规范化：日期时间、金额等统一为接口约定格式，支持中文数字日期和大写金额'''
+import re
+from decimal import Decimal, InvalidOperation
+
+# 模型常用于表示"无此信息"的占位值，按空值处理
+EMPTY_PLACEHOLDERS = {"", "无", "暂无", "/", "-", "--", "—", "——", "未提及", "未提供", "不详", "N/A", "null", "None"}
+# 日期：2025-02-09、2025/2/9、2025.2.9、2025年2月9日
+DATE_PATTERN = re.compile(r'(\d{4})\s*[年\-/.]\s*(\d{1,2})\s*[月\-/.]\s*(\d{1,2})\s*[日号]?')
+# 时间：09:00、9:00:30、9时30分、9点、下午2时
+TIME_PATTERN = re.compile(
+    r'(上午|下午|中午|晚上)?\s*(\d{1,2})\s*(?:[:：]|时|点)\s*(?:(\d{1,2})\s*分?)?(?:\s*[:：]\s*(\d{1,2})\s*秒?)?'
+)
+# 金额数字及单位
+AMOUNT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(亿|万)?')
+AMOUNT_NOISE_PATTERN = re.compile(r'[,，\s]|人民币|RMB|CNY|[￥¥]')
+AMOUNT_UNITS = {"亿": Decimal(100000000), "万": Decimal(10000), None: Decimal(1)}
+# 中文数字（含大写金额用字）
+CN_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "壹": 1, "二": 2, "贰": 2, "貳": 2, "两": 2, "三": 3, "叁": 3, "參": 3,
+    "四": 4, "肆": 4, "五": 5, "伍": 5, "六": 6, "陆": 6, "陸": 6, "七": 7, "柒": 7, "八": 8, "捌": 8, "九": 9, "玖": 9
+}
+CN_UNITS = {"十": 10, "拾": 10, "百": 100, "佰": 100, "千": 1000, "仟": 1000}
+CN_SECTION_UNITS = {"万": 10000, "萬": 10000, "亿": 100000000, "億": 100000000}
+# 大写金额：如"壹佰贰拾万元整"、"伍仟元伍角"
+CAPITAL_AMOUNT_PATTERN = re.compile(
+    r'[零〇壹贰貳叁參肆伍陆陸柒捌玖拾佰仟一二两三四五六七八九十百千万萬亿億]+(?:[元圆][零〇整正]?)?'
+    r'(?:[零〇壹贰貳叁參肆伍陆陸柒捌玖一二三四五六七八九]角)?(?:[零〇壹贰貳叁參肆伍陆陸柒捌玖一二三四五六七八九]分)?'
+)
+CAPITAL_CHARS = "壹贰貳叁參肆伍陆陸柒捌玖拾佰仟"
+AMOUNT_UNIT_CHARS = "元圆角分万萬亿億"
+# 日期时间中的中文数字：如"二〇二五年二月九日上午九时三十分"
+CN_DATE_NUMBER_PATTERN = re.compile(r'([零〇一二两三四五六七八九十]+)(?=\s*[年月日号时点分秒])')
+
+
+def chinese_number(text: str):
+    """解析阿拉伯数字或中文数字（含大写数字和万、亿），无法解析时返回None"""
+    if text.isdigit():
+        return int(text)
+    total = 0
+    section = 0
+    number = 0
+    for ch in text:
+        if ch in CN_DIGITS:
+            number = CN_DIGITS[ch]
+        elif ch in CN_UNITS:
+            section += (number or 1) * CN_UNITS[ch]
+            number = 0
+        elif ch in CN_SECTION_UNITS:
+            unit = CN_SECTION_UNITS[ch]
+            if unit > 10000:
+                total = (total + section + number) * unit
+            else:
+                total += (section + number) * unit
+            section = number = 0
+        else:
+            return None
+    return total + section + number
+
+
+def _date_number(match) -> str:
+    run = match.group(1)
+    # 年份等逐位书写的数字（如"二〇二五"）按位转换，其余按数值解析
+    if len(run) > 1 and not any(ch in CN_UNITS for ch in run):
+        return "".join(str(CN_DIGITS[ch]) for ch in run)
+    return str(chinese_number(run))
+
+
+def parse_capital_amount(value):
+    """解析大写（或中文小写）金额为以元为单位的Decimal，未找到时返回None"""
+    text = AMOUNT_NOISE_PATTERN.sub("", str(value or ""))
+    for match in CAPITAL_AMOUNT_PATTERN.finditer(text):
+        words = match.group(0)
+        # 不含大写数字和金额单位的中文数字（如"十二"）多为普通文字
+        if not any(ch in CAPITAL_CHARS or ch in AMOUNT_UNIT_CHARS for ch in words):
+            continue
+        if not any(ch in CN_DIGITS or ch in CN_UNITS for ch in words):
+            continue
+        integer, _, fraction = words.replace("圆", "元").partition("元")
+        integer = integer.rstrip("零〇")
+        amount = chinese_number(integer) if integer else 0
+        if amount is None:
+            continue
+        amount = Decimal(amount)
+        for digit, unit in re.findall(r'(.)([角分])', fraction):
+            amount += Decimal(CN_DIGITS.get(digit, 0)) / (10 if unit == "角" else 100)
+        return amount
+    return None
+
+
+def normalize_datetime(value) -> str:
+    """规范化为"YYYY-MM-DD HH:MM:SS"；空值（含占位值）返回""，无法识别返回None"""
+    text = str(value or "").strip()
+    if text in EMPTY_PLACEHOLDERS:
+        return ""
+    text = CN_DATE_NUMBER_PATTERN.sub(_date_number, text)
+    date = DATE_PATTERN.search(text)
+    if not date:
+        return None
+    year, month, day = (int(g) for g in date.groups())
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return None
+
+    hour = minute = second = 0
+    clock = TIME_PATTERN.search(text, date.end())
+    if clock:
+        period, h, m, sec = clock.groups()
+        hour, minute, second = int(h), int(m or 0), int(sec or 0)
+        if period in ("下午", "晚上") and hour < 12:
+            hour += 12
+        elif period == "中午" and hour < 11:
+            hour += 12
+        if not (0 <= hour <= 23 and 0 <= minute <= 59 and 0 <= second <= 59):
+            return None
+    return f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}"
+
+
+def normalize_amount(value) -> str:
+    """规范化为以元为单位、两位小数、无千位分隔符的金额；空值（含占位值）返回""，无法识别返回None"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{Decimal(str(value)):.2f}"
+    text = str(value or "").strip()
+    if text in EMPTY_PLACEHOLDERS:
+        return ""
+    match = AMOUNT_PATTERN.search(AMOUNT_NOISE_PATTERN.sub("", text))
+    if not match:
+        # 只有大写金额（如"人民币伍万元整"）
+        amount = parse_capital_amount(text)
+        return f"{amount:.2f}" if amount is not None else None
+    try:
+        amount = Decimal(match.group(1)) * AMOUNT_UNITS[match.group(2)]
+    except InvalidOperation:
+        return None
+    return f"{amount:.2f}"
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+'''基础信息规则提取：按招标文件的固定表述（"项目编号："、"开标时间："、"人民币…元"、"账号："等）
+一次扫描全文，提取并规范化字段值，为每个字段给出置信度'''
+import re
+from collections import defaultdict
+from services.field_normalizer import (
+    normalize_datetime,
+    normalize_amount,
+    parse_capital_amount,
+    EMPTY_PLACEHOLDERS
+)
+
+# 上下文：(所属方关键词, 其他方关键词)，取字段前最近出现的关键词判断归属；
+# 属于其他方时丢弃（如招标人的联系人），均未出现时降低置信度
+AGENT_CONTEXT = (("代理机构", "代理公司"), ("招标人", "采购人", "招标单位", "采购单位"))
+BOND_CONTEXT = (("保证金", "代理机构", "代理公司"), ("招标人", "采购人", "履约保证金", "服务费"))
+CONTEXT_WINDOW = 300  # 向前查找上下文关键词的字符数
+CONTEXT_MISSING_FACTOR = 0.6
+
+# 规则：(字段, 值类型, 基础置信度, 标签, 上下文)，同一字段可有多条规则
+RULES = [
+    ("projectCode", "code", 0.9, ("项目编号", "招标编号", "采购编号", "招标项目编号", "采购项目编号", "项目代码"), None),
+    ("projectCode", "code", 0.8, ("招标代理机构编号", "代理机构编号", "采购计划编号"), None),
+    ("projectName", "text", 0.85, ("项目名称", "招标项目名称", "采购项目名称", "工程名称"), None),
+    ("customerName", "org", 0.85, ("招标人", "采购人", "招标单位", "采购单位", "招标人名称", "采购人名称"), None),
+    ("bidOpenTime", "datetime", 0.9, ("开标时间", "开标日期"), None),
+    ("bidDeadlineTime", "datetime", 0.9, (
+        "投标截止时间", "投标文件递交截止时间", "递交投标文件截止时间", "提交投标文件截止时间",
+        "响应文件递交截止时间", "响应文件提交截止时间"
+    ), None),
+    ("bidAddress", "text", 0.8, ("开标地点", "开标地址"), None),
+    ("budgetAmount", "amount", 0.85, ("预算金额", "采购预算", "项目预算", "最高限价", "最高投标限价", "招标控制价"), None),
+    ("bidAgentOrg", "org", 0.9, ("招标代理机构", "采购代理机构", "代理机构", "招标代理机构名称", "代理机构名称"), None),
+    ("agentContactPerson", "person", 0.85, ("联系人", "项目联系人"), AGENT_CONTEXT),
+    ("agentContactPhone", "phone", 0.85, ("联系电话", "电话", "联系方式"), AGENT_CONTEXT),
+    ("bondAccountNumber", "account", 0.85, ("账号", "帐号", "银行账号", "账户号码"), BOND_CONTEXT),
+    ("bondAccountName", "org", 0.85, ("户名", "开户名", "开户名称", "账户名称", "收款人", "收款单位"), BOND_CONTEXT),
+    ("bondAccountBranch", "org", 0.85, ("开户行", "开户银行", "开户银行名称"), BOND_CONTEXT),
+    ("bondAmount", "amount", 0.9, ("投标保证金", "投标保证金金额", "保证金金额"), None),
+    ("bondDeadlineTime", "datetime", 0.8, (
+        "保证金递交截止时间", "保证金缴纳截止时间", "保证金到账截止时间", "保证金提交截止时间"
+    ), None)
+]
+
+
+def _build_labels(rules: list) -> dict:
+    labels = {}
+    for rule in rules:
+        for label in rule[3]:
+            if label in labels:
+                raise Exception(f"字段规则标签重复: {label}（{labels[label][0]}、{rule[0]}）")
+            labels[label] = rule
+    return labels
+
+
+LABELS = _build_labels(RULES)
+# 标签（字间可有空格，如"联 系 人"）后可带括号说明和"为"，再接冒号；长标签优先匹配
+LABEL_PATTERN = re.compile(
+    "(" + "|".join("[ 　]*".join(map(re.escape, label)) for label in sorted(LABELS, key=len, reverse=True)) + ")"
+    r"[ 　]*(?:[（(][^（()）\n]{0,20}[)）])?[ 　]*为?[ 　]*[:：]"
+)
+LINE_END = re.compile(r'[\n\f]')
+SPACES = re.compile(r'[ 　]+')
+# 模板占位或引用其他章节的值
+PLACEHOLDER_PATTERN = re.compile(
+    r'^(?:见|同|按|□)|详见|参见|见(?:投标人须知|前附表|第[一二三四五六七八九十\d]+章|附件|招标公告|招标文件)|_{2,}|X{2,}|【|\['
+)
+SENTENCE_END = re.compile(r'[。；;]')
+CODE_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9\-_/.()（）\[\]【】]*[A-Za-z0-9)）\]】]')
+PHONE_PATTERN = re.compile(r'(?<!\d)(?:1[3-9]\d{9}|(?:0\d{2,3}-?)?\d{7,8}(?:-\d{1,6})?)(?!\d)')
+ACCOUNT_PATTERN = re.compile(r'\d[\d ]{6,34}\d')
+TIME_HINT = re.compile(r'[\d零〇一二两三四五六七八九十]\s*(?:[:：]|时|点)')
+SEAL_PATTERN = re.compile(r'[（(](?:盖章|公章|签章|章)[)）]')
+TEXT_END = {
+    "text": re.compile(r'[，。；;\t]'),
+    "org": re.compile(r'[，。；;\t]|\s{2,}'),
+    "person": re.compile(r'[（(，。；;\t]|\s{2,}')
+}
+TEXT_LENGTH = {"text": (2, 80), "org": (4, 60), "person": (2, 40)}
+
+
+def _parse_value(kind: str, cell: str):
+    """按值类型解析单元格文本，返回(规范化的值, 置信度系数)，无法解析返回None"""
+    cell = SENTENCE_END.split(cell, maxsplit=1)[0].strip(" 　\t")
+    if not cell or cell in EMPTY_PLACEHOLDERS or PLACEHOLDER_PATTERN.search(cell):
+        return None
+    if kind == "code":
+        match = CODE_PATTERN.match(cell)
+        if match and len(match.group(0)) >= 4 and any(ch.isdigit() for ch in match.group(0)):
+            return match.group(0), 1.0
+        return None
+    if kind == "datetime":
+        value = normalize_datetime(cell)
+        if not value:
+            return None
+        # 只有日期没有时刻时，时刻可能在其他位置说明
+        return value, 1.0 if TIME_HINT.search(cell) else 0.85
+    if kind == "amount":
+        if "%" in cell or "％" in cell:
+            return None
+        value = normalize_amount(cell)
+        if not value:
+            return None
+        # 大小写金额同时出现时相互印证
+        capital = parse_capital_amount(cell)
+        if capital is None or not re.search(r'\d', cell):
+            return value, 1.0
+        return value, 1.05 if f"{capital:.2f}" == value else 0.5
+    if kind == "phone":
+        phones = PHONE_PATTERN.findall(cell)
+        return ("/".join(phones[:3]), 1.0) if phones else None
+    if kind == "account":
+        match = ACCOUNT_PATTERN.match(cell)
+        return (match.group(0).replace(" ", ""), 1.0) if match else None
+
+    value = SEAL_PATTERN.sub("", cell)
+    value = TEXT_END[kind].split(value, maxsplit=1)[0].strip()
+    low, high = TEXT_LENGTH[kind]
+    return (value, 1.0) if low <= len(value) <= high else None
+
+
+def _context_factor(text: str, position: int, context) -> float:
+    """按字段前最近出现的所属方关键词计算置信度系数，属于其他方时返回0"""
+    if context is None:
+        return 1.0
+    # 去除字间空格（如"招 标 人"）后比较关键词的先后
+    window = SPACES.sub("", text[max(0, position - CONTEXT_WINDOW):position])
+    own = max((window.rfind(k) + len(k) for k in context[0] if k in window), default=-1)
+    other = max((window.rfind(k) + len(k) for k in context[1] if k in window), default=-1)
+    if own < 0 and other < 0:
+        return CONTEXT_MISSING_FACTOR
+    # 同一位置结束时（如"履约保证金"与"保证金"）以其他方为准
+    return 1.0 if own > other else 0.0
+
+
+def extract_fields(text: str) -> dict:
+    """一次扫描全文提取基础信息字段，返回{字段: (规范化的值, 置信度)}，未找到的字段不在结果中
+
+    同一字段有多个不同取值时取出现次数最多者并按其占比折算置信度，多处取值一致时适当提高置信度
+    """
+    matches = list(LABEL_PATTERN.finditer(text))
+    candidates = defaultdict(list)
+    for i, match in enumerate(matches):
+        field, kind, confidence, _, context = LABELS["".join(match.group(1).split())]
+        line_end = LINE_END.search(text, match.end())
+        end = line_end.start() if line_end else len(text)
+        if i + 1 < len(matches):
+            end = min(end, matches[i + 1].start())
+        parsed = _parse_value(kind, text[match.end():end])
+        if parsed is None:
+            continue
+        factor = _context_factor(text, match.start(), context)
+        if factor > 0:
+            candidates[field].append((parsed[0], confidence * parsed[1] * factor))
+
+    fields = {}
+    for field, values in candidates.items():
+        counts = defaultdict(list)
+        for value, confidence in values:
+            counts[value].append(confidence)
+        # 出现次数最多的取值，次数相同时取置信度高者，再相同时取最先出现者
+        value = max(counts, key=lambda v: (len(counts[v]), max(counts[v])))
+        agreed = len(counts[value])
+        confidence = max(counts[value]) * agreed / len(values)
+        if agreed >= 2 and agreed == len(values):
+            confidence += 0.05
+        fields[field] = (value, round(min(confidence, 0.99), 2))
+    return fields
+
+
+def field_labels(fields: list) -> list:
+    """各字段规则的标签，用作缺失字段的检索词"""
+    wanted = set(fields)
+    return [label for rule in RULES if rule[0] in wanted for label in rule[3]]
@@ -3,8 +3,31 @@
 import os
 import subprocess
 import sys
-import pdfplumber
-from config import logger
+import time
+import uuid
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import psutil
+from config import (
+    logger,
+    DOCUMENT_CACHE_ENABLED,
+    LIBREOFFICE_POOL_ENABLED,
+    LIBREOFFICE_PROFILE_ROOT,
+    OOXML_FAST_PATH_ENABLED,
+    OOXML_EXTENSIONS,
+    PAGE_SEPARATOR,
+    PDF_PARALLEL_ENABLED,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PARALLEL_WORKERS,
+    PDF_PARALLEL_SHARD_PAGES,
+    PDF_TEXT_BACKEND_DEFAULT,
+    PDF_TEXT_BACKEND_BY_TASK
+)
+from services.cache_service import document_cache_service
+from services.office_pool import office_pool
+from services.ooxml_service import ooxml_service
+from services.pdf_backends import get_pdf_backend
 
 class FileService:
     @staticmethod
@@ -42,7 +65,8 @@ class FileService:
 
     @staticmethod
     def convert_to_pdf(file_path: str, libreoffice_path: str = None, max_retries: int = 2) -> str:
-        """将文件转换为PDF（增强版：含重试机制和进程清理）"""
+        """将文件转换为PDF（优先使用常驻进程池，不可用或失败时回退到命令行转换）"""
+        profile_dir = None
         try:
             logger.info(f"开始转换文件为PDF，源文件: {file_path}")
             file_dir = os.path.dirname(file_path)
@@ -53,11 +77,22 @@ class FileService:
             # 处理LibreOffice路径
             exec_path = libreoffice_path or FileService.get_default_libreoffice_path()
             logger.debug(f"使用的LibreOffice路径: {exec_path}")
+
+            # 常驻进程池转换（省去每个文件的soffice冷启动）
+            if LIBREOFFICE_POOL_ENABLED and office_pool.is_available(exec_path):
+                if office_pool.convert(file_path, pdf_path, exec_path):
+                    logger.info(f"PDF转换成功（常驻进程池），文件路径: {pdf_path}")
+                    return pdf_path
+                logger.warning("常驻进程池转换失败，回退到命令行转换")
+            
+            # 命令行转换使用独立的用户配置目录，清理时只处理本次启动的进程
+            profile_dir = os.path.join(LIBREOFFICE_PROFILE_ROOT, f"cli_{os.getpid()}_{uuid.uuid4().hex}")
             
             # 构造转换命令
             cmd = [
                 exec_path,
                 "--headless",
+                f"-env:UserInstallation=file://{profile_dir}",
                 "--convert-to", "pdf",
                 "--outdir", file_dir,
                 file_path
@@ -91,7 +126,7 @@ class FileService:
                         )
                         # 若未到最大重试次数，清理残留进程后重试
                         if retry < max_retries:
-                            FileService._clean_libreoffice_processes()
+                            FileService._clean_libreoffice_processes(profile_dir)
                             time.sleep(3)  # 等待3秒释放资源
                             continue
                         else:
@@ -112,7 +147,7 @@ class FileService:
                             f"路径: {pdf_path}（{'不存在' if not os.path.exists(pdf_path) else '空文件'}）"
                         )
                         if retry < max_retries:
-                            FileService._clean_libreoffice_processes()
+                            FileService._clean_libreoffice_processes(profile_dir)
                             time.sleep(3)
                             continue
                         else:
@@ -122,7 +157,7 @@ class FileService:
                 except subprocess.TimeoutExpired:
                     logger.warning(f"第{retry+1}次转换超时（120秒）")
                     if retry < max_retries:
-                        FileService._clean_libreoffice_processes()  # 强制清理超时进程
+                        FileService._clean_libreoffice_processes(profile_dir)  # 强制清理超时进程
                         time.sleep(3)
                         continue
                     else:
@@ -146,34 +181,37 @@ class FileService:
         except Exception as e:
             logger.error(f"PDF转换流程异常（{file_path}）: {str(e)}", exc_info=True)
             return None
+        finally:
+            if profile_dir:
+                shutil.rmtree(profile_dir, ignore_errors=True)
 
     @staticmethod
-    def _clean_libreoffice_processes():
-        """清理残留的LibreOffice进程（跨平台）"""
-        logger.debug("开始清理残留的LibreOffice进程")
+    def _clean_libreoffice_processes(profile_dir: str):
+        """清理本次转换残留的LibreOffice进程（按独立配置目录识别，不影响其他soffice进程）"""
+        logger.debug(f"开始清理残留的LibreOffice进程，配置目录: {profile_dir}")
         process_names = [
             "soffice", "soffice.bin",  # Linux/macOS
             "soffice.exe", "soffice.bin.exe"  # Windows
         ]
         
-        killed = 0
-        for proc in psutil.process_iter(['name']):
+        targets = []
+        for proc in psutil.process_iter(['name', 'cmdline']):
             try:
-                if proc.info['name'] in process_names:
+                if proc.info['name'] in process_names and profile_dir in " ".join(proc.info['cmdline'] or []):
                     proc.terminate()  # 尝试优雅终止
                     logger.debug(f"已终止LibreOffice进程: {proc.pid} ({proc.info['name']})")
-                    killed += 1
+                    targets.append(proc)
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
         
         # 强制清理未终止的进程
+        killed = len(targets)
         if killed > 0:
-            time.sleep(2)  # 等待终止
-            for proc in psutil.process_iter(['name']):
+            _, alive = psutil.wait_procs(targets, timeout=2)  # 等待终止
+            for proc in alive:
                 try:
-                    if proc.info['name'] in process_names:
-                        proc.kill()  # 强制杀死
-                        logger.debug(f"已强制杀死LibreOffice进程: {proc.pid}")
+                    proc.kill()  # 强制杀死
+                    logger.debug(f"已强制杀死LibreOffice进程: {proc.pid}")
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
         
@@ -181,28 +219,122 @@ class FileService:
 
     
     @staticmethod
-    def extract_text_from_pdf(pdf_path: str) -> str:
-        """从PDF中提取文本"""
+    def get_backend_name(task_type: str = None) -> str:
+        """按任务类型获取配置的PDF文本提取后端名称"""
+        return PDF_TEXT_BACKEND_BY_TASK.get(task_type, PDF_TEXT_BACKEND_DEFAULT)
+
+    @staticmethod
+    def extract_text_from_pdf(pdf_path: str, backend_name: str = None) -> str:
+        """从PDF中提取文本（页数较多时按页分片多进程并行提取），各页以PAGE_SEPARATOR连接"""
         try:
-            logger.info(f"开始从PDF提取文本，文件路径: {pdf_path}")
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                page_count = len(pdf.pages)
-                logger.debug(f"PDF文件总页数: {page_count}")
-                for i, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text() or ""
-                    text += page_text
-                    logger.debug(f"已提取第{i}/{page_count}页文本，长度: {len(page_text)}字符")
+            backend = get_pdf_backend(backend_name or PDF_TEXT_BACKEND_DEFAULT)
+            logger.info(f"开始从PDF提取文本，文件路径: {pdf_path}，提取后端: {backend.name}")
+            start_time = time.time()
+            page_count = backend.page_count(pdf_path)
+            logger.debug(f"PDF文件总页数: {page_count}")
+            # 守护进程不能创建子进程，此时只能串行提取
+            use_parallel = (
+                PDF_PARALLEL_ENABLED
+                and PDF_PARALLEL_WORKERS > 1
+                and page_count >= PDF_PARALLEL_MIN_PAGES
+                and not multiprocessing.current_process().daemon
+            )
+            if use_parallel:
+                pages = FileService._extract_pages_parallel(pdf_path, page_count, backend.name)
+            else:
+                pages = backend.extract_pages(pdf_path, 0, page_count)
             
-            if text:
-                logger.info(f"PDF文本提取完成，总长度: {len(text)}字符")
+            if any(pages):
+                text = PAGE_SEPARATOR.join(pages)
+                logger.info(
+                    f"PDF文本提取完成，总长度: {len(text)}字符，"
+                    f"耗时: {time.time() - start_time:.2f}秒（{backend.name}）"
+                )
                 return text
             logger.warning(f"PDF文件{pdf_path}未提取到任何文本")
             return None
         except Exception as e:
             logger.error(f"PDF文本提取失败（{pdf_path}）: {str(e)}", exc_info=True)
             return None
-    
+
+    @staticmethod
+    def _extract_pages_parallel(pdf_path: str, page_count: int, backend_name: str) -> list:
+        """将页码范围切分为分片，在进程池中并行提取，按页序合并"""
+        shards = [
+            (start, min(start + PDF_PARALLEL_SHARD_PAGES, page_count))
+            for start in range(0, page_count, PDF_PARALLEL_SHARD_PAGES)
+        ]
+        workers = min(PDF_PARALLEL_WORKERS, len(shards))
+        logger.info(f"启用并行PDF文本提取，总页数: {page_count}，分片数: {len(shards)}，进程数: {workers}")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map按提交顺序返回结果，保证页序与串行提取一致
+            results = executor.map(
+                _extract_page_range,
+                [backend_name] * len(shards),
+                [pdf_path] * len(shards),
+                [start for start, _ in shards],
+                [end for _, end in shards]
+            )
+            pages = []
+            for shard_pages in results:
+                pages.extend(shard_pages)
+        return pages
+
+    @staticmethod
+    def load_document(file_path: str, task_type: str = None) -> tuple:
+        """获取文档的PDF路径和文本内容（优先复用文档缓存），返回(pdf_path, pdf_content)
+
+        OOXML文件直接解析时没有PDF，pdf_path为None；PDF文本按任务类型配置的后端提取；
+        返回的PDF均位于任务临时目录（缓存中的PDF先链接过来），不会因缓存淘汰在任务处理期间被删除
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        use_ooxml = OOXML_FAST_PATH_ENABLED and ext in OOXML_EXTENSIONS
+        backend_name = FileService.get_backend_name(task_type)
+        variant = "ooxml" if use_ooxml else backend_name
+
+        digest = None
+        if DOCUMENT_CACHE_ENABLED:
+            digest = document_cache_service.compute_digest(file_path)
+            cached_content = document_cache_service.get_text(digest, variant)
+            if cached_content:
+                logger.info(f"复用已缓存的文档解析结果，跳过PDF转换和文本提取: {file_path}")
+                return FileService._cached_pdf(file_path, digest), cached_content
+
+        pdf_path = None
+        pdf_content = None
+        if use_ooxml:
+            # .docx/.pptx直接解析XML，无需转换PDF
+            pdf_content = ooxml_service.extract_text(file_path)
+            if not pdf_content:
+                logger.warning(f"OOXML直接解析未获取到文本，回退到PDF转换: {file_path}")
+                variant = backend_name
+
+        if not pdf_content:
+            # 其他任务已转换过的PDF直接复用；已是PDF的文件无需转换
+            pdf_path = FileService._cached_pdf(file_path, digest) if digest else None
+            if not pdf_path:
+                pdf_path = file_path if ext == ".pdf" else FileService.convert_to_pdf(file_path)
+            if not pdf_path:
+                return None, None
+            pdf_content = FileService.extract_text_from_pdf(pdf_path, backend_name)
+            if not pdf_content:
+                return pdf_path, None
+
+        if digest:
+            document_cache_service.put(digest, variant, pdf_path, pdf_content)
+            if not pdf_path:
+                # OOXML直接解析时复用其他任务已转换的PDF（供表格提取等使用）
+                pdf_path = FileService._cached_pdf(file_path, digest)
+        return pdf_path, pdf_content
+
+    @staticmethod
+    def _cached_pdf(file_path: str, digest: str) -> str:
+        """取缓存的PDF在任务临时目录中的链接（与转换结果同名，任务结束时随临时文件清理），未缓存时返回None"""
+        if os.path.splitext(file_path)[1].lower() == ".pdf":
+            # 上传的就是PDF，内容与缓存相同，直接使用原文件
+            return file_path if document_cache_service.get_pdf(digest) else None
+        return document_cache_service.link_pdf(digest, os.path.splitext(file_path)[0] + ".pdf")
+
     @staticmethod
     def clean_temp_files(file_path: str) -> None:
         """清理临时文件（原文件和转换的PDF）"""
@@ -227,5 +359,9 @@ class FileService:
             except Exception as e:
                 logger.warning(f"临时PDF删除失败（{pdf_path}）: {str(e)}")
 
+def _extract_page_range(backend_name: str, pdf_path: str, start: int, end: int) -> list:
+    """提取[start, end)页的文本（进程池任务，需定义在模块级以便序列化）"""
+    return get_pdf_backend(backend_name).extract_pages(pdf_path, start, end)
+
 # 单例实例
 file_service = FileService()
\ No newline at end of file
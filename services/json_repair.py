@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+'''模型输出JSON提取与修复：单次线性扫描定位首个完整的顶层JSON值，并修复常见格式缺陷
+
+可修复的缺陷：
+- JSON前后的说明文字、代码块标记（JSON之后出现的括号不会影响截取范围）
+- 尾随逗号：{"a": 1,} / [1, 2,]
+- 全角符号用作结构符：“键”：“值”，
+- 输出被截断：补全未闭合的字符串和括号，丢弃最后一个不完整的元素（repair_json会报告做过截断补全，结果可能不完整）
+'''
+import re
+import json
+from collections import deque
+
+OPENERS = {"{": "}", "[": "]"}
+# 字符串外的全角结构符
+FULLWIDTH_PUNCT = {"：": ":", "，": ",", "｛": "{", "｝": "}", "［": "[", "］": "]"}
+FULLWIDTH_QUOTES = {"“", "”"}
+# 字符串内需要逐个处理的字符，其余内容整段复制
+STRING_SPECIAL_PATTERN = re.compile(r'["\\“”]')
+# 字符串外的空白串、非结构符串（数值、字面量），整段复制
+PLAIN_PATTERN = re.compile(r'(\s+)|([^\s"“”{}\[\],:：，｛｝［］]+)')
+# 最多尝试的起始位置数（首个"{"可能出现在说明文字中）
+MAX_CANDIDATES = 3
+# 截断修复时最多回退的元素数
+MAX_ROLLBACKS = 5
+# 解析结果中标记"输出被截断、已补全"的键，由调用方在最终结果的retMessage中注明
+TRUNCATED_KEY = "_truncated"
+
+
+def _scan(text: str, start: int) -> tuple:
+    """从start处的开括号扫描到与之匹配的闭括号，边扫描边修复
+
+    返回(修复后的文本, 结束位置, 输出片段列表, 截断时可回退的安全位置列表)；未闭合时结束位置为-1
+    """
+    out = []
+    stack = []
+    # 截断时的回退点：(输出列表长度, 当时的括号栈)，位于容器内每个完整元素之后，只保留最近几个
+    safe_points = deque(maxlen=MAX_ROLLBACKS)
+    in_string = False
+    string_quote = None
+    escape = False  # 截断在转义符之后
+    last_sig = -1  # 字符串外最后一个非空白输出元素的下标
+
+    i = start
+    n = len(text)
+    while i < n:
+        if in_string:
+            match = STRING_SPECIAL_PATTERN.search(text, i)
+            if not match:
+                out.append(text[i:])
+                break
+            if match.start() > i:
+                out.append(text[i:match.start()])
+            i = match.start()
+            ch = text[i]
+            if ch == "\\":
+                if i + 1 >= n:
+                    escape = True
+                    break
+                out.append(text[i:i + 2])
+                i += 2
+                continue
+            if ch == string_quote or (string_quote == "”" and ch == "“"):
+                in_string = False
+                out.append('"')
+                last_sig = len(out) - 1
+            elif ch == '"':
+                # 全角引号包裹的字符串中出现半角引号，需转义
+                out.append('\\"')
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        ch = text[i]
+        ch = FULLWIDTH_PUNCT.get(ch, ch)
+        if ch == '"' or ch in FULLWIDTH_QUOTES:
+            in_string = True
+            string_quote = '"' if ch == '"' else "”"
+            out.append('"')
+        elif ch in OPENERS:
+            stack.append(OPENERS[ch])
+            out.append(ch)
+            last_sig = len(out) - 1
+        elif ch in "}]":
+            if not stack or ch != stack[-1]:
+                # 括号不匹配，交给json.loads报错
+                out.append(ch)
+                return "".join(out), i, out, safe_points
+            if last_sig >= 0 and out[last_sig] == ",":
+                out[last_sig] = ""
+            stack.pop()
+            out.append(ch)
+            last_sig = len(out) - 1
+            if not stack:
+                return "".join(out), i, out, safe_points
+        elif ch == ",":
+            safe_points.append((len(out), tuple(stack)))
+            out.append(ch)
+            last_sig = len(out) - 1
+        else:
+            match = PLAIN_PATTERN.match(text, i)
+            if match:
+                out.append(match.group(0))
+                if match.group(2):
+                    last_sig = len(out) - 1
+                i = match.end()
+                continue
+            out.append(ch)
+            last_sig = len(out) - 1
+        i += 1
+
+    # 文本结束仍未闭合：输出被截断
+    return _close_truncated(list(out), stack, in_string, escape, last_sig), -1, out, safe_points
+
+
+def _close_truncated(out: list, stack: list, in_string: bool, escape: bool, last_sig: int) -> str:
+    """补全截断的输出：闭合字符串，处理悬空的逗号/冒号，再按栈补齐括号"""
+    if in_string:
+        if escape:
+            out.append("\\")
+        out.append('"')
+    else:
+        del out[last_sig + 1:]
+        if out and out[-1] == ",":
+            out.pop()
+        elif out and out[-1] == ":":
+            out.append("null")
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+# strict=False：允许字符串中出现未转义的换行等控制字符
+DECODER = json.JSONDecoder(strict=False)
+
+
+def _load(candidate: str):
+    return DECODER.decode(candidate)
+
+
+def repair_json(text: str, opening: str = "{") -> tuple:
+    """提取并解析文本中首个完整的顶层JSON值（默认对象），返回(值, 是否补全了被截断的输出)，失败时抛出ValueError"""
+    pos = text.find(opening)
+    last_error = None
+    for _ in range(MAX_CANDIDATES):
+        if pos < 0:
+            break
+        # 格式正确时直接由C实现的解码器解析首个完整值，忽略其后的内容
+        try:
+            return DECODER.raw_decode(text, pos)[0], False
+        except ValueError:
+            pass
+
+        candidate, end, out, safe_points = _scan(text, pos)
+        try:
+            return _load(candidate), end < 0
+        except ValueError as e:
+            last_error = e
+
+        if end < 0:
+            # 截断修复失败（如截断在键名处）：从后往前回退到完整元素之后再闭合
+            for length, stack in reversed(safe_points):
+                try:
+                    return _load("".join(out[:length]) + "".join(reversed(stack))), True
+                except ValueError:
+                    continue
+            break
+        pos = text.find(opening, pos + 1)
+
+    if last_error is None:
+        raise ValueError("未找到JSON内容")
+    raise last_error
+
+
+def extract_json(text: str, opening: str = "{"):
+    """提取并解析文本中首个完整的顶层JSON值（默认对象），失败时抛出ValueError"""
+    return repair_json(text, opening)[0]
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+'''流式JSON结构校验：逐段接收模型输出，尽早发现结构错误，并统计数组中已完成的对象数量
+
+与json_repair的修复范围保持一致：全角引号和全角结构符视为对应的半角符号；
+首个"{"出现在说明文字中（如"按照{字段: 值}的格式"）导致结构错误时，从其后的下一个"{"重新校验
+'''
+from services.json_repair import FULLWIDTH_PUNCT, FULLWIDTH_QUOTES, MAX_CANDIDATES
+
+# 首个"{"之前允许出现的字符数（如代码块标记），超出视为未按要求输出JSON
+MAX_PREFIX_CHARS = 200
+# 字符串外允许出现的字符：空白、数字、true/false/null及数值符号
+VALUE_CHARS = set(" \t\r\n0123456789.+-eEtrufalsn")
+
+
+class IncrementalJsonValidator:
+    """增量校验JSON结构（不构造对象）
+
+    - invalid：出现括号不匹配、字符串外非法字符等结构错误，且已无可重新校验的起始位置时为错误说明
+    - complete：根对象已闭合
+    - restarted：是否从后面的"{"重新校验过（此时已闭合的对象不一定是最终解析的JSON，不应据此提前结束生成）
+    - counts：{数组所在的键名: 已闭合的元素对象数}，如评分项数组已输出的条目数
+    """
+
+    def __init__(self):
+        self.invalid = None
+        self.complete = False
+        self.restarted = False
+        self._text = []  # 已接收的全部字符，重新校验时从中回放
+        self._candidates = 0
+        self._generation = 0  # 每次重新校验加1，回放过程中再次重新校验时停止外层回放
+        self._start = -1  # 当前校验的根对象"{"在_text中的位置
+        self._reset()
+
+    def _reset(self) -> None:
+        self.counts = {}
+        self._started = False
+        self._prefix = 0
+        # 栈元素：[类型, 所在键名, 是否等待键名]
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_quote = None
+        self._string_buf = None
+        self._last_key = None
+
+    def feed(self, text: str) -> None:
+        for ch in text:
+            if self.invalid or self.complete:
+                return
+            self._text.append(ch)
+            self._feed_char(ch, len(self._text) - 1)
+
+    def _fail(self, reason: str) -> None:
+        """当前起始位置校验失败：尚有可尝试的起始位置时从下一个"{"重新校验已接收的内容"""
+        if self._start < 0 or self._candidates >= MAX_CANDIDATES:
+            self.invalid = reason
+            return
+        self.restarted = True
+        self._generation += 1
+        generation = self._generation
+        replay_from = self._start + 1
+        self._reset()
+        for position in range(replay_from, len(self._text)):
+            if self.invalid or self.complete or self._generation != generation:
+                return
+            self._feed_char(self._text[position], position)
+
+    def _feed_char(self, ch: str, position: int) -> None:
+        if not self._started:
+            if ch in "{｛":
+                self._started = True
+                self._start = position
+                self._candidates += 1
+                self._stack.append(["{", None, True])
+            else:
+                self._prefix += 1
+                if self._prefix > MAX_PREFIX_CHARS:
+                    self._start = -1
+                    self._fail("输出开头未出现JSON对象")
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == self._string_quote or (self._string_quote == "”" and ch == "“"):
+                self._in_string = False
+                if self._string_buf is not None:
+                    self._last_key = "".join(self._string_buf)
+                    self._string_buf = None
+            elif self._string_buf is not None:
+                self._string_buf.append(ch)
+            return
+
+        top = self._stack[-1]
+        ch = FULLWIDTH_PUNCT.get(ch, ch)
+        if ch == '"' or ch in FULLWIDTH_QUOTES:
+            self._in_string = True
+            self._string_quote = '"' if ch == '"' else "”"
+            # 对象中等待键名时记录键名
+            self._string_buf = [] if top[0] == "{" and top[2] else None
+        elif ch == ":":
+            if top[0] != "{" or not top[2]:
+                self._fail("冒号位置错误")
+                return
+            top[2] = False
+        elif ch == ",":
+            if top[0] == "{":
+                top[2] = True
+        elif ch in "{[":
+            if top[0] == "{" and top[2]:
+                self._fail("对象键名位置出现了值")
+                return
+            key = self._last_key if top[0] == "{" else top[1]
+            self._stack.append([ch, key, ch == "{"])
+        elif ch in "}]":
+            expected = "{" if ch == "}" else "["
+            if top[0] != expected:
+                self._fail(f"括号不匹配：{top[0]} 与 {ch}")
+                return
+            closed = self._stack.pop()
+            if not self._stack:
+                self.complete = True
+            elif closed[0] == "{" and self._stack[-1][0] == "[":
+                key = self._stack[-1][1]
+                self.counts[key] = self.counts.get(key, 0) + 1
+        elif ch not in VALUE_CHARS:
+            self._fail(f"字符串外出现非法字符：{ch!r}")
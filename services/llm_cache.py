@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+'''大模型响应缓存：按模型、消息内容和采样参数的哈希缓存响应，存储于Redis，支持TTL和总容量LRU淘汰'''
+import json
+import time
+import hashlib
+import redis
+from config import (
+    logger,
+    REDIS_URL,
+    RedisKey,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_MODEL_TAG
+)
+
+# 不影响生成结果、不参与缓存键计算的请求参数
+NON_SEMANTIC_PARAMS = {"stream", "stream_options", "user"}
+
+
+class LlmResponseCache:
+    def __init__(self):
+        self.client = redis.from_url(REDIS_URL)
+
+    @staticmethod
+    def make_key(payload: dict) -> str:
+        """缓存键：模型 + 消息 + 采样参数（如temperature、max_tokens、guided_json）的SHA-256"""
+        material = {k: v for k, v in payload.items() if k not in NON_SEMANTIC_PARAMS}
+        material.setdefault("model", LLM_CACHE_MODEL_TAG)
+        raw = json.dumps(material, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict:
+        """查询缓存，命中时刷新LRU访问时间"""
+        try:
+            data = self.client.get(RedisKey.LLM_CACHE_ENTRY.format(key=key))
+            if data is None:
+                self.client.hincrby(RedisKey.LLM_CACHE_STATS, "misses", 1)
+                return None
+            pipe = self.client.pipeline()
+            pipe.zadd(RedisKey.LLM_CACHE_LRU, {key: time.time()})
+            pipe.hincrby(RedisKey.LLM_CACHE_STATS, "hits", 1)
+            pipe.execute()
+            logger.info(f"大模型响应缓存命中: {key}")
+            return json.loads(data)
+        except Exception as e:
+            logger.warning(f"读取大模型响应缓存失败: {str(e)}")
+            return None
+
+    def put(self, key: str, response: dict) -> None:
+        try:
+            data = json.dumps(response, ensure_ascii=False)
+            size = len(data.encode("utf-8"))
+            old_size = self.client.hget(RedisKey.LLM_CACHE_SIZES, key)
+            pipe = self.client.pipeline()
+            pipe.set(RedisKey.LLM_CACHE_ENTRY.format(key=key), data, ex=LLM_CACHE_TTL)
+            pipe.zadd(RedisKey.LLM_CACHE_LRU, {key: time.time()})
+            pipe.hset(RedisKey.LLM_CACHE_SIZES, key, size)
+            pipe.incrby(RedisKey.LLM_CACHE_BYTES, size - int(old_size or 0))
+            pipe.execute()
+            logger.info(f"大模型响应已写入缓存: {key}，大小: {size/1024:.2f}KB")
+            self._evict()
+        except Exception as e:
+            logger.warning(f"写入大模型响应缓存失败: {str(e)}")
+
+    def invalidate(self, key: str) -> None:
+        """删除缓存条目（如响应内容无法解析时）"""
+        try:
+            self._remove([key])
+        except Exception as e:
+            logger.warning(f"删除大模型响应缓存失败: {str(e)}")
+
+    def _remove(self, keys: list) -> None:
+        if not keys:
+            return
+        sizes = self.client.hmget(RedisKey.LLM_CACHE_SIZES, keys)
+        pipe = self.client.pipeline()
+        pipe.delete(*[RedisKey.LLM_CACHE_ENTRY.format(key=k) for k in keys])
+        pipe.zrem(RedisKey.LLM_CACHE_LRU, *keys)
+        pipe.hdel(RedisKey.LLM_CACHE_SIZES, *keys)
+        pipe.decrby(RedisKey.LLM_CACHE_BYTES, sum(int(s or 0) for s in sizes))
+        pipe.execute()
+
+    def _evict(self) -> None:
+        """先清理已过期条目的记录，仍超出容量时按最近访问时间淘汰"""
+        total = int(self.client.get(RedisKey.LLM_CACHE_BYTES) or 0)
+        if total <= LLM_CACHE_MAX_BYTES:
+            return
+
+        # 最近访问早于TTL的条目必然已过期
+        expired = self.client.zrangebyscore(RedisKey.LLM_CACHE_LRU, 0, time.time() - LLM_CACHE_TTL)
+        self._remove([k.decode() for k in expired])
+
+        evicted = len(expired)
+        while int(self.client.get(RedisKey.LLM_CACHE_BYTES) or 0) > LLM_CACHE_MAX_BYTES:
+            oldest = self.client.zrange(RedisKey.LLM_CACHE_LRU, 0, 9)
+            if not oldest:
+                break
+            self._remove([k.decode() for k in oldest])
+            evicted += len(oldest)
+        logger.info(f"大模型响应缓存超出容量上限，已清理{evicted}个条目")
+
+    def stats(self) -> dict:
+        """命中/未命中次数及当前容量（所有进程共享）"""
+        counters = self.client.hgetall(RedisKey.LLM_CACHE_STATS)
+        hits = int(counters.get(b"hits", 0))
+        misses = int(counters.get(b"misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hitRate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "entries": self.client.zcard(RedisKey.LLM_CACHE_LRU),
+            "bytes": int(self.client.get(RedisKey.LLM_CACHE_BYTES) or 0),
+            "maxBytes": LLM_CACHE_MAX_BYTES
+        }
+
+
+# 单例实例
+llm_response_cache = LlmResponseCache()
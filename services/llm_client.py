@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+'''大模型调用客户端：连接池复用、超时控制、失败重试、进程内并发限制及流式输出校验'''
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    logger,
+    EXTRACT_API_URL,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_MAX_CONCURRENCY,
+    LLM_POOL_SIZE,
+    LLM_CACHE_ENABLED,
+    LLM_GUIDED_DECODING,
+    LLM_STREAM_ENABLED,
+    LLM_STREAM_MAX_TOKENS,
+    LLM_STREAM_USAGE_STATS,
+    LLM_STREAM_PROGRESS_INTERVAL
+)
+from services.llm_cache import llm_response_cache
+from services.output_schemas import with_guided_decoding, expand
+from services.json_stream import IncrementalJsonValidator
+from services.json_repair import TRUNCATED_KEY
+
+
+# 服务端拒绝约束解码参数时错误内容中出现的参数名（vLLM、OpenAI兼容服务）
+GUIDED_PARAM_MARKERS = ("guided_json", "guided_decoding", "response_format", "json_schema")
+
+
+def _error_body(error: Exception) -> str:
+    """HTTP错误的响应内容，无法读取时返回空字符串"""
+    try:
+        return error.response.text or ""
+    except Exception:
+        return ""
+
+
+class StreamAbortedError(Exception):
+    """流式输出结构错误、已中止生成；调用方改用非流式请求重新生成"""
+
+
+def stream_body(payload: dict) -> str:
+    """流式请求体：按配置要求服务端在增量片段中返回已生成的token数"""
+    body = {**payload, "stream": True}
+    if LLM_STREAM_USAGE_STATS:
+        body["stream_options"] = {"include_usage": True, "continuous_usage_stats": True}
+    return json.dumps(body)
+
+
+class StreamCollector:
+    """汇总SSE增量片段：校验JSON结构、限制生成长度，并按间隔产生进度"""
+
+    def __init__(self, validate: bool):
+        self.parts = []
+        self.chunks = 0
+        self.tokens = 0  # 服务端返回用量时为已生成的token数，否则为增量片段数
+        self.finish_reason = None
+        self.validator = IncrementalJsonValidator() if validate else None
+        self._last_report = time.time()
+
+    def feed_line(self, line: str) -> bool:
+        """处理一行SSE数据，返回生成是否已结束
+
+        结构错误时抛出StreamAbortedError；超出长度上限时结束接收，finish_reason为length，已生成的部分交由调用方修复解析
+        """
+        if not line or not line.startswith("data:"):
+            return False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return True
+        chunk = json.loads(data)
+        usage = chunk.get("usage") or {}
+        choices = chunk.get("choices") or []
+        if not choices:
+            return False
+
+        choice = choices[0]
+        delta = (choice.get("delta") or {}).get("content") or ""
+        if delta:
+            self.parts.append(delta)
+            self.chunks += 1
+            self.tokens = usage.get("completion_tokens") or self.chunks
+            if self.validator:
+                self.validator.feed(delta)
+                if self.validator.invalid:
+                    raise StreamAbortedError(f"大模型输出结构错误，已中止生成：{self.validator.invalid}")
+                if self.validator.complete and not self.validator.restarted:
+                    # JSON已完整输出，不再等待其后的多余内容
+                    self.finish_reason = "stop"
+                    return True
+            if self.tokens > LLM_STREAM_MAX_TOKENS:
+                logger.warning(f"大模型输出超过{LLM_STREAM_MAX_TOKENS}个token，停止接收，已生成的部分按截断输出解析")
+                self.finish_reason = "length"
+                return True
+        if choice.get("finish_reason"):
+            self.finish_reason = choice["finish_reason"]
+        return False
+
+    def progress(self) -> dict:
+        """距上次上报超过间隔时返回进度（已生成片段数、各数组已输出的条目数），否则返回None"""
+        now = time.time()
+        if now - self._last_report < LLM_STREAM_PROGRESS_INTERVAL:
+            return None
+        self._last_report = now
+        return {"tokens": self.tokens, "items": dict(self.validator.counts) if self.validator else {}}
+
+    def response(self) -> dict:
+        """组装为与非流式响应相同的结构"""
+        return {"choices": [{"message": {"content": "".join(self.parts)}, "finish_reason": self.finish_reason}]}
+
+
+class LlmClient:
+    def __init__(self, api_url: str):
+        self.api_url = api_url
+        self._session = None
+        self._owner_pid = None
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+        # 异步消费者模式下绑定的事件循环和异步客户端
+        self._loop = None
+        self._loop_thread = None
+        self._async_client = None
+        # 服务端拒绝约束解码参数后，本进程不再尝试
+        self._guided_supported = True
+
+    def bind_async(self, loop: asyncio.AbstractEventLoop, async_client: "AsyncLlmClient") -> None:
+        """绑定事件循环（需在事件循环线程中调用）：此后执行器线程中的同步调用转交给异步客户端"""
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._async_client = async_client
+
+    def _get_session(self) -> requests.Session:
+        """获取当前进程的Session（fork出的子进程不复用父进程的连接）"""
+        if self._owner_pid != os.getpid():
+            with self._lock:
+                if self._owner_pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LLM_POOL_SIZE)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    session.headers.update({"Content-Type": "application/json"})
+                    self._session = session
+                    self._semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+                    self._owner_pid = os.getpid()
+        return self._session
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """指数退避加随机抖动，避免多个消费者同时重试"""
+        delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def chat(self, payload: dict) -> dict:
+        """发送chat/completions请求，返回响应JSON；5xx及连接错误按退避策略重试"""
+        # 事件循环线程自身不能阻塞等待，仍走同步请求
+        if self._loop is not None and self._loop.is_running() and threading.get_ident() != self._loop_thread:
+            return asyncio.run_coroutine_threadsafe(self._async_client.chat(payload), self._loop).result()
+
+        session = self._get_session()
+        body = json.dumps(payload)
+        last_error = None
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                with self._semaphore:
+                    start = time.time()
+                    response = session.post(
+                        self.api_url,
+                        data=body,
+                        timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+                    )
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    logger.info(f"大模型请求成功，状态码: {response.status_code}，耗时: {time.time() - start:.2f}秒")
+                    return response.json()
+                last_error = Exception(f"大模型服务返回错误，状态码: {response.status_code}，内容: {response.text[:200]}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+
+            if attempt < LLM_MAX_RETRIES:
+                delay = self._backoff(attempt)
+                logger.warning(f"大模型请求第{attempt + 1}次失败: {str(last_error)}，{delay:.1f}秒后重试")
+                time.sleep(delay)
+
+        logger.error(f"大模型请求失败，已重试{LLM_MAX_RETRIES}次: {str(last_error)}")
+        raise Exception(f"大模型请求失败：{str(last_error)}")
+
+    def chat_stream(self, payload: dict, on_progress=None, validate: bool = True) -> dict:
+        """以流式方式发送请求，边接收边校验，输出结构错误或过长时断开连接以中止服务端生成"""
+        if self._loop is not None and self._loop.is_running() and threading.get_ident() != self._loop_thread:
+            return asyncio.run_coroutine_threadsafe(
+                self._async_client.chat_stream(payload, on_progress, validate), self._loop
+            ).result()
+
+        session = self._get_session()
+        body = stream_body(payload)
+        last_error = None
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                with self._semaphore:
+                    start = time.time()
+                    response = session.post(
+                        self.api_url,
+                        data=body,
+                        stream=True,
+                        timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+                    )
+                    try:
+                        if response.status_code < 500:
+                            if response.status_code >= 400:
+                                # 连接关闭前读取错误内容，供调用方判断被拒绝的原因
+                                response.content
+                            response.raise_for_status()
+                            response.encoding = "utf-8"
+                            collector = StreamCollector(validate)
+                            for line in response.iter_lines(decode_unicode=True):
+                                if collector.feed_line(line):
+                                    break
+                                progress = collector.progress()
+                                if progress and on_progress:
+                                    on_progress(progress)
+                            logger.info(f"大模型流式请求完成，token数: {collector.tokens}，耗时: {time.time() - start:.2f}秒")
+                            return collector.response()
+                        last_error = Exception(f"大模型服务返回错误，状态码: {response.status_code}，内容: {response.text[:200]}")
+                    finally:
+                        response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+
+            if attempt < LLM_MAX_RETRIES:
+                delay = self._backoff(attempt)
+                logger.warning(f"大模型请求第{attempt + 1}次失败: {str(last_error)}，{delay:.1f}秒后重试")
+                time.sleep(delay)
+
+        logger.error(f"大模型请求失败，已重试{LLM_MAX_RETRIES}次: {str(last_error)}")
+        raise Exception(f"大模型请求失败：{str(last_error)}")
+
+    def chat_content(self, payload: dict, parse=None, on_progress=None):
+        """发送请求并返回首个候选回复的文本内容；传入parse时返回解析结果
+
+        启用响应缓存时先按请求内容查询缓存；仅完整生成且能被parse成功解析的响应才会写入缓存，
+        命中的缓存若解析失败则删除该条目，避免错误结果被反复复用；
+        启用流式输出时on_progress会按间隔收到生成进度；流式输出结构错误被中止时改用非流式请求重新生成
+        """
+        cache_key = llm_response_cache.make_key(payload) if LLM_CACHE_ENABLED else None
+        response = llm_response_cache.get(cache_key) if cache_key else None
+        from_cache = response is not None
+        if not from_cache:
+            if LLM_STREAM_ENABLED:
+                try:
+                    response = self.chat_stream(payload, on_progress, validate=parse is not None)
+                except StreamAbortedError as e:
+                    logger.warning(f"{str(e)}，改用非流式请求重新生成")
+                    response = self.chat(payload)
+            else:
+                response = self.chat(payload)
+
+        choice = response["choices"][0]
+        content = choice["message"]["content"].strip()
+        try:
+            result = parse(content) if parse else content
+        except Exception:
+            if from_cache:
+                llm_response_cache.invalidate(cache_key)
+            raise
+
+        if cache_key and not from_cache and choice.get("finish_reason") == "stop":
+            llm_response_cache.put(cache_key, response)
+        return result
+
+    def chat_structured(self, payload: dict, spec: dict, name: str, parse, on_progress=None):
+        """结构化输出：优先按紧凑Schema约束解码并将短键还原为接口字段名
+
+        约束解码的输出不是合法JSON（如被截断）时先用parse修复解析；
+        未启用约束解码、约束解码请求被拒绝（4xx）或输出修复后仍无法解析时，回退到原提示词请求并用parse解析；
+        仅当错误内容表明服务端不支持约束解码参数时，本进程后续请求才不再尝试约束解码，
+        其他4xx（如单个文档超出上下文长度）只对本次请求回退
+        """
+        def parse_guided(content: str):
+            try:
+                return json.loads(content)
+            except ValueError:
+                pass
+            try:
+                return parse(content)
+            except Exception as e:
+                raise ValueError(str(e))
+
+        if LLM_GUIDED_DECODING != "off" and self._guided_supported:
+            try:
+                data = self.chat_content(with_guided_decoding(payload, spec, name), parse_guided, on_progress)
+                result = expand(data, spec)
+                if isinstance(data, dict) and data.get(TRUNCATED_KEY):
+                    # 短键还原时保留截断补全标记
+                    result[TRUNCATED_KEY] = True
+                return result
+            except (ValueError, KeyError, TypeError, AttributeError, StreamAbortedError) as e:
+                logger.warning(f"约束解码输出解析失败，回退到提示词约束: {str(e)}")
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status is None or status >= 500:
+                    raise
+                body = _error_body(e)
+                if any(marker in body for marker in GUIDED_PARAM_MARKERS):
+                    self._guided_supported = False
+                    logger.warning(
+                        f"大模型服务不支持约束解码参数（状态码: {status}，内容: {body[:200]}），本进程后续请求改用提示词约束"
+                    )
+                else:
+                    logger.warning(f"约束解码请求被拒绝（状态码: {status}，内容: {body[:200]}），本次请求回退到提示词约束")
+        return self.chat_content(payload, parse, on_progress)
+
+
+class AsyncLlmClient:
+    """基于httpx的异步客户端，供异步消费者在单个事件循环中并发发起大模型请求"""
+
+    def __init__(self, api_url: str):
+        self.api_url = api_url
+        self._client = None
+        self._semaphore = None
+
+    async def start(self) -> None:
+        import httpx
+        self._client = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+        )
+        self._semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def chat(self, payload: dict) -> dict:
+        """发送chat/completions请求，重试策略与同步客户端一致"""
+        import httpx
+        body = json.dumps(payload)
+        last_error = None
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    start = time.time()
+                    response = await self._client.post(self.api_url, content=body)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    logger.info(f"大模型请求成功，状态码: {response.status_code}，耗时: {time.time() - start:.2f}秒")
+                    return response.json()
+                last_error = Exception(f"大模型服务返回错误，状态码: {response.status_code}，内容: {response.text[:200]}")
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                last_error = e
+
+            if attempt < LLM_MAX_RETRIES:
+                delay = LlmClient._backoff(attempt)
+                logger.warning(f"大模型请求第{attempt + 1}次失败: {str(last_error)}，{delay:.1f}秒后重试")
+                await asyncio.sleep(delay)
+
+        logger.error(f"大模型请求失败，已重试{LLM_MAX_RETRIES}次: {str(last_error)}")
+        raise Exception(f"大模型请求失败：{str(last_error)}")
+
+    async def chat_stream(self, payload: dict, on_progress=None, validate: bool = True) -> dict:
+        """流式请求，校验及中止规则与同步客户端一致；进度回调在线程池中执行，不阻塞事件循环"""
+        import httpx
+        body = stream_body(payload)
+        loop = asyncio.get_running_loop()
+        last_error = None
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    start = time.time()
+                    async with self._client.stream("POST", self.api_url, content=body) as response:
+                        if response.status_code < 500:
+                            if response.status_code >= 400:
+                                await response.aread()
+                            response.raise_for_status()
+                            collector = StreamCollector(validate)
+                            async for line in response.aiter_lines():
+                                if collector.feed_line(line):
+                                    break
+                                progress = collector.progress()
+                                if progress and on_progress:
+                                    await loop.run_in_executor(None, on_progress, progress)
+                            logger.info(f"大模型流式请求完成，token数: {collector.tokens}，耗时: {time.time() - start:.2f}秒")
+                            return collector.response()
+                        await response.aread()
+                        last_error = Exception(f"大模型服务返回错误，状态码: {response.status_code}，内容: {response.text[:200]}")
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                last_error = e
+
+            if attempt < LLM_MAX_RETRIES:
+                delay = LlmClient._backoff(attempt)
+                logger.warning(f"大模型请求第{attempt + 1}次失败: {str(last_error)}，{delay:.1f}秒后重试")
+                await asyncio.sleep(delay)
+
+        logger.error(f"大模型请求失败，已重试{LLM_MAX_RETRIES}次: {str(last_error)}")
+        raise Exception(f"大模型请求失败：{str(last_error)}")
+
+
+# 单例实例
+llm_client = LlmClient(EXTRACT_API_URL)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+'''超长文档分段提取：按页和章节边界切分文本，各段并发提取后按固定规则合并结果'''
+import re
+import json
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from config import logger, PAGE_SEPARATOR, MAP_REDUCE_MAX_WORKERS
+from services.chunk_index import estimate_tokens
+
+# 章节起始行：Markdown标题（OOXML解析结果）、第X章/节、附件X
+HEADING_PATTERN = re.compile(
+    r'^(?:#{1,6}\s|第[一二三四五六七八九十百零〇\d]+[章节篇部]|附件\s*[一二三四五六七八九十百零〇\d]+)',
+    re.MULTILINE
+)
+
+
+def _split_oversized(text: str, max_tokens: int) -> list:
+    """超出上限的单页：先按章节起始行切分，仍超出时按行切分"""
+    starts = [m.start() for m in HEADING_PATTERN.finditer(text) if m.start() > 0]
+    sections = [text[s:e] for s, e in zip([0] + starts, starts + [len(text)])]
+    units = []
+    for section in sections:
+        if estimate_tokens(section) <= max_tokens:
+            units.append(section)
+            continue
+        lines = section.splitlines(keepends=True)
+        current = ""
+        for line in lines:
+            if current and estimate_tokens(current + line) > max_tokens:
+                units.append(current)
+                current = ""
+            current += line
+        if current:
+            units.append(current)
+    return units
+
+
+def split_segments(text: str, max_tokens: int) -> list:
+    """按页和章节边界切分为不超过max_tokens的分段（单行超长时除外）
+
+    依次将页（或超长页切出的章节）装入当前分段，装不下时另起一段；
+    当前分段已过半且下一单元以章节标题开头时提前分段，尽量保持章节完整
+    """
+    units = []
+    for page in text.split(PAGE_SEPARATOR):
+        units.extend(_split_oversized(page, max_tokens) if estimate_tokens(page) > max_tokens else [page])
+
+    segments = []
+    current = []
+    used = 0
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        starts_section = bool(HEADING_PATTERN.match(unit.lstrip()))
+        if current and (used + tokens > max_tokens or (starts_section and used > max_tokens // 2)):
+            segments.append(PAGE_SEPARATOR.join(current))
+            current = []
+            used = 0
+        current.append(unit)
+        used += tokens
+    if current:
+        segments.append(PAGE_SEPARATOR.join(current))
+    return [s for s in segments if s.strip()]
+
+
+def map_segments(segments: list, extract, label: str) -> list:
+    """以有限并发对各分段执行extract(分段序号, 分段文本)，按分段顺序返回结果（失败的分段为None）"""
+    def run(args):
+        i, segment = args
+        try:
+            return extract(i, segment)
+        except Exception as e:
+            logger.warning(f"[{label}]第{i + 1}/{len(segments)}段提取失败: {str(e)}")
+            return None
+
+    workers = max(1, min(MAP_REDUCE_MAX_WORKERS, len(segments)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{label}_segment") as executor:
+        return list(executor.map(run, enumerate(segments)))
+
+
+def status_code(result: dict) -> str:
+    """分段结果的返回状态码（兼容"返回状态"嵌套和顶层retCode两种结构）"""
+    status = result.get("返回状态")
+    if isinstance(status, dict):
+        return status.get("retCode")
+    return result.get("retCode")
+
+
+def _identity(item, dedupe_key: str) -> str:
+    if isinstance(item, dict) and isinstance(item.get(dedupe_key), str):
+        return "".join(item[dedupe_key].split())
+    return json.dumps(item, ensure_ascii=False, sort_keys=True)
+
+
+def _merge(current, incoming, key: str, join_keys: set, dedupe_key: str):
+    if isinstance(current, dict) and isinstance(incoming, dict):
+        for k, v in incoming.items():
+            current[k] = copy.deepcopy(v) if k not in current else _merge(current[k], v, k, join_keys, dedupe_key)
+        return current
+    if isinstance(current, list) and isinstance(incoming, list):
+        # 列表取并集：同名条目合并（如目录的标签），其余按出现顺序追加
+        positions = {_identity(item, dedupe_key): i for i, item in enumerate(current)}
+        for item in incoming:
+            identity = _identity(item, dedupe_key)
+            if identity in positions:
+                existing = current[positions[identity]]
+                if isinstance(existing, dict) and isinstance(item, dict):
+                    _merge(existing, item, key, join_keys, dedupe_key)
+            else:
+                positions[identity] = len(current)
+                current.append(copy.deepcopy(item))
+        return current
+    if key in join_keys and isinstance(current, str) and isinstance(incoming, str):
+        # 文段类字段按分段顺序拼接
+        if incoming.strip() and incoming.strip() not in current:
+            return f"{current}\n{incoming}" if current.strip() else incoming
+        return current
+    # 标量字段取首个非空值
+    return current if current not in (None, "", [], {}) else incoming
+
+
+def merge_partials(partials: list, join_keys: tuple = (), dedupe_key: str = "itemName") -> dict:
+    """按分段顺序合并成功的分段结果：标量取首个非空值，列表取并集（按dedupe_key去重），join_keys中的文段拼接"""
+    merged = {}
+    for part in partials:
+        _merge(merged, part, None, set(join_keys), dedupe_key)
+    return merged
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+'''LibreOffice常驻转换进程池：复用headless soffice实例，通过UNO socket驱动文档转换
+
+服务进程的解释器可导入uno时在进程内驱动实例；否则查找可导入uno的解释器（LIBREOFFICE_UNO_PYTHON、
+soffice所在目录的python、系统python3），由其执行office_uno_helper完成每次转换；均不可用时进程池不启用，
+每次转换回退到冷启动soffice的命令行转换，并在日志中给出警告
+'''
+import os
+import time
+import queue
+import socket
+import atexit
+import threading
+import shutil
+import subprocess
+import psutil
+from config import (
+    logger,
+    LIBREOFFICE_POOL_SIZE,
+    LIBREOFFICE_MAX_CONVERSIONS,
+    LIBREOFFICE_CONVERT_TIMEOUT,
+    LIBREOFFICE_STARTUP_TIMEOUT,
+    LIBREOFFICE_PROFILE_ROOT,
+    LIBREOFFICE_UNO_PYTHON
+)
+
+# UNO桥接模块随LibreOffice的Python环境提供，服务进程的解释器无法导入时改由外部解释器执行转换脚本
+try:
+    from services import office_uno_helper
+except ImportError:
+    office_uno_helper = None
+
+UNO_HELPER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "office_uno_helper.py")
+
+# 按源文件类型选择PDF导出过滤器
+PDF_EXPORT_FILTERS = {
+    ".doc": "writer_pdf_Export",
+    ".docx": "writer_pdf_Export",
+    ".xls": "calc_pdf_Export",
+    ".xlsx": "calc_pdf_Export",
+    ".ppt": "impress_pdf_Export",
+    ".pptx": "impress_pdf_Export",
+    ".pdf": "draw_pdf_Export"
+}
+
+
+def find_uno_python(exec_path: str) -> str:
+    """查找可导入uno的Python解释器：配置项、soffice所在目录的python（LibreOffice自带）、系统python3"""
+    soffice = shutil.which(exec_path) or exec_path
+    candidates = [
+        LIBREOFFICE_UNO_PYTHON,
+        os.path.join(os.path.dirname(os.path.realpath(soffice)), "python"),
+        os.path.join(os.path.dirname(os.path.realpath(soffice)), "python.exe"),
+        shutil.which("python3")
+    ]
+    for candidate in candidates:
+        if not candidate or not os.path.isfile(candidate):
+            continue
+        try:
+            result = subprocess.run([candidate, "-c", "import uno"], capture_output=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            return candidate
+    return None
+
+
+def _find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class OfficeInstance:
+    """单个常驻soffice实例（独立端口和用户配置目录）"""
+
+    def __init__(self, index: int, exec_path: str, uno_python: str = None):
+        self.index = index
+        self.exec_path = exec_path
+        self.uno_python = uno_python  # 为None时在进程内驱动，否则由该解释器执行转换脚本
+        self.profile_dir = os.path.join(LIBREOFFICE_PROFILE_ROOT, f"{os.getpid()}_{index}")
+        self.port = None
+        self.process = None
+        self.desktop = None
+        self.conversions = 0
+
+    def start(self) -> None:
+        """启动soffice并等待UNO连接就绪"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.port = _find_free_port()
+        cmd = [
+            self.exec_path,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--norestore",
+            "--nodefault",
+            "--nolockcheck",
+            f"-env:UserInstallation=file://{self.profile_dir}",
+            f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+        ]
+        logger.info(f"启动LibreOffice常驻实例[{self.index}]，端口: {self.port}，配置目录: {self.profile_dir}")
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.time() + LIBREOFFICE_STARTUP_TIMEOUT
+        last_error = None
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise Exception(f"LibreOffice实例[{self.index}]启动后立即退出，返回码: {self.process.returncode}")
+            try:
+                self.desktop = self._connect()
+                self.conversions = 0
+                logger.info(f"LibreOffice常驻实例[{self.index}]已就绪（PID: {self.process.pid}）")
+                return
+            except Exception as e:
+                last_error = e
+                time.sleep(0.5)
+
+        self.stop()
+        raise Exception(f"LibreOffice实例[{self.index}]启动超时（{LIBREOFFICE_STARTUP_TIMEOUT}秒）: {last_error}")
+
+    def _connect(self):
+        """进程内驱动时返回Desktop对象；外部解释器驱动时只确认端口已开始接受连接"""
+        if self.uno_python is None:
+            return office_uno_helper.connect(self.port)
+        with socket.create_connection(("127.0.0.1", self.port), timeout=2):
+            return True
+
+    def is_healthy(self) -> bool:
+        """健康检查：进程存活且UNO连接可用"""
+        if not self.process or self.process.poll() is not None or not self.desktop:
+            return False
+        try:
+            if self.uno_python is None:
+                self.desktop.getComponents()
+            else:
+                self._connect()
+            return True
+        except Exception as e:
+            logger.warning(f"LibreOffice实例[{self.index}]健康检查失败: {str(e)}")
+            return False
+
+    def stop(self) -> None:
+        """仅终止本实例的进程树，不影响主机上的其他soffice进程"""
+        self.desktop = None
+        if not self.process:
+            return
+        try:
+            parent = psutil.Process(self.process.pid)
+            procs = parent.children(recursive=True) + [parent]
+        except psutil.NoSuchProcess:
+            procs = []
+        for proc in procs:
+            try:
+                proc.terminate()
+            except psutil.NoSuchProcess:
+                continue
+        _, alive = psutil.wait_procs(procs, timeout=5)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                continue
+        logger.info(f"LibreOffice常驻实例[{self.index}]已停止（PID: {self.process.pid}）")
+        self.process = None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def convert(self, src_path: str, pdf_path: str) -> None:
+        """在本实例中打开文档并导出为PDF，超时则终止实例使调用立即失败"""
+        ext = os.path.splitext(src_path)[1].lower()
+        export_filter = PDF_EXPORT_FILTERS.get(ext, "writer_pdf_Export")
+        watchdog = threading.Timer(LIBREOFFICE_CONVERT_TIMEOUT, self.stop)
+        watchdog.start()
+        try:
+            if self.uno_python is None:
+                office_uno_helper.export_pdf(self.desktop, src_path, pdf_path, export_filter)
+                return
+            result = subprocess.run(
+                [self.uno_python, UNO_HELPER_SCRIPT, str(self.port), src_path, pdf_path, export_filter],
+                capture_output=True, text=True, timeout=LIBREOFFICE_CONVERT_TIMEOUT
+            )
+            if result.returncode != 0:
+                raise Exception(f"转换脚本执行失败（返回码: {result.returncode}）: {result.stderr.strip()[-500:]}")
+        finally:
+            watchdog.cancel()
+            self.conversions += 1
+
+
+class OfficePool:
+    """每个消费者进程内独立的soffice实例池（按需启动，fork后不与父进程共享）"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._owner_pid = None
+        self._idle = None
+        self._instances = []
+        self._lock = threading.Lock()
+        self._uno_python = {}  # {soffice路径: 可导入uno的外部解释器，无则为None}
+
+    def is_available(self, exec_path: str) -> bool:
+        """进程内可导入uno，或找到了可导入uno的外部解释器时可用；不可用时首次检查记录警告"""
+        if office_uno_helper is not None:
+            return True
+        if exec_path not in self._uno_python:
+            uno_python = find_uno_python(exec_path)
+            self._uno_python[exec_path] = uno_python
+            if uno_python:
+                logger.info(f"当前Python解释器无法导入uno，LibreOffice常驻进程池改由{uno_python}执行转换")
+            else:
+                logger.warning(
+                    "LibreOffice常驻进程池未启用：当前Python解释器无法导入uno，且未找到可导入uno的解释器"
+                    "（可安装python3-uno，或将LIBREOFFICE_UNO_PYTHON设为LibreOffice自带的python），"
+                    "每次转换都将冷启动soffice"
+                )
+        return self._uno_python[exec_path] is not None
+
+    def _ensure_started(self, exec_path: str) -> None:
+        with self._lock:
+            if self._owner_pid == os.getpid():
+                return
+            logger.info(f"初始化LibreOffice常驻进程池，实例数: {self.size}")
+            self._owner_pid = os.getpid()
+            self._idle = queue.Queue()
+            self._instances = []
+            for index in range(self.size):
+                instance = OfficeInstance(index, exec_path, self._uno_python.get(exec_path))
+                try:
+                    instance.start()
+                except Exception as e:
+                    # 启动失败的实例在取用时重试启动
+                    logger.error(f"LibreOffice常驻实例[{index}]启动失败: {str(e)}")
+                self._instances.append(instance)
+                self._idle.put(instance)
+
+    def convert(self, src_path: str, pdf_path: str, exec_path: str) -> bool:
+        """从池中取出实例执行转换，成功返回True"""
+        self._ensure_started(exec_path)
+        try:
+            instance = self._idle.get(timeout=LIBREOFFICE_CONVERT_TIMEOUT)
+        except queue.Empty:
+            logger.error("等待空闲LibreOffice实例超时")
+            return False
+
+        try:
+            if instance.conversions >= LIBREOFFICE_MAX_CONVERSIONS:
+                logger.info(f"LibreOffice实例[{instance.index}]已完成{instance.conversions}次转换，执行定期重启")
+                instance.restart()
+            elif not instance.is_healthy():
+                logger.warning(f"LibreOffice实例[{instance.index}]不可用，正在重启")
+                instance.restart()
+
+            start = time.time()
+            instance.convert(src_path, pdf_path)
+            logger.info(f"LibreOffice实例[{instance.index}]转换完成，耗时: {time.time() - start:.2f}秒")
+            return os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 0
+        except Exception as e:
+            logger.error(f"LibreOffice实例[{instance.index}]转换失败: {str(e)}", exc_info=True)
+            # 转换失败后实例状态不可信，下次取用前重启
+            instance.stop()
+            return False
+        finally:
+            self._idle.put(instance)
+
+    def shutdown(self) -> None:
+        if self._owner_pid != os.getpid():
+            return
+        for instance in self._instances:
+            instance.stop()
+
+
+# 单例实例
+office_pool = OfficePool(LIBREOFFICE_POOL_SIZE)
+atexit.register(office_pool.shutdown)
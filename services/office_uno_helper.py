@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+'''通过UNO socket驱动常驻soffice实例导出PDF
+
+uno模块只存在于LibreOffice自带的Python（或发行版的python3-uno）中，服务进程的解释器通常无法导入：
+- 服务进程可导入uno时，office_pool直接在进程内调用connect/export_pdf
+- 否则office_pool以可导入uno的解释器执行本脚本完成单次转换（soffice实例仍常驻，省去冷启动）：
+    python office_uno_helper.py <端口> <源文件> <PDF路径> <导出过滤器>
+  成功时退出码为0，失败时错误信息输出到stderr
+本模块不导入项目中的其他模块，以便在LibreOffice的Python中独立运行
+'''
+import os
+import sys
+import uno
+from com.sun.star.beans import PropertyValue
+
+
+def _property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+def connect(port: int):
+    """连接指定端口的soffice实例，返回Desktop对象"""
+    local_ctx = uno.getComponentContext()
+    resolver = local_ctx.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_ctx
+    )
+    ctx = resolver.resolve(
+        f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+    )
+    return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+
+def export_pdf(desktop, src_path: str, pdf_path: str, export_filter: str) -> None:
+    """在实例中以只读方式打开文档并导出为PDF，完成后关闭文档"""
+    doc = desktop.loadComponentFromURL(
+        uno.systemPathToFileUrl(os.path.abspath(src_path)),
+        "_blank",
+        0,
+        (_property("Hidden", True), _property("ReadOnly", True))
+    )
+    if doc is None:
+        raise Exception(f"LibreOffice无法打开文件: {src_path}")
+    try:
+        doc.storeToURL(
+            uno.systemPathToFileUrl(os.path.abspath(pdf_path)),
+            (_property("FilterName", export_filter),)
+        )
+    finally:
+        try:
+            doc.close(True)
+        except Exception:
+            pass
+
+
+def main() -> int:
+    port, src_path, pdf_path, export_filter = sys.argv[1:5]
+    try:
+        export_pdf(connect(int(port)), src_path, pdf_path, export_filter)
+    except Exception as e:
+        sys.stderr.write(f"{type(e).__name__}: {e}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+'''OOXML文本提取：直接从.docx/.pptx压缩包中流式解析XML，跳过PDF转换'''
+import os
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from config import logger, PAGE_SEPARATOR
+
+# XML命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+W = "{%s}" % W_NS
+A = "{%s}" % A_NS
+
+# 样式名称中的标题级别（如"heading 1"、"标题 2"）
+HEADING_STYLE_PATTERN = re.compile(r'^(?:heading|标题)\s*(\d)$', re.IGNORECASE)
+
+
+class OoxmlService:
+    @staticmethod
+    def extract_text(file_path: str) -> str:
+        """按文件类型提取OOXML文本，失败或无文本时返回None"""
+        ext = os.path.splitext(file_path)[1].lower()
+        try:
+            logger.info(f"开始直接解析OOXML文本，文件路径: {file_path}")
+            with zipfile.ZipFile(file_path) as zf:
+                # Word文档整体视为一页，演示文稿每张幻灯片为一页
+                if ext == ".docx":
+                    pages = [OoxmlService._extract_docx(zf)]
+                elif ext == ".pptx":
+                    pages = OoxmlService._extract_pptx(zf)
+                else:
+                    logger.warning(f"不支持直接解析的文件类型: {ext}")
+                    return None
+
+            text = PAGE_SEPARATOR.join("\n".join(lines) for lines in pages)
+            if text.strip():
+                logger.info(f"OOXML文本提取完成，总长度: {len(text)}字符")
+                return text
+            logger.warning(f"OOXML文件{file_path}未提取到任何文本")
+            return None
+        except Exception as e:
+            logger.error(f"OOXML文本提取失败（{file_path}）: {str(e)}", exc_info=True)
+            return None
+
+    # ------------------------------ Word文档 ------------------------------
+    @staticmethod
+    def _load_heading_styles(zf: zipfile.ZipFile) -> dict:
+        """读取styles.xml，返回 样式ID -> 标题级别 的映射"""
+        levels = {}
+        if "word/styles.xml" not in zf.namelist():
+            return levels
+        with zf.open("word/styles.xml") as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag != W + "style":
+                    continue
+                style_id = elem.get(W + "styleId")
+                level = None
+                outline = elem.find(f"{W}pPr/{W}outlineLvl")
+                if outline is not None and outline.get(W + "val", "").isdigit():
+                    level = int(outline.get(W + "val")) + 1
+                else:
+                    name = elem.find(W + "name")
+                    match = HEADING_STYLE_PATTERN.match(name.get(W + "val", "")) if name is not None else None
+                    if match:
+                        level = int(match.group(1))
+                if style_id and level and level <= 9:
+                    levels[style_id] = level
+                elem.clear()
+        return levels
+
+    @staticmethod
+    def _paragraph_text(p) -> str:
+        parts = []
+        for node in p.iter():
+            if node.tag == W + "t" and node.text:
+                parts.append(node.text)
+            elif node.tag == W + "tab":
+                parts.append("\t")
+            elif node.tag in (W + "br", W + "cr"):
+                parts.append("\n")
+        return "".join(parts).strip()
+
+    @staticmethod
+    def _paragraph_level(p, heading_styles: dict) -> int:
+        ppr = p.find(W + "pPr")
+        if ppr is None:
+            return 0
+        outline = ppr.find(W + "outlineLvl")
+        if outline is not None and outline.get(W + "val", "").isdigit():
+            level = int(outline.get(W + "val")) + 1
+            return level if level <= 9 else 0
+        style = ppr.find(W + "pStyle")
+        if style is not None:
+            return heading_styles.get(style.get(W + "val"), 0)
+        return 0
+
+    @staticmethod
+    def _render_rows(rows) -> list:
+        """表格每行渲染为一行，单元格以制表符分隔，空行跳过"""
+        lines = []
+        for row in rows:
+            cells = [" ".join(c.split()) for c in row]
+            if any(cells):
+                lines.append("\t".join(cells))
+        return lines
+
+    @staticmethod
+    def _extract_docx(zf: zipfile.ZipFile) -> list:
+        heading_styles = OoxmlService._load_heading_styles(zf)
+        lines = []
+        table_depth = 0
+        with zf.open("word/document.xml") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if elem.tag == W + "tbl":
+                    if event == "start":
+                        table_depth += 1
+                        continue
+                    table_depth -= 1
+                    if table_depth == 0:
+                        rows = []
+                        for tr in elem.iter(W + "tr"):
+                            rows.append([
+                                " ".join(OoxmlService._paragraph_text(p) for p in tc.iter(W + "p"))
+                                for tc in tr.findall(W + "tc")
+                            ])
+                        lines.extend(OoxmlService._render_rows(rows))
+                        elem.clear()
+                elif event == "end" and elem.tag == W + "p" and table_depth == 0:
+                    text = OoxmlService._paragraph_text(elem)
+                    if text:
+                        level = OoxmlService._paragraph_level(elem, heading_styles)
+                        lines.append(f"{'#' * level} {text}" if level else text)
+                    elem.clear()
+        return lines
+
+    # ------------------------------ PowerPoint演示文稿 ------------------------------
+    @staticmethod
+    def _slide_paths(zf: zipfile.ZipFile) -> list:
+        """按presentation.xml中的放映顺序返回幻灯片路径"""
+        names = set(zf.namelist())
+        try:
+            with zf.open("ppt/_rels/presentation.xml.rels") as f:
+                rels = {
+                    rel.get("Id"): posixpath.normpath(posixpath.join("ppt", rel.get("Target")))
+                    for rel in ET.parse(f).getroot().iter("{%s}Relationship" % PKG_REL_NS)
+                }
+            with zf.open("ppt/presentation.xml") as f:
+                root = ET.parse(f).getroot()
+            paths = [
+                rels.get(sld.get("{%s}id" % R_NS))
+                for sld in root.iter("{%s}sldId" % P_NS)
+            ]
+            paths = [p for p in paths if p in names]
+            if paths:
+                return paths
+        except KeyError:
+            pass
+        # 缺少顺序信息时按幻灯片编号排序
+        slides = [n for n in names if re.match(r'^ppt/slides/slide\d+\.xml$', n)]
+        return sorted(slides, key=lambda n: int(re.search(r'(\d+)\.xml$', n).group(1)))
+
+    @staticmethod
+    def _extract_pptx(zf: zipfile.ZipFile) -> list:
+        """返回每张幻灯片的文本行列表"""
+        pages = []
+        for path in OoxmlService._slide_paths(zf):
+            lines = []
+            table_depth = 0
+            with zf.open(path) as f:
+                for event, elem in ET.iterparse(f, events=("start", "end")):
+                    if elem.tag == A + "tbl":
+                        if event == "start":
+                            table_depth += 1
+                            continue
+                        table_depth -= 1
+                        if table_depth == 0:
+                            rows = []
+                            for tr in elem.iter(A + "tr"):
+                                rows.append([
+                                    "".join(t.text or "" for t in tc.iter(A + "t"))
+                                    for tc in tr.findall(A + "tc")
+                                ])
+                            lines.extend(OoxmlService._render_rows(rows))
+                            elem.clear()
+                    elif event == "end" and elem.tag == A + "p" and table_depth == 0:
+                        text = "".join(t.text or "" for t in elem.iter(A + "t")).strip()
+                        if text:
+                            lines.append(text)
+                        elem.clear()
+            pages.append(lines)
+        return pages
+
+
+# 单例实例
+ooxml_service = OoxmlService()
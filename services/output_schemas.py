@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+'''大模型输出结构定义：生成约束解码用的紧凑JSON Schema（短键名），并将输出还原为接口字段名
+
+结构定义格式：{接口字段名: (短键, 节点)}，节点为以下之一：
+- 字段叶子：JSON Schema片段，如 {"type": "string"}
+- 嵌套对象：同格式的结构定义
+- 对象数组：[结构定义]
+'''
+from config import LLM_GUIDED_DECODING
+
+STRING = {"type": "string"}
+NUMBER = {"type": "number"}
+NULLABLE_NUMBER = {"anyOf": [{"type": "number"}, {"type": "null"}]}
+STRING_ARRAY = {"type": "array", "items": STRING}
+RET_CODE = {"type": "string", "enum": ["0000", "0001", "9999"]}
+
+STATUS_SPEC = {
+    "retCode": ("rc", RET_CODE),
+    "retMessage": ("rm", STRING)
+}
+
+PROJECT_INFO_SPEC = {
+    "projectCode": ("c", STRING),
+    "projectName": ("n", STRING),
+    "customerName": ("cu", STRING),
+    "bidOpenTime": ("ot", STRING),
+    "bidDeadlineTime": ("dt", STRING),
+    "bidAddress": ("a", STRING),
+    "budgetAmount": ("b", STRING)
+}
+
+BID_CONTACT_SPEC = {
+    "bidAgentOrg": ("o", STRING),
+    "agentContactPerson": ("p", STRING),
+    "agentContactPhone": ("t", STRING)
+}
+
+BID_BOND_SPEC = {
+    "bondAccountNumber": ("no", STRING),
+    "bondAccountName": ("n", STRING),
+    "bondAccountBranch": ("br", STRING),
+    "bondAmount": ("a", STRING),
+    "bondDeadlineTime": ("dt", STRING)
+}
+
+# 基础信息首次调用（状态嵌套在"返回状态"中）
+BASE_INFO_SPEC = {
+    "返回状态": ("s", STATUS_SPEC),
+    "projectInfo": ("p", PROJECT_INFO_SPEC),
+    "bidContactInfo": ("ct", BID_CONTACT_SPEC),
+    "bidBond": ("b", BID_BOND_SPEC)
+}
+
+# 基础信息二次调用（状态在顶层）
+BASE_INFO_RESULT_SPEC = {
+    **STATUS_SPEC,
+    "projectInfo": ("p", PROJECT_INFO_SPEC),
+    "bidContactInfo": ("ct", BID_CONTACT_SPEC),
+    "bidBond": ("b", BID_BOND_SPEC)
+}
+
+# 商务评分首次调用：评分标准文段
+SCORE_SUMMARY_SPEC = {
+    "返回状态": ("s", STATUS_SPEC),
+    "scoreCriteria": ("sc", STRING)
+}
+
+# 商务评分二次调用：评分项
+SCORE_CRITERIA_SPEC = {
+    **STATUS_SPEC,
+    "criteria": ("cr", [{
+        "itemName": ("n", STRING),
+        "score": ("s", NUMBER),
+        "itemTag": ("t", STRING),
+        "quantity": ("q", NULLABLE_NUMBER),
+        "TagCondition": ("tc", [{
+            "fieldName": ("f", STRING),
+            "judge": ("j", STRING),
+            "condition": ("v", {"type": "array", "items": {"anyOf": [STRING, NUMBER]}})
+        }])
+    }])
+}
+
+# 目录提取
+CATALOGUE_SPEC = {
+    **STATUS_SPEC,
+    "catalogue": ("c", [{
+        "itemName": ("n", STRING),
+        "itemTag": ("t", STRING_ARRAY)
+    }])
+}
+
+
+def _is_spec(node) -> bool:
+    return isinstance(node, dict) and all(isinstance(v, tuple) for v in node.values())
+
+
+def build_schema(spec: dict) -> dict:
+    """按结构定义生成使用短键名的JSON Schema（所有字段必填，不允许额外字段）"""
+    def convert(node):
+        if isinstance(node, list):
+            return {"type": "array", "items": convert(node[0])}
+        if _is_spec(node):
+            shorts = [short for short, _ in node.values()]
+            if len(shorts) != len(set(shorts)):
+                raise Exception(f"输出结构定义存在重复短键：{shorts}")
+            return {
+                "type": "object",
+                "properties": {short: convert(child) for short, child in node.values()},
+                "required": [short for short, _ in node.values()],
+                "additionalProperties": False
+            }
+        return node
+    return convert(spec)
+
+
+def expand(data, spec: dict):
+    """将短键名输出还原为接口字段名，值为null的字段省略"""
+    def convert(value, node):
+        if isinstance(node, list):
+            return [convert(v, node[0]) for v in (value or [])]
+        if _is_spec(node):
+            value = value or {}
+            return {
+                name: convert(value[short], child)
+                for name, (short, child) in node.items()
+                if value.get(short) is not None
+            }
+        return value
+    return convert(data, spec)
+
+
+def describe(spec: dict) -> str:
+    """短键含义说明，附在提示词末尾帮助模型理解各短键对应的字段"""
+    pairs = []
+
+    def walk(node, path):
+        if isinstance(node, list):
+            walk(node[0], path)
+        elif _is_spec(node):
+            for name, (short, child) in node.items():
+                pairs.append(f"{path}{short}={name}")
+                walk(child, f"{path}{short}.")
+    walk(spec, "")
+    return "，".join(pairs)
+
+
+def with_guided_decoding(payload: dict, spec: dict, name: str) -> dict:
+    """为请求加上约束解码参数和短键说明，返回新的请求体（原请求体作为不支持时的回退）"""
+    schema = build_schema(spec)
+    guided = dict(payload)
+    messages = [dict(m) for m in payload["messages"]]
+    # 短键说明只取决于结构定义，追加到固定的system消息中，不破坏请求前缀的一致性
+    target = messages[0] if messages[0]["role"] == "system" else messages[-1]
+    target["content"] += (
+        f"\n\n【输出键名】按给定JSON Schema输出，使用短键名，对应关系：{describe(spec)}"
+    )
+    guided["messages"] = messages
+    if LLM_GUIDED_DECODING == "response_format":
+        guided["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": schema}
+        }
+    else:
+        guided["guided_json"] = schema
+    return guided
+
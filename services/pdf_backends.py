@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+'''PDF文本提取后端：统一接口，支持pdfplumber、pdfium、MuPDF等引擎按任务类型切换'''
+from config import logger
+
+
+class PdfTextBackend:
+    """PDF文本提取后端基类，依赖库在使用时才导入，未安装的后端不影响其他后端"""
+    name = ""
+
+    def is_available(self) -> bool:
+        try:
+            self._import()
+            return True
+        except ImportError:
+            return False
+
+    def _import(self):
+        raise NotImplementedError
+
+    def page_count(self, pdf_path: str) -> int:
+        raise NotImplementedError
+
+    def extract_pages(self, pdf_path: str, start: int, end: int) -> list:
+        """提取[start, end)页（从0开始）的文本，每页一个字符串"""
+        raise NotImplementedError
+
+    def outline(self, pdf_path: str) -> list:
+        """读取PDF书签，返回[(层级(从1开始), 标题, 页码(从0开始)), ...]，后端不支持或无书签时返回空列表"""
+        return []
+
+    def text_lines(self, pdf_path: str):
+        """读取各文本行及其字号，返回[(页码(从0开始), 文本, 字号), ...]，后端不支持时返回None"""
+        return None
+
+    def extract_tables(self, pdf_path: str, pages: list):
+        """提取指定页（从0开始）的表格，返回{页码: [("text", 文本) 或 ("table", 行列表), ...]}，
+        各页内容按从上到下的顺序排列，表格行为单元格列表（合并单元格为None）；后端不支持时返回None"""
+        return None
+
+
+class PdfplumberBackend(PdfTextBackend):
+    """pdfplumber：基于pdfminer的版面分析，表格文本还原最好，速度最慢"""
+    name = "pdfplumber"
+
+    def _import(self):
+        import pdfplumber
+        return pdfplumber
+
+    def page_count(self, pdf_path: str) -> int:
+        with self._import().open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    def extract_pages(self, pdf_path: str, start: int, end: int) -> list:
+        with self._import().open(pdf_path, pages=list(range(start + 1, end + 1))) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+
+    def outline(self, pdf_path: str) -> list:
+        from pdfminer.pdftypes import resolve1
+        from pdfminer.pdfdocument import PDFNoOutlines
+        with self._import().open(pdf_path) as pdf:
+            page_indexes = {page.page_obj.pageid: i for i, page in enumerate(pdf.pages)}
+            try:
+                outlines = list(pdf.doc.get_outlines())
+            except PDFNoOutlines:
+                return []
+            entries = []
+            for level, title, dest, action, _ in outlines:
+                # 书签目标可能是页面引用数组、命名目标或GoTo动作
+                if dest is None and action is not None:
+                    action = resolve1(action)
+                    dest = action.get("D") if isinstance(action, dict) else None
+                dest = resolve1(dest)
+                if isinstance(dest, (bytes, str)) or (dest is not None and not isinstance(dest, (list, dict))):
+                    try:
+                        dest = resolve1(pdf.doc.get_dest(dest))
+                    except Exception:
+                        continue
+                if isinstance(dest, dict):
+                    dest = resolve1(dest.get("D"))
+                if not isinstance(dest, list) or not dest:
+                    continue
+                page = page_indexes.get(getattr(dest[0], "objid", None))
+                if page is not None and title:
+                    entries.append((level, str(title), page))
+            return entries
+
+    def extract_tables(self, pdf_path: str, pages: list):
+        result = {}
+        with self._import().open(pdf_path, pages=[index + 1 for index in pages]) as pdf:
+            for index, page in zip(pages, pdf.pages):
+                x0, top, x1, bottom = page.bbox
+                blocks = []
+                for table in sorted(page.find_tables(), key=lambda t: t.bbox[1]):
+                    # 表格之间的文字按整行宽度裁剪提取，保持上下顺序
+                    if table.bbox[1] > top:
+                        blocks.append(("text", page.crop((x0, top, x1, table.bbox[1])).extract_text() or ""))
+                    blocks.append(("table", table.extract()))
+                    top = max(top, table.bbox[3])
+                if top < bottom:
+                    blocks.append(("text", page.crop((x0, top, x1, bottom)).extract_text() or ""))
+                result[index] = blocks
+        return result
+
+    def text_lines(self, pdf_path: str):
+        with self._import().open(pdf_path) as pdf:
+            lines = []
+            for index, page in enumerate(pdf.pages):
+                words = page.extract_words(extra_attrs=["size"], keep_blank_chars=True)
+                current = []
+                for word in sorted(words, key=lambda w: (round(w["top"]), w["x0"])):
+                    # 纵坐标相差不超过3pt的词归为同一行
+                    if current and abs(word["top"] - current[0]["top"]) > 3:
+                        lines.append(_join_words(index, current))
+                        current = []
+                    current.append(word)
+                if current:
+                    lines.append(_join_words(index, current))
+            return lines
+
+
+class PdfiumBackend(PdfTextBackend):
+    """pypdfium2：Chrome使用的PDFium引擎，速度快"""
+    name = "pdfium"
+
+    def _import(self):
+        import pypdfium2
+        return pypdfium2
+
+    def page_count(self, pdf_path: str) -> int:
+        pdf = self._import().PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def extract_pages(self, pdf_path: str, start: int, end: int) -> list:
+        pdf = self._import().PdfDocument(pdf_path)
+        try:
+            pages = []
+            for index in range(start, end):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                # PDFium以\r\n换行，统一为\n
+                pages.append(textpage.get_text_range().replace("\r\n", "\n").strip())
+                textpage.close()
+                page.close()
+            return pages
+        finally:
+            pdf.close()
+
+
+class PymupdfBackend(PdfTextBackend):
+    """PyMuPDF：MuPDF引擎，速度最快"""
+    name = "pymupdf"
+
+    def _import(self):
+        import fitz
+        return fitz
+
+    def page_count(self, pdf_path: str) -> int:
+        with self._import().open(pdf_path) as pdf:
+            return pdf.page_count
+
+    def extract_pages(self, pdf_path: str, start: int, end: int) -> list:
+        with self._import().open(pdf_path) as pdf:
+            # sort=True按阅读顺序（从上到下、从左到右）输出文本块
+            return [pdf[index].get_text("text", sort=True).strip() for index in range(start, end)]
+
+    def outline(self, pdf_path: str) -> list:
+        with self._import().open(pdf_path) as pdf:
+            # get_toc返回[层级, 标题, 页码(从1开始)]，页码为-1表示目标不在本文档
+            return [(level, title, page - 1) for level, title, page in pdf.get_toc(simple=True) if title and page > 0]
+
+    def extract_tables(self, pdf_path: str, pages: list):
+        fitz = self._import()
+        result = {}
+        with fitz.open(pdf_path) as pdf:
+            for index in pages:
+                page = pdf[index]
+                x0, top, x1, bottom = page.rect
+                blocks = []
+                for table in sorted(page.find_tables().tables, key=lambda t: t.bbox[1]):
+                    if table.bbox[1] > top:
+                        clip = fitz.Rect(x0, top, x1, table.bbox[1])
+                        blocks.append(("text", page.get_text("text", clip=clip, sort=True)))
+                    blocks.append(("table", table.extract()))
+                    top = max(top, table.bbox[3])
+                if top < bottom:
+                    blocks.append(("text", page.get_text("text", clip=fitz.Rect(x0, top, x1, bottom), sort=True)))
+                result[index] = blocks
+        return result
+
+    def text_lines(self, pdf_path: str):
+        with self._import().open(pdf_path) as pdf:
+            lines = []
+            for index, page in enumerate(pdf):
+                for block in page.get_text("dict", sort=True)["blocks"]:
+                    for line in block.get("lines", []):
+                        spans = [span for span in line["spans"] if span["text"].strip()]
+                        if spans:
+                            text = "".join(span["text"] for span in spans).strip()
+                            lines.append((index, text, round(max(span["size"] for span in spans), 1)))
+            return lines
+
+
+def _join_words(page: int, words: list) -> tuple:
+    """pdfplumber同一行的词合并为(页码, 文本, 字号)，字号取行内最大值"""
+    text = " ".join(w["text"].strip() for w in words if w["text"].strip())
+    return page, text, round(max(w["size"] for w in words), 1)
+
+
+# 已注册的后端
+PDF_TEXT_BACKENDS = {
+    backend.name: backend
+    for backend in (PdfplumberBackend(), PdfiumBackend(), PymupdfBackend())
+}
+
+
+def get_pdf_backend(name: str) -> PdfTextBackend:
+    """按名称获取后端，未注册或依赖未安装时回退到pdfplumber"""
+    backend = PDF_TEXT_BACKENDS.get(name)
+    if backend is None:
+        logger.warning(f"未知的PDF文本提取后端: {name}，使用pdfplumber")
+        return PDF_TEXT_BACKENDS["pdfplumber"]
+    if backend.name != "pdfplumber" and not backend.is_available():
+        logger.warning(f"PDF文本提取后端{name}依赖未安装，使用pdfplumber")
+        return PDF_TEXT_BACKENDS["pdfplumber"]
+    return backend
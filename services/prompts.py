@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+'''提取提示词模板
+
+固定的任务说明、字段要求、示例和对照表放在system消息中，且不含任何随文档变化的内容，
+保证各任务的请求前缀逐字节一致，便于vLLM等支持前缀缓存的服务复用KV缓存；
+文档内容等可变部分放在其后的user消息中。
+'''
+
+BASE_INFO_SYSTEM_PROMPT = """请帮我从用户提供的文件中提取指定信息，并按照以下结构化格式返回结果。具体要求如下：
+
+1. 整体结构：返回内容需包含1个状态信息和3个字典（Dict），分别为"返回状态"、"projectInfo"、"bidContactInfo"、"bidBond"，每个部分包含对应的字段。
+
+2. 各字段详细要求：
+- 返回状态：
+    - retCode：字符串类型，取值范围为"0000"（返回成功）、"0001"（解析中）、"9999"（解释失败），示例："0000"
+    - retMessage：字符串类型，用于说明错误原因，若返回成功则留空，示例：""
+
+- projectInfo（项目信息）：
+    - projectCode：字符串类型，必填项，示例："2024-JL05-W1813"
+    - projectName：字符串类型，必填项，示例："智能化管控及信息化设备"
+    - customerName：字符串类型，非必填项，示例："中国解放军陆军工程大学"
+    - bidOpenTime：字符串类型，格式为"YYYY-MM-DD HH24:MM:SS"，示例："2025-02-09 09:00:00"
+    - bidDeadlineTime：字符串类型，格式同上，示例："2025-02-09 09:00:00"
+    - bidAddress：字符串类型，示例："江苏徐州"
+    - budgetAmount：十进制数类型，保留两位小数（去除千位分隔符），示例："3970000.00"
+
+- bidContactInfo（招标联系方式）：
+    - bidAgentOrg：字符串类型
+    - agentContactPerson：字符串类型
+    - agentContactPhone：字符串类型
+
+- bidBond（投标保证金）：
+    - bondAccountNumber：字符串类型
+    - bondAccountName：字符串类型
+    - bondAccountBranch：字符串类型
+    - bondAmount：十进制数类型，保留两位小数（去除千位分隔符），示例："450000.00"
+    - bondDeadlineTime：字符串类型，格式为"YYYY-MM-DD HH24:MM:SS"
+
+3. 补充说明：
+- 若文件中无对应信息，该字段留空即可
+- 请严格按照上述格式（包括字段名称、类型、格式要求）返回，避免遗漏或格式错误
+
+请处理用户提供的PDF文件内容，返回符合要求的结构化数据，不要多余的内容。"""
+
+BASE_INFO_RESULT_SYSTEM_PROMPT = """请帮我从用户提供的内容中提取指定信息，并按照以下结构化格式返回结果：
+【提取要求】
+1. 整体结构：包含"返回状态"、"projectInfo"、"bidContactInfo"、"bidBond"
+2. 各字段详细要求：
+- 返回状态：retCode（"0000"/"0001"/"9999"）、retMessage
+- projectInfo：projectCode、projectName、customerName、bidOpenTime（YYYY-MM-DD HH24:MM:SS）、bidDeadlineTime、bidAddress、budgetAmount（两位小数）
+- bidContactInfo：bidAgentOrg、agentContactPerson、agentContactPhone
+- bidBond：bondAccountNumber、bondAccountName、bondAccountBranch、bondAmount（两位小数）、bondDeadlineTime
+3. 补充说明：无信息则字段留空，严格按格式返回"""
+
+SCORE_SUMMARY_SYSTEM_PROMPT = """请帮我从用户提供的PDF文件中提取商务评分标准相关信息，具体包括但不限于以下可能涉及的方面：
+- 价格部分的评分规则（如基准价设定、价格偏差对应的分值计算方式等）
+- 财务状况的评分标准（如注册资本、净资产、盈利能力等指标的评分依据）
+- 商业信誉的评分细则（如是否有不良记录、获得的荣誉资质等对应的分值）
+- 履约能力相关的评分标准（如类似项目业绩的数量、规模及对应分值等）
+
+请按照以下结构化格式返回结果，不要多余的内容：
+
+1. 整体结构：返回内容需包含状态信息和商务评分标准文段，分别为"返回状态"和"scoreCriteria"。
+
+2. 各字段详细要求：
+- 返回状态：
+    - retCode：字符串类型，取值范围为"0000"（返回成功）、"0001"（解析中）、"9999"（解析失败），示例："0000"
+    - retMessage：字符串类型，用于说明错误原因，若返回成功则留空，示例：""
+
+- scoreCriteria（商务评分标准文段）：
+    字符串类型，**必须是整合所有维度信息的连贯自然段落**，需包含价格、财务状况、商业信誉、履约能力等各维度的具体评分规则、补充说明、最高分值及评分方法等内容。
+    ▶ 禁止使用任何结构化格式（如字典、数组、分点、标题、层级划分等），仅以连贯的文字串联所有信息；
+    ▶ 语言需流畅，逻辑清晰，按维度自然过渡（如“价格部分的评分规则为...；财务状况方面...；商业信誉评分则依据...；履约能力评分主要考察...”）。
+
+3. 补充说明：
+- 若文件中无对应信息，scoreCriteria字段留空即可
+- 请严格按照上述格式（包括字段名称、类型要求）返回，**尤其确保scoreCriteria为单一连贯段落，无任何结构化元素**
+
+请处理用户提供的PDF文件内容，返回符合要求的结构化数据。"""
+
+SCORE_CRITERIA_EXAMPLE_JSON = """{
+    "retCode": "0000",
+    "retMessage": "解析成功",
+    "criteria": [
+        {
+            "itemName": "比较合同签订时间在投标（报价）截止时间前三年以内（截止时间前三个月内不计）的主要产品（智能交互屏、录播设备、虚拟化服务器集群）的销售业绩，按销售金额计算。项目合同金额大于400万",
+            "score": 15,
+            "itemTag": "项目业绩",
+            "quantity": 8,
+            "TagCondition": [
+                {"fieldName": "projectDate", "judge": "BETWEEN", "condition": ["2022-07", "2025-7"]},
+                {"fieldName": "projectName", "judge": "LIKE", "condition": ["智能交互屏", "录播设备", "虚拟化集群"]},
+                {"fieldName": "projectAmount", "judge": "GEQ", "condition": [4000000.00]}
+            ]
+        },
+        {
+            "itemName": "涉及国家秘密的计算机信息系统集成资质乙级（含乙级）以上资质、ISO9001、ISO270001",
+            "score": 10,
+            "itemTag": "公司资质",
+            "TagCondition": [
+                {"fieldName": "projectName", "judge": "like", "condition": ["涉及国家秘密的计算机信息系统集成资质乙级", "ISO9001", "ISO270001"]}
+            ]
+        },
+        {
+            "itemName": "团队人员要求5人，研究生、具备高级工程师、网络工程师证书、PMP证书",
+            "score": 10,
+            "itemTag": "人员要求",
+            "quantity": 5,
+            "TagCondition": [
+                {"fieldName": "certificateName", "judge": "like", "condition": ["高级工程师", "网络工程师", "PMP证书"]}
+            ]
+        }
+    ]
+}"""
+
+SCORE_CRITERIA_SYSTEM_PROMPT = """请结合用户提供的数据库表结构信息和评分标准内容，提取商务评分标准并生成结构化数据：
+
+【提取要求】
+1. 从内容中识别所有评分项，每个评分项需包含：
+- itemName：评分项完整描述（字符串类型）
+- score：该项分值（数字类型，保留两位小数）
+- itemTag：业务标签（如"项目业绩"、"公司资质"、"人员要求"等）
+- quantity：数量要求（无则留空，数字类型）
+- TagCondition：条件数组，每个条件包含：
+    - fieldName：对应数据库表字段名（需从表结构中匹配，字符串类型）
+    - judge：判断方式（如BETWEEN、LIKE、GEQ、LEQ、EQ等）
+    - condition：条件值数组（根据判断方式填写对应格式值）
+
+2. 返回格式示例：
+""" + SCORE_CRITERIA_EXAMPLE_JSON + """
+
+3. 补充说明：无法匹配字段则fieldName留空，无信息则criteria为空数组"""
+
+# 目录结构-业务标签对照表（唯一依据）
+OFFICIAL_CATALOGUE_MAPPING = {
+    "附件一：投标函": [],
+    "附件二：法定代表人授权书": [],
+    "附件三：报价一览表": [],
+    "附件四：商务条款偏离表": [],
+    "附件五：服务条款偏离表": [],
+    "附件六：合同条款偏离表": [],
+    "附件七：营业执照": [],
+    "附件八：江苏银行开户证明": [],
+    "附件九：承诺函": [],
+    "附件十：综合实力": ["企业规模", "财务状况", "资质证书", "荣誉奖项"],
+    "附件十一：业绩经验": ["项目业绩"],
+    "附件十二：项目组成员": ["人员信息"],
+    "附件十三：招标业务能力": [],
+    "附件十四：自有专家库": [],
+    "附件十五：服务方案": ["服务方案"],
+    "附件十六：沟通、协调方案": [],
+    "附件十七：内部管理制度": [],
+    "附件十八：增值服务": [],
+    "附件十九：其他材料": [],
+    "附件二十：反商业贿赂承诺书": []
+}
+
+
+def _mapping_table(mapping: dict) -> str:
+    rows = ["| 目录结构 | 唯一业务标签 |", "|---|---|"]
+    for name, tags in mapping.items():
+        rendered = "[" + ", ".join(f'"{tag}"' for tag in tags) + "]"
+        rows.append(f"| {name} | {rendered} |")
+    return "\n".join(rows)
+
+
+CATALOGUE_SYSTEM_PROMPT = """# 任务指令（必须严格执行）
+基于用户提供的「文件内容」和「标签对应规则」，完成以下操作：
+1. 筛选：仅提取文件中真实存在的应答/投标相关文件，不虚构、不遗漏；
+2. 打标：按「标签对应规则」为提取的文件添加业务标签，无匹配标签则填空数组[]；
+3. 输出：严格按指定JSON格式返回结果，不可添加任何多余文本（如解释、注释）。
+
+# 核心参考信息
+## 1. 输出格式（固定不可修改）
+```json
+{
+    "retCode": "0000",
+    "retMessage": "解析成功",
+    "catalogue": [
+        {
+            "itemName": "________", // 文件中真实存在的应答文件格式/投标文件格式，不虚构、不遗漏（如“法定代表人/负责人授权委托书”“业绩情况表”）
+            "itemTag": ["________"] // 仅从“2. 标签对应规则”提取匹配标签，无匹配则填[]
+        }
+    ]
+}
+```
+
+## 2. 标签对应规则（唯一依据，不可新增/修改）
+""" + _mapping_table(OFFICIAL_CATALOGUE_MAPPING) + """
+
+## 3. 提取规则（必须遵守）
+1. 仅保留文件中真实存在的应答文件格式/投标文件格式目录下的所有内容，不虚构、不遗漏；
+2. 基于上传文件中「应答文件格式 / 投标文件格式目录下真实存在的全部内容」，完成 “提取文件名称 + 按规则打标”，确保不遗漏任何一个真实存在的 itemName，不虚构未提及的内容；
+3. “itemName”需完整依据文件内容填写，不得捏造、篡改；
+4. “itemTag”需准确依据标签对应规则获取，反映文件内容所对应的业务标签，不得遗漏；
+5. 若单个文件对应多个标签（如“资质证书”属于“附件十：综合实力”），需将所有标签列入“itemTag”；
+6. 文件中无对应“目录结构”的内容（如“社保缴纳证明”），“itemTag”填[]。
+
+## 4. 错误案例（禁止出现以下情况）
+- 错误1：将“法定代表人/负责人授权委托书”简写为“法人授权书”；
+- 错误2：“附件十：综合实力”的itemTag遗漏“荣誉奖项”标签；
+- 错误3：输出结果中包含“已完成解析”“结果如下”等JSON外多余文字。"""
+
+
+def build_payload(system_prompt: str, *sections: str) -> dict:
+    """组装请求：固定的system消息在前，随文档变化的内容作为user消息在后"""
+    return {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": "\n\n".join(sections)}
+        ],
+        "stream": False
+    }
@@ -1,14 +1,46 @@
 # -*- coding: utf-8 -*-
 '''Redis操作封装，统一处理Redis交互'''
+import os
 import json
+import time
 import uuid
+import socket
+import asyncio
 import redis
-from config import REDIS_URL, RedisKey, TaskStatus, logger
+import redis.asyncio
+from config import (
+    REDIS_URL,
+    RedisKey,
+    TaskStatus,
+    logger,
+    TASK_STREAM_GROUP,
+    TASK_STREAM_CLAIM_IDLE_MS,
+    TASK_STREAM_MAX_DELIVERIES,
+    TASK_AGING_RATE,
+    TASK_PRIORITY_STEP,
+    TASK_TIMING_EWMA_ALPHA,
+    TASK_STAGE_SECONDS_PER_PAGE
+)
+from services.task_registry import get_task_type
+from services.document_size import estimate_pages
+
+# 取出调度分值最小的等待任务并转入任务流（同时移出入队时间集合），在同一脚本中原子执行，消费者异常退出也不会丢失任务
+DISPATCH_SCRIPT = """
+local item = redis.call('ZPOPMIN', KEYS[1])
+if #item == 0 then
+    return nil
+end
+redis.call('ZREM', KEYS[3], item[1])
+redis.call('XADD', KEYS[2], '*', 'data', item[1])
+return item[1]
+"""
+NOTIFY_MAX_LENGTH = 100  # 入队通知列表的最大长度，空闲消费者取走通知后重新取任务
 
 class RedisService:
     def __init__(self):
         logger.info("初始化RedisService连接")
         self.client = redis.from_url(REDIS_URL)
+        self._dispatch = self.client.register_script(DISPATCH_SCRIPT)
         # 验证连接
         try:
             self.client.ping()
@@ -24,182 +56,296 @@ class RedisService:
         logger.info(f"生成新任务ID: {task_id}")
         return task_id
     
-    # ------------------------------ 基础任务操作 ------------------------------
-    def add_base_task(self, task_id: str, bid: str, file_path: str) -> None:
-        """添加基础任务到队列"""
-        logger.info(f"添加基础任务，task_id: {task_id}, bid: {bid}, file_path: {file_path}")
-        task_data = {
-            "task_id": task_id,
-            "bid": bid,
-            "file_path": file_path
-        }
-        self.client.rpush(RedisKey.BASE_TASK_QUEUE, json.dumps(task_data))
-        self.client.set(RedisKey.BASE_TASK_BID_MAPPING.format(bid=bid), task_id)
-        self.set_base_task_status(task_id, TaskStatus.PENDING)
-        logger.info(f"基础任务{task_id}已添加到队列: {RedisKey.BASE_TASK_QUEUE}")
-    
-    def get_next_base_task(self) -> dict:
-        """获取下一个基础任务"""
-        logger.info(f"从队列{RedisKey.BASE_TASK_QUEUE}获取下一个基础任务")
-        _, task_data = self.client.blpop(RedisKey.BASE_TASK_QUEUE)
-        task = json.loads(task_data)
-        logger.info(f"获取到基础任务: {task['task_id']} (bid: {task['bid']})")
-        return task
-    
-    def set_base_task_status(self, task_id: str, status: TaskStatus) -> None:
-        """设置基础任务状态"""
-        logger.info(f"更新基础任务状态，task_id: {task_id}, 状态: {status.value}")
-        self.client.set(RedisKey.BASE_TASK_STATUS.format(task_id=task_id), status.value)
-        logger.info(f"基础任务{task_id}状态已更新为{status.value}")
-    
-    def get_base_task_status(self, task_id: str) -> str:
-        """获取基础任务状态"""
-        logger.info(f"查询基础任务状态，task_id: {task_id}")
-        status = self.client.get(RedisKey.BASE_TASK_STATUS.format(task_id=task_id))
-        status_str = status.decode() if status else None
-        logger.info(f"基础任务{task_id}当前状态: {status_str}")
-        return status_str
-    
-    def set_base_task_result(self, task_id: str, result: dict) -> None:
-        """设置基础任务结果"""
-        logger.info(f"保存基础任务结果，task_id: {task_id}")
-        logger.info(f"基础任务{task_id}结果摘要: {json.dumps(result)[:500]}...")  # 只显示前500字符
-        self.client.set(RedisKey.BASE_TASK_RESULT.format(task_id=task_id), json.dumps(result))
-        logger.info(f"基础任务{task_id}结果已保存")
-    
-    def get_base_task_result(self, task_id: str) -> dict:
-        """获取基础任务结果"""
-        logger.info(f"查询基础任务结果，task_id: {task_id}")
-        result = self.client.get(RedisKey.BASE_TASK_RESULT.format(task_id=task_id))
-        result_dict = json.loads(result) if result else None
-        logger.info(f"基础任务{task_id}结果查询完成，是否存在: {result is not None}")
-        return result_dict
-    
-    def get_base_task_id_by_bid(self, bid: str) -> str:
-        """通过bid获取基础任务ID"""
-        logger.info(f"通过bid查询基础任务ID，bid: {bid}")
-        task_id = self.client.get(RedisKey.BASE_TASK_BID_MAPPING.format(bid=bid))
-        task_id_str = task_id.decode() if task_id else None
-        logger.info(f"bid{bid}对应的基础任务ID: {task_id_str}")
-        return task_id_str
-    
-    # ------------------------------ 评分任务操作 ------------------------------
-    def add_score_task(self, task_id: str, bid: str, file_path: str) -> None:
-        """添加评分任务到队列"""
-        logger.info(f"添加评分任务，task_id: {task_id}, bid: {bid}, file_path: {file_path}")
+    # ------------------------------ 任务操作（按注册的任务类型） ------------------------------
+    def add_task(self, task_type: str, task_id: str, bid: str, file_path: str, priority: int = 0) -> dict:
+        """添加任务到等待队列，返回任务数据
+
+        按文档页数和历史耗时估计预计耗时，与显式优先级、入队时间一起计算调度分值（越小越先处理）；
+        有子任务的任务类型同时为各子任务分配任务ID、建立bid映射并置为等待状态，子任务随父任务一起处理
+        """
+        spec = get_task_type(task_type)
+        pages = estimate_pages(file_path)
+        expected_seconds = self.get_expected_duration(task_type, pages)
+        enqueued_at = time.time()
+        logger.info(
+            f"添加{spec.label}任务，task_id: {task_id}, bid: {bid}, file_path: {file_path}，"
+            f"页数: {pages}，预计耗时: {expected_seconds:.0f}秒，优先级: {priority}"
+        )
         task_data = {
             "task_id": task_id,
             "bid": bid,
-            "file_path": file_path
+            "file_path": file_path,
+            "pages": pages,
+            "priority": priority,
+            "expected_seconds": round(expected_seconds, 1),
+            "enqueued_at": enqueued_at
         }
-        self.client.rpush(RedisKey.SCORE_TASK_QUEUE, json.dumps(task_data))
-        self.client.set(RedisKey.SCORE_TASK_BID_MAPPING.format(bid=bid), task_id)
-        self.set_score_task_status(task_id, TaskStatus.PENDING)
-        logger.info(f"评分任务{task_id}已添加到队列: {RedisKey.SCORE_TASK_QUEUE}")
-    
-    def get_next_score_task(self) -> dict:
-        """获取下一个评分任务"""
-        logger.info(f"从队列{RedisKey.SCORE_TASK_QUEUE}获取下一个评分任务")
-        _, task_data = self.client.blpop(RedisKey.SCORE_TASK_QUEUE)
-        task = json.loads(task_data)
-        logger.info(f"获取到评分任务: {task['task_id']} (bid: {task['bid']})")
-        return task
-    
-    def set_score_task_status(self, task_id: str, status: TaskStatus) -> None:
-        """设置评分任务状态"""
-        logger.info(f"更新评分任务状态，task_id: {task_id}, 状态: {status.value}")
-        self.client.set(RedisKey.SCORE_TASK_STATUS.format(task_id=task_id), status.value)
-        logger.info(f"评分任务{task_id}状态已更新为{status.value}")
-    
-    def get_score_task_status(self, task_id: str) -> str:
-        """获取评分任务状态"""
-        logger.info(f"查询评分任务状态，task_id: {task_id}")
-        status = self.client.get(RedisKey.SCORE_TASK_STATUS.format(task_id=task_id))
-        status_str = status.decode() if status else None
-        logger.info(f"评分任务{task_id}当前状态: {status_str}")
-        return status_str
-    
-    def set_score_task_result(self, task_id: str, result: dict) -> None:
-        """设置评分任务结果"""
-        logger.info(f"保存评分任务结果，task_id: {task_id}")
-        logger.info(f"评分任务{task_id}结果摘要: {json.dumps(result)[:500]}...")
-        self.client.set(RedisKey.SCORE_TASK_RESULT.format(task_id=task_id), json.dumps(result))
-        logger.info(f"评分任务{task_id}结果已保存")
-    
-    def get_score_task_result(self, task_id: str) -> dict:
-        """获取评分任务结果"""
-        logger.info(f"查询评分任务结果，task_id: {task_id}")
-        result = self.client.get(RedisKey.SCORE_TASK_RESULT.format(task_id=task_id))
-        result_dict = json.loads(result) if result else None
-        logger.info(f"评分任务{task_id}结果查询完成，是否存在: {result is not None}")
-        return result_dict
-    
-    def get_score_task_id_by_bid(self, bid: str) -> str:
-        """通过bid获取评分任务ID"""
-        logger.info(f"通过bid查询评分任务ID，bid: {bid}")
-        task_id = self.client.get(RedisKey.SCORE_TASK_BID_MAPPING.format(bid=bid))
-        task_id_str = task_id.decode() if task_id else None
-        logger.info(f"bid{bid}对应的评分任务ID: {task_id_str}")
-        return task_id_str
+        if spec.subtasks:
+            task_data["subtasks"] = {}
+            for subtask_type in spec.subtasks:
+                subtask_id = self.generate_task_id()
+                self.client.set(get_task_type(subtask_type).bid_mapping.format(bid=bid), subtask_id)
+                self.set_task_status(subtask_type, subtask_id, TaskStatus.PENDING)
+                task_data["subtasks"][subtask_type] = subtask_id
+        self.client.set(spec.bid_mapping.format(bid=bid), task_id)
+        self.set_task_status(task_type, task_id, TaskStatus.PENDING)
+        score = expected_seconds - priority * TASK_PRIORITY_STEP + TASK_AGING_RATE * enqueued_at
+        pipe = self.client.pipeline()
+        member = json.dumps(task_data)
+        pipe.zadd(spec.pending, {member: score})
+        pipe.zadd(spec.enqueued, {member: enqueued_at})
+        pipe.rpush(RedisKey.TASK_NOTIFY, task_type)
+        pipe.ltrim(RedisKey.TASK_NOTIFY, -NOTIFY_MAX_LENGTH, -1)
+        pipe.execute()
+        logger.info(f"{spec.label}任务{task_id}已添加到队列: {spec.pending}")
+        return task_data
 
+    def set_task_status(self, task_type: str, task_id: str, status: TaskStatus) -> None:
+        """设置任务状态"""
+        spec = get_task_type(task_type)
+        self.client.set(spec.status.format(task_id=task_id), status.value)
+        logger.info(f"{spec.label}任务{task_id}状态已更新为{status.value}")
 
-    def add_catalogue_task(self, task_id, bid, file_path):
-        """添加目录任务到队列"""
-        logger.info(f"添加目录任务，task_id: {task_id}, bid: {bid}, file_path: {file_path}")
-        task_data = {
-            "task_id": task_id,
-            "bid": bid,
-            "file_path": file_path
-        }
-        self.client.rpush(RedisKey.CATALOGUE_TASK_QUEUE, json.dumps(task_data))
-        self.client.set(RedisKey.CATALOGUE_TASK_BID_MAPPING.format(bid=bid), task_id)
-        self.set_catalogue_task_status(task_id, TaskStatus.PENDING)
-        logger.info(f"目录任务{task_id}已添加到队列: {RedisKey.CATALOGUE_TASK_QUEUE}")
-
-    def get_next_catalogue_task(self):
-        """获取下一个目录任务"""
-        logger.info(f"从队列{RedisKey.CATALOGUE_TASK_QUEUE}获取下一个目录任务")
-        _, task_data = self.client.blpop(RedisKey.CATALOGUE_TASK_QUEUE)
-        task = json.loads(task_data)
-        logger.info(f"获取到目录任务: {task['task_id']} (bid: {task['bid']})")
-        return task
-
-    def set_catalogue_task_status(self, task_id, status):
-        """设置目录任务状态"""
-        logger.info(f"更新目录任务状态，task_id: {task_id}, 状态: {status.value}")
-        self.client.set(RedisKey.CATALOGUE_TASK_STATUS.format(task_id=task_id), status.value)
-        logger.info(f"目录任务{task_id}状态已更新为{status.value}")
-
-    def get_catalogue_task_status(self, task_id):
-        """获取目录任务状态"""
-        logger.info(f"查询目录任务状态，task_id: {task_id}")
-        status = self.client.get(RedisKey.CATALOGUE_TASK_STATUS.format(task_id=task_id))
+    def get_task_status(self, task_type: str, task_id: str) -> str:
+        """获取任务状态"""
+        spec = get_task_type(task_type)
+        status = self.client.get(spec.status.format(task_id=task_id))
         status_str = status.decode() if status else None
-        logger.info(f"目录任务{task_id}当前状态: {status_str}")
+        logger.info(f"{spec.label}任务{task_id}当前状态: {status_str}")
         return status_str
 
-    def set_catalogue_task_result(self, task_id, result):
-        """设置目录任务结果"""
-        logger.info(f"保存目录任务结果，task_id: {task_id}")
-        logger.info(f"目录任务{task_id}结果摘要: {json.dumps(result)[:500]}...")
-        self.client.set(RedisKey.CATALOGUE_TASK_RESULT.format(task_id=task_id), json.dumps(result))
-        logger.info(f"目录任务{task_id}结果已保存")
-
-    def get_catalogue_task_result(self, task_id):
-        """获取目录任务结果"""
-        logger.info(f"查询目录任务结果，task_id: {task_id}")
-        result = self.client.get(RedisKey.CATALOGUE_TASK_RESULT.format(task_id=task_id))
-        result_dict = json.loads(result) if result else None
-        logger.info(f"目录任务{task_id}结果查询完成，是否存在: {result is not None}")
-        return result_dict
-
-    def get_catalogue_task_id_by_bid(self, bid):
-        """通过bid获取目录任务ID"""
-        logger.info(f"通过bid查询目录任务ID，bid: {bid}")
-        task_id = self.client.get(RedisKey.CATALOGUE_TASK_BID_MAPPING.format(bid=bid))
+    def set_task_result(self, task_type: str, task_id: str, result: dict) -> None:
+        """设置任务结果"""
+        spec = get_task_type(task_type)
+        logger.info(f"{spec.label}任务{task_id}结果摘要: {json.dumps(result)[:500]}...")  # 只显示前500字符
+        self.client.set(spec.result.format(task_id=task_id), json.dumps(result))
+        logger.info(f"{spec.label}任务{task_id}结果已保存")
+
+    def get_task_result(self, task_type: str, task_id: str) -> dict:
+        """获取任务结果"""
+        spec = get_task_type(task_type)
+        result = self.client.get(spec.result.format(task_id=task_id))
+        logger.info(f"{spec.label}任务{task_id}结果查询完成，是否存在: {result is not None}")
+        return json.loads(result) if result else None
+
+    def set_task_progress(self, task_type: str, task_id: str, progress: dict) -> None:
+        """设置任务处理进度（流式生成时按间隔更新）"""
+        spec = get_task_type(task_type)
+        self.client.set(spec.progress.format(task_id=task_id), json.dumps(progress, ensure_ascii=False))
+        logger.debug(f"{spec.label}任务{task_id}进度已更新: {progress}")
+
+    def get_task_progress(self, task_type: str, task_id: str) -> dict:
+        """获取任务处理进度"""
+        progress = self.client.get(get_task_type(task_type).progress.format(task_id=task_id))
+        return json.loads(progress) if progress else None
+
+    def get_task_id_by_bid(self, task_type: str, bid: str) -> str:
+        """通过bid获取任务ID"""
+        spec = get_task_type(task_type)
+        task_id = self.client.get(spec.bid_mapping.format(bid=bid))
         task_id_str = task_id.decode() if task_id else None
-        logger.info(f"bid{bid}对应的目录任务ID: {task_id_str}")
+        logger.info(f"bid{bid}对应的{spec.label}任务ID: {task_id_str}")
         return task_id_str
 
+    # ------------------------------ 任务流操作（消费者组） ------------------------------
+    @staticmethod
+    def consumer_name() -> str:
+        """当前消费者在消费者组中的名称（主机名:进程号），同一进程内的线程共用"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def ensure_task_group(self, task_type: str) -> None:
+        """创建任务流和消费者组（已存在时忽略），并将原列表队列中遗留的任务迁移到流中"""
+        spec = get_task_type(task_type)
+        stream, legacy_queue = spec.stream, spec.queue
+        try:
+            self.client.xgroup_create(stream, TASK_STREAM_GROUP, id="0", mkstream=True)
+            logger.info(f"已创建任务消费者组: {stream} -> {TASK_STREAM_GROUP}")
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        migrated = 0
+        while legacy_queue:
+            task_data = self.client.lpop(legacy_queue)
+            if task_data is None:
+                break
+            self.client.xadd(stream, {"data": task_data})
+            migrated += 1
+        if migrated:
+            logger.info(f"已将列表队列{legacy_queue}中的{migrated}个任务迁移到{stream}")
+
+    def read_tasks(self, task_type: str, consumer: str, count: int) -> list:
+        """批量读取任务（不阻塞），返回[(条目ID, 任务)]
+
+        先认领其他消费者空闲超时未确认的任务（XAUTOCLAIM），不足count个时按调度分值从等待队列取出任务转入任务流，
+        再读取任务流中的新任务（XREADGROUP）；投递次数超出上限的任务标记为失败并确认，不再处理
+        """
+        spec = get_task_type(task_type)
+        stream = spec.stream
+        entries = []
+        claimed = self.client.xautoclaim(
+            stream, TASK_STREAM_GROUP, consumer, TASK_STREAM_CLAIM_IDLE_MS, start_id="0-0", count=count
+        )
+        # Redis 7返回的被删除条目在第三项中，Redis 6.2中以空字段出现
+        claimed = [(entry_id, fields) for entry_id, fields in claimed[1] if fields]
+        for entry_id, fields in claimed:
+            pending = self.client.xpending_range(stream, TASK_STREAM_GROUP, min=entry_id, max=entry_id, count=1)
+            deliveries = pending[0]["times_delivered"] if pending else 1
+            task = json.loads(fields[b"data"])
+            if deliveries > TASK_STREAM_MAX_DELIVERIES:
+                self.fail_task_entry(task_type, entry_id, task, deliveries)
+                continue
+            logger.warning(f"认领超时未确认的任务: {task['task_id']}（第{deliveries}次投递）")
+            entries.append((entry_id, task))
+
+        wanted = count - len(entries)
+        if wanted > 0:
+            # 任务流中已有未读取的任务（取出后未来得及读取、或由原列表队列迁移）时少取出相应数量
+            for _ in range(wanted):
+                if self._dispatch(keys=[spec.pending, stream, spec.enqueued]) is None:
+                    break
+            response = self.client.xreadgroup(TASK_STREAM_GROUP, consumer, {stream: ">"}, count=wanted)
+            for _, messages in response or []:
+                entries.extend((entry_id, json.loads(fields[b"data"])) for entry_id, fields in messages)
+        if entries:
+            logger.info(f"从{stream}读取{len(entries)}个任务: {[task['task_id'] for _, task in entries]}")
+        return entries
+
+    def wait_for_tasks(self, block_ms: int) -> bool:
+        """阻塞等待入队通知，返回是否有新任务入队"""
+        return self.client.blpop(RedisKey.TASK_NOTIFY, timeout=block_ms / 1000) is not None
+
+    def fail_task_entry(self, task_type: str, entry_id, task: dict, deliveries: int) -> None:
+        """投递次数超出上限的任务（及其子任务）标记为失败并确认，不再处理"""
+        logger.error(f"任务{task['task_id']}已投递{deliveries}次仍未完成，标记为失败")
+        self.set_task_status(task_type, task["task_id"], TaskStatus.FAILED)
+        for subtask_type, subtask_id in task.get("subtasks", {}).items():
+            self.set_task_status(subtask_type, subtask_id, TaskStatus.FAILED)
+        self.ack_task(task_type, entry_id)
+
+    def ack_task(self, task_type: str, entry_id) -> None:
+        """确认任务已处理完成并从流中删除"""
+        stream = get_task_type(task_type).stream
+        pipe = self.client.pipeline()
+        pipe.xack(stream, TASK_STREAM_GROUP, entry_id)
+        pipe.xdel(stream, entry_id)
+        pipe.execute()
+
+    def touch_tasks(self, task_type: str, consumer: str, entry_ids: list) -> None:
+        """续期本消费者持有的未确认任务（重置空闲时间），处理耗时较长的任务不会被其他消费者认领"""
+        if entry_ids:
+            self.client.xclaim(get_task_type(task_type).stream, TASK_STREAM_GROUP, consumer, 0, entry_ids, justid=True)
+
+    def get_task_backlog(self, task_type: str) -> tuple:
+        """返回(尚未被任何消费者读取的任务数, 其中最早任务的等待秒数)"""
+        spec = get_task_type(task_type)
+        now = time.time()
+        waiting = self.client.zcard(spec.pending)
+        oldest_age = 0.0
+        if waiting:
+            # 等待集合按调度分值排序，最早入队的任务从按入队时间排序的集合中取
+            oldest = self.client.zrange(spec.enqueued, 0, 0, withscores=True)
+            if oldest:
+                oldest_age = now - oldest[0][1]
+
+        try:
+            groups = self.client.xinfo_groups(spec.stream)
+        except redis.exceptions.ResponseError:
+            return waiting, oldest_age
+        group = next((g for g in groups if g["name"] in (TASK_STREAM_GROUP, TASK_STREAM_GROUP.encode())), None)
+        if group is None:
+            return waiting, oldest_age
+        # 已确认的条目会被删除，流中其余条目为待处理（已投递未确认）和尚未读取的任务
+        unread = max(0, self.client.xlen(spec.stream) - group["pending"])
+        if unread:
+            last_id = group["last-delivered-id"]
+            last_id = last_id.decode() if isinstance(last_id, bytes) else last_id
+            oldest = self.client.xrange(spec.stream, min=f"({last_id}", count=1)
+            if oldest:
+                task = json.loads(oldest[0][1][b"data"])
+                # 迁移的任务没有入队时间，取条目ID中的写入时间（毫秒时间戳）
+                enqueued_at = task.get("enqueued_at") or int(oldest[0][0].decode().split("-")[0]) / 1000
+                oldest_age = max(oldest_age, now - enqueued_at)
+        return waiting + unread, max(0.0, oldest_age)
+
+    # ------------------------------ 任务耗时统计 ------------------------------
+    def get_expected_duration(self, task_type: str, pages: int) -> float:
+        """按各阶段每页耗时的历史加权平均估计任务耗时（秒），无历史记录的阶段使用默认值"""
+        try:
+            rates = self.client.hgetall(RedisKey.TASK_TIMINGS.format(task_type=task_type))
+        except Exception as e:
+            logger.warning(f"读取任务耗时统计失败，使用默认值: {str(e)}")
+            rates = {}
+        total = 0.0
+        for stage, default in TASK_STAGE_SECONDS_PER_PAGE.items():
+            rate = rates.get(stage.encode())
+            total += (float(rate) if rate else default) * pages
+        return total
+
+    def record_task_timing(self, task_type: str, stage: str, seconds: float, pages: int) -> None:
+        """按本次耗时更新阶段每页耗时的加权平均（统计失败不影响任务）"""
+        key = RedisKey.TASK_TIMINGS.format(task_type=task_type)
+        rate = seconds / max(pages, 1)
+        try:
+            previous = self.client.hget(key, stage)
+            if previous is not None:
+                rate = TASK_TIMING_EWMA_ALPHA * rate + (1 - TASK_TIMING_EWMA_ALPHA) * float(previous)
+            self.client.hset(key, stage, rate)
+            logger.debug(f"[{task_type}]{stage}阶段耗时{seconds:.2f}秒（{pages}页），每页耗时加权平均: {rate:.3f}秒")
+        except Exception as e:
+            logger.warning(f"更新任务耗时统计失败: {str(e)}")
+
+
+class AsyncTaskReader:
+    """基于redis.asyncio的任务读取，供异步消费者在事件循环中读取和等待任务，不占用线程
+
+    读取流程与RedisService.read_tasks、wait_for_tasks相同；确认、续期和状态更新仍由任务处理线程通过同步客户端完成
+    """
+
+    def __init__(self, service: RedisService):
+        self.service = service
+        self.client = redis.asyncio.from_url(REDIS_URL)
+        self._dispatch = self.client.register_script(DISPATCH_SCRIPT)
+
+    async def read_tasks(self, task_type: str, consumer: str, count: int) -> list:
+        """批量读取任务（不阻塞），返回[(条目ID, 任务)]"""
+        spec = get_task_type(task_type)
+        stream = spec.stream
+        entries = []
+        claimed = await self.client.xautoclaim(
+            stream, TASK_STREAM_GROUP, consumer, TASK_STREAM_CLAIM_IDLE_MS, start_id="0-0", count=count
+        )
+        claimed = [(entry_id, fields) for entry_id, fields in claimed[1] if fields]
+        for entry_id, fields in claimed:
+            pending = await self.client.xpending_range(stream, TASK_STREAM_GROUP, min=entry_id, max=entry_id, count=1)
+            deliveries = pending[0]["times_delivered"] if pending else 1
+            task = json.loads(fields[b"data"])
+            if deliveries > TASK_STREAM_MAX_DELIVERIES:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.service.fail_task_entry, task_type, entry_id, task, deliveries
+                )
+                continue
+            logger.warning(f"认领超时未确认的任务: {task['task_id']}（第{deliveries}次投递）")
+            entries.append((entry_id, task))
+
+        wanted = count - len(entries)
+        if wanted > 0:
+            for _ in range(wanted):
+                if await self._dispatch(keys=[spec.pending, stream, spec.enqueued]) is None:
+                    break
+            response = await self.client.xreadgroup(TASK_STREAM_GROUP, consumer, {stream: ">"}, count=wanted)
+            for _, messages in response or []:
+                entries.extend((entry_id, json.loads(fields[b"data"])) for entry_id, fields in messages)
+        if entries:
+            logger.info(f"从{stream}读取{len(entries)}个任务: {[task['task_id'] for _, task in entries]}")
+        return entries
+
+    async def wait_for_tasks(self, block_ms: int) -> bool:
+        """阻塞等待入队通知（挂起当前协程），返回是否有新任务入队"""
+        return await self.client.blpop(RedisKey.TASK_NOTIFY, timeout=block_ms / 1000) is not None
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
 # 单例实例
 redis_service = RedisService()
\ No newline at end of file
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+'''数据库表结构索引：解析建表语句，按评分标准文本检索相关的表和字段，精简后供提示词使用'''
+import os
+import re
+import math
+import threading
+from collections import Counter
+from config import logger, DB_STRUCT_PATH, SCHEMA_INDEX_MAX_TABLES, SCHEMA_INDEX_MAX_COLUMNS
+
+# 建表语句：表名、字段定义体、表注释
+TABLE_PATTERN = re.compile(
+    r"CREATE TABLE `(?P<name>\w+)`\s*\((?P<body>.*?)\)\s*ENGINE\b(?P<options>[^;]*);",
+    re.DOTALL
+)
+TABLE_COMMENT_PATTERN = re.compile(r"COMMENT\s*=\s*'(?P<comment>[^']*)'")
+# 字段定义行：字段名、类型、字段注释
+COLUMN_PATTERN = re.compile(
+    r"^\s*`(?P<name>\w+)`\s+(?P<type>\w+(?:\([\d,\s]+\))?)(?P<rest>.*)$"
+)
+COLUMN_COMMENT_PATTERN = re.compile(r"COMMENT\s+'(?P<comment>[^']*)'")
+# 检索词：中文按相邻二字切分，英文/数字按单词切分
+CJK_RUN_PATTERN = re.compile(r'[一-鿿]+')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+# 所有表都有的通用字段，不参与匹配
+COMMON_COLUMNS = {
+    "id", "dept_id", "create_by", "create_time", "update_by", "update_time",
+    "del_flag", "remark", "tenant_id", "version"
+}
+
+
+def tokenize(text: str) -> set:
+    """切分检索词：中文二字词（单字词组保留单字）+ 英文数字单词"""
+    terms = set()
+    for run in CJK_RUN_PATTERN.findall(text):
+        if len(run) == 1:
+            terms.add(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    terms.update(w for w in WORD_PATTERN.findall(text.lower()) if len(w) > 1)
+    return terms
+
+
+class SchemaIndex:
+    """建表语句的内存索引，文件修改后自动重新加载"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tables = []
+        self._mtime = None
+        self._idf = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        if not os.path.exists(self.path):
+            logger.error(f"数据库结构文件不存在: {self.path}")
+            raise Exception(f"数据库结构文件不存在：{self.path}")
+
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            logger.info(f"加载数据库结构文件并建立索引: {self.path}")
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.tables = self._parse(f.read())
+            self._build_idf()
+            self._mtime = mtime
+            logger.info(
+                f"数据库结构索引建立完成，共{len(self.tables)}张表，"
+                f"{sum(len(t['columns']) for t in self.tables)}个字段"
+            )
+
+    @staticmethod
+    def _parse(ddl: str) -> list:
+        tables = []
+        for match in TABLE_PATTERN.finditer(ddl):
+            comment = TABLE_COMMENT_PATTERN.search(match.group("options"))
+            columns = []
+            for line in match.group("body").splitlines():
+                column = COLUMN_PATTERN.match(line)
+                if not column:
+                    continue
+                column_comment = COLUMN_COMMENT_PATTERN.search(column.group("rest"))
+                columns.append({
+                    "name": column.group("name"),
+                    "type": column.group("type").replace(" ", ""),
+                    "comment": column_comment.group("comment") if column_comment else ""
+                })
+            table = {
+                "name": match.group("name"),
+                "comment": comment.group("comment") if comment else "",
+                "columns": columns
+            }
+            table["terms"] = tokenize(f"{table['comment']} {table['name'].replace('_', ' ')}")
+            for column in columns:
+                column["terms"] = tokenize(f"{column['comment']} {column['name'].replace('_', ' ')}")
+            tables.append(table)
+        return tables
+
+    def _build_idf(self) -> None:
+        """按字段统计检索词的逆文档频率，"名称""时间"等常见词权重较低"""
+        df = Counter()
+        docs = 0
+        for table in self.tables:
+            for column in table["columns"]:
+                df.update(column["terms"])
+                docs += 1
+        self._idf = {term: math.log(1 + docs / count) for term, count in df.items()}
+
+    def _score(self, terms: set, query: set) -> float:
+        return sum(self._idf.get(term, 0.0) for term in terms & query)
+
+    def select(self, text: str, max_tables: int = SCHEMA_INDEX_MAX_TABLES,
+               max_columns: int = SCHEMA_INDEX_MAX_COLUMNS) -> list:
+        """返回与文本最相关的表及其字段：[(table, [column, ...]), ...]"""
+        self._ensure_loaded()
+        query = tokenize(text)
+        ranked = []
+        for table in self.tables:
+            scored_columns = [
+                (self._score(column["terms"], query), column)
+                for column in table["columns"]
+                if column["name"] not in COMMON_COLUMNS
+            ]
+            matched = sorted((c for c in scored_columns if c[0] > 0), key=lambda c: -c[0])
+            table_score = 2 * self._score(table["terms"], query) + sum(s for s, _ in matched[:5])
+            if table_score > 0:
+                ranked.append((table_score, table, matched, scored_columns))
+
+        ranked.sort(key=lambda r: -r[0])
+        selected = []
+        for _, table, matched, scored_columns in ranked[:max_tables]:
+            columns = [c for _, c in matched[:max_columns]]
+            if not columns:
+                # 仅表注释匹配时，保留该表的前几个业务字段
+                columns = [c for _, c in scored_columns[:max_columns]]
+            # 按建表顺序输出字段
+            order = {id(c): i for i, c in enumerate(table["columns"])}
+            selected.append((table, sorted(columns, key=lambda c: order[id(c)])))
+        return selected
+
+    def render(self, text: str) -> str:
+        """将相关表结构渲染为精简文本；无匹配时仅列出全部表名和表注释"""
+        selected = self.select(text)
+        if not selected:
+            logger.info("评分标准未匹配到相关数据表，仅提供表名列表")
+            return "\n".join(f"{t['name']}（{t['comment']}）" for t in self.tables)
+
+        lines = []
+        for table, columns in selected:
+            lines.append(f"表 {table['name']}（{table['comment']}）")
+            lines.extend(f"- {c['name']} {c['type']} {c['comment']}".rstrip() for c in columns)
+        rendered = "\n".join(lines)
+        logger.info(
+            f"已筛选相关数据表: {[t['name'] for t, _ in selected]}，"
+            f"表结构文本长度: {len(rendered)}字符"
+        )
+        return rendered
+
+
+# 单例实例
+schema_index = SchemaIndex(DB_STRUCT_PATH)
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+'''章节索引：由PDF书签、标题字号聚类和编号规则构建带页码范围的章节树，
+供目录任务直接返回投标文件格式目录，其他提取任务按章节名取用对应页码范围的原文'''
+import re
+import time
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from config import (
+    logger,
+    PAGE_SEPARATOR,
+    SECTION_INDEX_ENABLED,
+    SECTION_INDEX_BACKEND,
+    SECTION_INDEX_MIN_ITEMS,
+    SECTION_INDEX_CATALOGUE_CONFIDENCE
+)
+from services.pdf_backends import get_pdf_backend
+from services.field_normalizer import chinese_number
+from services.prompts import OFFICIAL_CATALOGUE_MAPPING
+
+CN_NUMBER = r'[一二三四五六七八九十百零〇两\d]+'
+# 编号标题：(层级, 编号类别, 规则)，编号须后接分隔符或标题文字
+NUMBERED_HEADINGS = [
+    (1, "chapter", re.compile(rf'^第({CN_NUMBER})[章篇部](?:[\s：:、.．]|$)')),
+    (2, "volume", re.compile(rf'^第({CN_NUMBER})分册(?:[\s：:、.．]|$)')),
+    (2, "section", re.compile(rf'^第({CN_NUMBER})节(?:[\s：:、.．]|$)')),
+    (3, "attachment", re.compile(rf'^附件\s*({CN_NUMBER})(?:[\s：:、.．]|$)'))
+]
+# OOXML直接解析时按标题样式输出的Markdown标题
+MARKDOWN_HEADING = re.compile(r'^(#{1,6})\s+(\S.*)$')
+# 目录页条目：标题后跟引导符或空白和页码
+TOC_ENTRY = re.compile(r'(?:[.．·…_\-]{3,}|\s{2,}|\t)\s*\d+\s*$')
+ATTACHMENT_PREFIX = re.compile(rf'^附件\s*({CN_NUMBER})\s*[：:、.．]?\s*')
+# 投标文件格式所在章节的标题
+FORMAT_CHAPTER = re.compile(r'(投标|响应|应答|磋商|报价)文件(的)?(格式|组成|编制)')
+LINE_PATTERN = re.compile(r'[^\n\f]+')
+
+HEADING_MAX_CHARS = 40  # 标题的最大长度
+FONT_HEADING_MIN_DELTA = 1.5  # 标题字号至少比正文大的磅值
+FONT_CLUSTER_GAP = 0.5  # 字号相差不超过该值视为同一级标题
+FONT_MAX_LEVELS = 3  # 字号聚类保留的标题层级数
+# 各来源的基准置信度：书签和OOXML标题样式由文档作者设定，编号规则次之，字号聚类为推测
+OUTLINE_CONFIDENCE = 0.95
+STYLE_CONFIDENCE = 0.9
+NUMBERING_CONFIDENCE = 0.9
+FONT_CONFIDENCE = 0.6
+
+
+def compact(text: str) -> str:
+    return "".join(text.split())
+
+
+def sequence_ratio(numbers: list) -> float:
+    """编号序列的连续程度：从1开始且逐个递增的比例"""
+    if not numbers:
+        return 0.0
+    hits = sum(
+        1 for i, n in enumerate(numbers)
+        if n is not None and n == (numbers[i - 1] + 1 if i and numbers[i - 1] is not None else 1)
+    )
+    return hits / len(numbers)
+
+
+def increasing_indexes(numbers: list) -> set:
+    """编号序列中最长严格递增子序列的下标（跳过无法识别的编号）"""
+    chains = []
+    for i, n in enumerate(numbers):
+        if n is None:
+            chains.append([])
+            continue
+        best = max((chains[j] for j in range(i) if numbers[j] is not None and numbers[j] < n), key=len, default=[])
+        chains.append(best + [i])
+    return set(max(chains, key=len, default=[]))
+
+
+def count_factor(count: int) -> float:
+    """条目过少时降低置信度"""
+    return 1.0 if count >= SECTION_INDEX_MIN_ITEMS else 0.5
+
+
+class SectionIndex:
+    """单个文档的章节索引：各来源的章节列表按置信度排序，sections为置信度最高的来源"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.page_starts = [0]
+        position = text.find(PAGE_SEPARATOR)
+        while position >= 0:
+            self.page_starts.append(position + 1)
+            position = text.find(PAGE_SEPARATOR, position + 1)
+        self.candidates = []
+
+    @property
+    def source(self) -> str:
+        return self.candidates[0][0] if self.candidates else ""
+
+    @property
+    def sections(self) -> list:
+        return self.candidates[0][1] if self.candidates else []
+
+    @property
+    def confidence(self) -> float:
+        return self.candidates[0][2] if self.candidates else 0.0
+
+    def page_of(self, offset: int) -> int:
+        return bisect_right(self.page_starts, offset) - 1
+
+    def locate(self, page: int, title: str):
+        """标题在指定页中的位置（忽略空白），未找到时取页首；页码超出文本范围时返回None"""
+        if page < 0 or page >= len(self.page_starts):
+            return None
+        start = self.page_starts[page]
+        end = self.page_starts[page + 1] if page + 1 < len(self.page_starts) else len(self.text)
+        key = compact(title)[:20]
+        if key:
+            match = re.compile(r"\s*".join(map(re.escape, key))).search(self.text, start, end)
+            if match:
+                return match.start()
+        return start
+
+    def add_source(self, source: str, entries: list, confidence: float) -> None:
+        """加入一个来源的标题[(层级, 标题, 文本位置), ...]，计算各章节的结束位置和页码范围"""
+        if not entries:
+            return
+        entries = sorted(entries, key=lambda e: e[2])
+        sections = []
+        for i, (level, title, start) in enumerate(entries):
+            end = next((e[2] for e in entries[i + 1:] if e[0] <= level), len(self.text))
+            sections.append({
+                "title": " ".join(title.split()),
+                "level": level,
+                "start": start,
+                "end": end,
+                "page_start": self.page_of(start),
+                "page_end": self.page_of(max(start, end - 1))
+            })
+        self.candidates.append((source, sections, confidence))
+        self.candidates.sort(key=lambda c: -c[2])
+
+    def tree(self, sections: list = None) -> list:
+        """章节树：各节点为章节信息加children子节点列表"""
+        roots = []
+        stack = []
+        for section in (self.sections if sections is None else sections):
+            node = dict(section, children=[])
+            while stack and stack[-1]["level"] >= node["level"]:
+                stack.pop()
+            (stack[-1]["children"] if stack else roots).append(node)
+            stack.append(node)
+        return roots
+
+    def chapter(self, keywords: list):
+        """按标题关键词查找章节（同名时取层级最高、位置最前者），依次在各来源中查找，未找到返回None"""
+        for _, sections, _ in self.candidates:
+            matches = [s for s in sections if any(k in compact(s["title"]) for k in keywords)]
+            if matches:
+                return min(matches, key=lambda s: (s["level"], s["start"]))
+        return None
+
+    def page_text(self, page_start: int, page_end: int) -> str:
+        """[page_start, page_end]页（从0开始）的原文，各页以PAGE_SEPARATOR连接"""
+        start = self.page_starts[page_start]
+        end = self.page_starts[page_end + 1] - 1 if page_end + 1 < len(self.page_starts) else len(self.text)
+        return self.text[start:end]
+
+    def chapter_text(self, keywords: list) -> str:
+        """按标题关键词取章节原文（从标题起至下一个同级或更高级标题前），未找到返回空字符串"""
+        section = self.chapter(keywords)
+        return self.text[section["start"]:section["end"]].strip() if section else ""
+
+    def catalogue(self) -> tuple:
+        """投标文件格式目录条目及其置信度(条目名称列表, 置信度)
+
+        优先取投标/响应文件格式章节下的末级标题（跳过分册等中间层级），没有该章节时取附件编号标题；
+        条目均带附件编号时按编号连续程度折算置信度
+        """
+        for source, sections, confidence in self.candidates:
+            chapter = self._find_node(self.tree(sections), FORMAT_CHAPTER)
+            if chapter:
+                names = [node["title"] for node in self._leaves(chapter["children"])]
+            else:
+                names = [s["title"] for s in sections if ATTACHMENT_PREFIX.match(s["title"])]
+            if len(names) < SECTION_INDEX_MIN_ITEMS:
+                continue
+            numbers = [ATTACHMENT_PREFIX.match(name) for name in names]
+            if all(numbers):
+                confidence *= sequence_ratio([chinese_number(m.group(1)) for m in numbers])
+            logger.debug(f"章节索引目录来源: {source}，条目{len(names)}个，置信度: {confidence:.2f}")
+            return names, confidence
+        return [], 0.0
+
+    @staticmethod
+    def _leaves(nodes: list) -> list:
+        leaves = []
+        for node in nodes:
+            leaves.extend(SectionIndex._leaves(node["children"]) if node["children"] else [node])
+        return leaves
+
+    @staticmethod
+    def _find_node(nodes: list, pattern):
+        for node in nodes:
+            if pattern.search(compact(node["title"])) and node["children"]:
+                return node
+            found = SectionIndex._find_node(node["children"], pattern)
+            if found:
+                return found
+        return None
+
+
+# 对照表中的目录名称（去除附件编号）与业务标签
+CATALOGUE_TAGS = [(compact(ATTACHMENT_PREFIX.sub("", name)), tags) for name, tags in OFFICIAL_CATALOGUE_MAPPING.items()]
+
+
+class SectionIndexService:
+    @staticmethod
+    def build(pdf_path: str, text: str):
+        """构建文档的章节索引；未启用时返回None
+
+        编号规则直接作用于文本；有PDF时读取书签，前两者置信度均不足时再按字号聚类识别标题
+        """
+        if not SECTION_INDEX_ENABLED or not text:
+            return None
+        start_time = time.time()
+        index = SectionIndex(text)
+        entries, confidence = SectionIndexService._numbered_entries(text)
+        index.add_source("numbering", entries, confidence)
+
+        if pdf_path:
+            backend = get_pdf_backend(SECTION_INDEX_BACKEND)
+            try:
+                outline = backend.outline(pdf_path)
+            except Exception as e:
+                logger.warning(f"读取PDF书签失败（{backend.name}）: {str(e)}")
+                outline = []
+            if outline:
+                entries, confidence = SectionIndexService._outline_entries(index, outline)
+                index.add_source("outline", entries, confidence)
+
+            if index.confidence < SECTION_INDEX_CATALOGUE_CONFIDENCE:
+                try:
+                    lines = backend.text_lines(pdf_path)
+                except Exception as e:
+                    logger.warning(f"读取PDF字号信息失败（{backend.name}）: {str(e)}")
+                    lines = None
+                if lines:
+                    entries, confidence = SectionIndexService._font_entries(index, lines)
+                    index.add_source("font", entries, confidence)
+
+        logger.info(
+            f"章节索引构建完成，来源: {index.source or '无'}，置信度: {index.confidence:.2f}，"
+            f"章节数: {len(index.sections)}，耗时: {time.time() - start_time:.2f}秒"
+        )
+        return index
+
+    @staticmethod
+    def _numbered_entries(text: str) -> tuple:
+        """按Markdown标题和编号规则识别标题行，同名标题取最后一次出现（跳过前面的目录页）
+
+        编号标题的层级由编号类别决定；OOXML标题样式的层级常与章节编号不一致（如章标题和表单标题同为1级），
+        其中未带编号的标题排在各编号层级之下；未使用标题样式的章、附件编号行只保留与整体编号顺序一致的部分，
+        排除正文列表中引用其他章节的条目（如"第五章 技术标准和要求"出现在第二章的列表中）
+        """
+        found = {}
+        has_markdown = False
+        for match in LINE_PATTERN.finditer(text):
+            line = match.group().strip()
+            if not line or len(line) > HEADING_MAX_CHARS + 7:
+                continue
+            markdown = MARKDOWN_HEADING.match(line)
+            if markdown:
+                has_markdown = True
+                line = markdown.group(2)
+            elif len(line) > HEADING_MAX_CHARS or TOC_ENTRY.search(line):
+                continue
+            numbered = None
+            for level, kind, pattern in NUMBERED_HEADINGS:
+                numbered = pattern.match(line)
+                if numbered:
+                    found[compact(line)] = (
+                        level, line, match.start(), (kind, chinese_number(numbered.group(1))), bool(markdown)
+                    )
+                    break
+            if markdown and not numbered:
+                found[compact(line)] = (len(markdown.group(1)), line, match.start(), None, True)
+
+        entries = sorted(found.values(), key=lambda e: e[2])
+        if not entries:
+            return [], 0.0
+        if has_markdown:
+            dropped = set()
+            for kind in ("chapter", "attachment"):
+                numbered = [e for e in entries if e[3] and e[3][0] == kind]
+                ordered = increasing_indexes([e[3][1] for e in numbered])
+                dropped.update(e[2] for i, e in enumerate(numbered) if i not in ordered and not e[4])
+            entries = [e for e in entries if e[2] not in dropped]
+            offset = max((e[0] for e in entries if e[3]), default=0)
+            entries = [(e[0] if e[3] else e[0] + offset, e[1], e[2]) for e in entries]
+            return entries, STYLE_CONFIDENCE * count_factor(len(entries))
+
+        # 章和附件编号按出现顺序应连续递增（节、分册编号在各章内重新开始，不参与计算）
+        numbers = defaultdict(list)
+        for entry in entries:
+            numbers[entry[3][0]].append(entry[3][1])
+        counted = [(len(v), sequence_ratio(v)) for k, v in numbers.items() if k in ("chapter", "attachment")]
+        total = sum(n for n, _ in counted)
+        ratio = sum(n * r for n, r in counted) / total if total else 0.0
+        return [e[:3] for e in entries], NUMBERING_CONFIDENCE * ratio * count_factor(len(entries))
+
+    @staticmethod
+    def _outline_entries(index: SectionIndex, outline: list) -> tuple:
+        """书签定位到文本位置，按书签页码有序的比例计算置信度"""
+        entries = []
+        for level, title, page in outline:
+            offset = index.locate(page, title)
+            if offset is not None:
+                entries.append((level, title, offset))
+        if not entries:
+            return [], 0.0
+        pages = [page for _, _, page in outline]
+        ordered = sum(1 for i in range(1, len(pages)) if pages[i] >= pages[i - 1]) + 1
+        return entries, OUTLINE_CONFIDENCE * ordered / len(pages) * count_factor(len(entries))
+
+    @staticmethod
+    def _font_entries(index: SectionIndex, lines: list) -> tuple:
+        """字号明显大于正文的短行视为标题，按字号从大到小聚类为各级标题，相邻的同级行合并为一个标题"""
+        sizes = Counter()
+        title_pages = defaultdict(set)
+        for page, text, size in lines:
+            sizes[size] += len(text)
+            title_pages[compact(text)].add(page)
+        body_size = sizes.most_common(1)[0][0]
+
+        candidates = [
+            (i, page, text, size) for i, (page, text, size) in enumerate(lines)
+            if size >= body_size + FONT_HEADING_MIN_DELTA and len(text) <= HEADING_MAX_CHARS
+            and not text.isdigit() and len(title_pages[compact(text)]) <= 2  # 排除每页重复的页眉
+        ]
+        clusters = []
+        for size in sorted({c[3] for c in candidates}, reverse=True):
+            if clusters and clusters[-1][-1] - size <= FONT_CLUSTER_GAP:
+                clusters[-1].append(size)
+            else:
+                clusters.append([size])
+        levels = {size: level for level, cluster in enumerate(clusters[:FONT_MAX_LEVELS], 1) for size in cluster}
+
+        merged = []
+        for i, page, text, size in candidates:
+            if size not in levels:
+                continue
+            last = merged[-1] if merged else None
+            if last and last[0] == i - 1 and last[1] == page and last[3] == levels[size]:
+                merged[-1] = (i, page, last[2] + text, last[3])
+            else:
+                merged.append((i, page, text, levels[size]))
+
+        entries = []
+        for _, page, text, level in merged:
+            offset = index.locate(page, text)
+            if offset is not None:
+                entries.append((level, text, offset))
+        if not entries:
+            return [], 0.0
+        # 标题数量明显多于页数时多为字号识别偏差
+        plausible = len(entries) <= 2 * len(index.page_starts)
+        return entries, FONT_CONFIDENCE * (1.0 if plausible else 0.5) * count_factor(len(entries))
+
+    @staticmethod
+    def match_tags(name: str) -> list:
+        """按目录结构-业务标签对照表（忽略附件编号）匹配条目的业务标签，无匹配返回空列表"""
+        core = compact(ATTACHMENT_PREFIX.sub("", name))
+        if not core:
+            return []
+        for mapped, tags in CATALOGUE_TAGS:
+            if mapped and (mapped in core or core in mapped):
+                return list(tags)
+        return []
+
+    @staticmethod
+    def catalogue_result(index):
+        """章节索引中的投标文件格式目录置信度足够高时，直接组装目录任务结果；否则返回None"""
+        if index is None:
+            return None
+        names, confidence = index.catalogue()
+        if confidence < SECTION_INDEX_CATALOGUE_CONFIDENCE:
+            logger.info(f"章节索引目录置信度{confidence:.2f}低于{SECTION_INDEX_CATALOGUE_CONFIDENCE}，调用大模型提取目录")
+            return None
+        logger.info(f"章节索引目录置信度{confidence:.2f}，直接返回{len(names)}个目录条目")
+        return {
+            "retCode": "0000",
+            "retMessage": "解析成功",
+            "catalogue": [{"itemName": name, "itemTag": SectionIndexService.match_tags(name)} for name in names]
+        }
+
+
+# 单例实例
+section_index_service = SectionIndexService()
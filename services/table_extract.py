@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+'''评分表格提取：按关键词识别评分相关页，仅对这些页提取表格并渲染为TSV，
+保留评分项与分值的行对应关系，同时减少发送给模型的token数'''
+import time
+from config import (
+    logger,
+    PAGE_SEPARATOR,
+    SCORE_TABLE_ENABLED,
+    SCORE_TABLE_BACKEND,
+    SCORE_TABLE_KEYWORDS,
+    SCORE_TABLE_MIN_HITS,
+    SCORE_TABLE_MAX_PAGES
+)
+from services.pdf_backends import get_pdf_backend
+
+
+def candidate_pages(pages: list, page_range: tuple = None) -> list:
+    """命中至少SCORE_TABLE_MIN_HITS个不同关键词的页（从0开始），可限定在page_range（首尾页均含）内"""
+    start, end = page_range or (0, len(pages) - 1)
+    found = []
+    for index in range(max(start, 0), min(end, len(pages) - 1) + 1):
+        if sum(1 for keyword in SCORE_TABLE_KEYWORDS if keyword in pages[index]) >= SCORE_TABLE_MIN_HITS:
+            found.append(index)
+            if len(found) >= SCORE_TABLE_MAX_PAGES:
+                break
+    return found
+
+
+def render_tsv(rows: list) -> list:
+    """表格每行渲染为一行，单元格以制表符分隔，单元格内空白合并，空行跳过
+
+    行首的None单元格来自纵向合并（如评分类别列），沿用上一行的值；其余None按空单元格处理
+    """
+    lines = []
+    previous = []
+    for row in rows:
+        cells = []
+        leading = True
+        for i, cell in enumerate(row):
+            if cell is None and leading and i < len(previous):
+                cells.append(previous[i])
+                continue
+            leading = False
+            cells.append(" ".join(str(cell or "").split()))
+        previous = cells
+        # 原始单元格全为空的行（如合并单元格造成的空行）跳过
+        if any(str(cell or "").strip() for cell in row):
+            lines.append("\t".join(cells).rstrip("\t"))
+    return lines
+
+
+def render_page(blocks: list) -> str:
+    """按从上到下的顺序输出表格外文字和表格TSV"""
+    parts = []
+    for kind, content in blocks:
+        if kind == "table":
+            parts.extend(render_tsv(content))
+        else:
+            parts.extend(line.strip() for line in content.splitlines() if line.strip())
+    return "\n".join(parts)
+
+
+def tabulate_pages(pdf_path: str, text: str, page_range: tuple = None) -> str:
+    """将评分相关页的文本替换为表格TSV加表格外文字，返回替换后的全文（页数和页序不变）
+
+    未启用、无候选页、后端不支持表格提取或提取失败时原样返回
+    """
+    if not SCORE_TABLE_ENABLED or not pdf_path:
+        return text
+    pages = text.split(PAGE_SEPARATOR)
+    candidates = candidate_pages(pages, page_range)
+    if not candidates:
+        return text
+
+    start_time = time.time()
+    backend = get_pdf_backend(SCORE_TABLE_BACKEND)
+    try:
+        extracted = backend.extract_tables(pdf_path, candidates)
+    except Exception as e:
+        logger.warning(f"评分表格提取失败（{backend.name}），使用原始文本: {str(e)}")
+        return text
+    if not extracted:
+        return text
+
+    before = after = replaced = 0
+    for index, blocks in extracted.items():
+        if not any(kind == "table" for kind, _ in blocks):
+            continue
+        rendered = render_page(blocks)
+        before += len(pages[index])
+        after += len(rendered)
+        replaced += 1
+        pages[index] = rendered
+    logger.info(
+        f"评分表格提取完成，候选页{len(candidates)}个，含表格{replaced}页，"
+        f"这些页的文本长度: {before} -> {after}字符，耗时: {time.time() - start_time:.2f}秒（{backend.name}）"
+    )
+    return PAGE_SEPARATOR.join(pages)
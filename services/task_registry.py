@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+'''任务类型注册表：每种任务类型注册一次Redis键、处理函数和结果模板，
+队列读写、状态结果存取、API路由和消费者调度均按注册信息统一处理'''
+import copy
+import importlib
+from config import RedisKey, TASK_SCHEDULE_WEIGHTS
+
+
+class TaskType:
+    """任务类型定义
+
+    handler为处理函数的导入路径（模块.函数），在消费者进程中首次执行任务时才导入，
+    API进程不加载提取相关的模块；处理函数签名为handler(task, pdf_path, pdf_content, on_progress) -> 结果
+    """
+
+    def __init__(self, name: str, label: str, title: str, keys: dict, handler: str,
+                 empty_result: dict, bid_field: str = "bid", bid_in_result: bool = False, subtasks: tuple = ()):
+        self.name = name
+        self.label = label  # 日志和错误信息中的简称，如"基础"
+        self.title = title  # 提交任务时返回的任务名称，如"基础任务"
+        self.queue = keys.get("queue")  # 原列表队列，仅用于迁移遗留任务
+        self.stream = keys["stream"]
+        self.pending = keys["pending"]
+        self.enqueued = keys["enqueued"]
+        self.status = keys["status"]
+        self.result = keys["result"]
+        self.progress = keys["progress"]
+        self.bid_mapping = keys["bid_mapping"]
+        self.handler_path = handler
+        self.empty_result = empty_result  # 失败或处理中时返回的空结构
+        self.bid_field = bid_field  # API响应中投标编号的字段名
+        self.bid_in_result = bid_in_result  # 失败或处理中的结果是否包含投标编号
+        # 子任务类型：提交时为每个子任务分配任务ID并建立bid映射，各子任务的结果写入其自身的键，原有查询接口可直接查询
+        self.subtasks = subtasks
+        self.weight = TASK_SCHEDULE_WEIGHTS.get(name, 1)
+        self._handler = None
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            module_name, func_name = self.handler_path.rsplit(".", 1)
+            self._handler = getattr(importlib.import_module(module_name), func_name)
+        return self._handler
+
+    def make_result(self, bid: str, ret_code: str, message: str) -> dict:
+        """按结果模板构造失败或处理中的返回结果"""
+        result = {self.bid_field: bid} if self.bid_in_result else {}
+        result["retCode"] = ret_code
+        result["retMessage"] = message
+        result.update(copy.deepcopy(self.empty_result))
+        return result
+
+
+TASK_TYPES = {}
+
+
+def register_task_type(task_type: TaskType) -> TaskType:
+    if task_type.name in TASK_TYPES:
+        raise Exception(f"任务类型重复注册: {task_type.name}")
+    TASK_TYPES[task_type.name] = task_type
+    return task_type
+
+
+def get_task_type(name: str) -> TaskType:
+    task_type = TASK_TYPES.get(name)
+    if task_type is None:
+        raise Exception(f"未知的任务类型: {name}")
+    return task_type
+
+
+register_task_type(TaskType(
+    "base", "基础", "基础任务",
+    keys={
+        "queue": RedisKey.BASE_TASK_QUEUE,
+        "stream": RedisKey.BASE_TASK_STREAM,
+        "pending": RedisKey.BASE_TASK_PENDING,
+        "enqueued": RedisKey.BASE_TASK_ENQUEUED,
+        "status": RedisKey.BASE_TASK_STATUS,
+        "result": RedisKey.BASE_TASK_RESULT,
+        "progress": RedisKey.BASE_TASK_PROGRESS,
+        "bid_mapping": RedisKey.BASE_TASK_BID_MAPPING
+    },
+    handler="tasks.base_task.process_base_task",
+    empty_result={"projectInfo": {}, "bidContactInfo": {}, "bidBond": {}}
+))
+register_task_type(TaskType(
+    "score", "评分", "商务评分任务",
+    keys={
+        "queue": RedisKey.SCORE_TASK_QUEUE,
+        "stream": RedisKey.SCORE_TASK_STREAM,
+        "pending": RedisKey.SCORE_TASK_PENDING,
+        "enqueued": RedisKey.SCORE_TASK_ENQUEUED,
+        "status": RedisKey.SCORE_TASK_STATUS,
+        "result": RedisKey.SCORE_TASK_RESULT,
+        "progress": RedisKey.SCORE_TASK_PROGRESS,
+        "bid_mapping": RedisKey.SCORE_TASK_BID_MAPPING
+    },
+    handler="tasks.score_task.process_score_task",
+    empty_result={"criteria": []}
+))
+register_task_type(TaskType(
+    "catalogue", "目录", "目录筛选任务",
+    keys={
+        "queue": RedisKey.CATALOGUE_TASK_QUEUE,
+        "stream": RedisKey.CATALOGUE_TASK_STREAM,
+        "pending": RedisKey.CATALOGUE_TASK_PENDING,
+        "enqueued": RedisKey.CATALOGUE_TASK_ENQUEUED,
+        "status": RedisKey.CATALOGUE_TASK_STATUS,
+        "result": RedisKey.CATALOGUE_TASK_RESULT,
+        "progress": RedisKey.CATALOGUE_TASK_PROGRESS,
+        "bid_mapping": RedisKey.CATALOGUE_TASK_BID_MAPPING
+    },
+    handler="tasks.catalogue_task.process_catalogue_task",
+    empty_result={"catalogue": []},
+    bid_field="bidId",
+    bid_in_result=True
+))
+register_task_type(TaskType(
+    "full", "综合解析", "综合解析任务",
+    keys={
+        "stream": RedisKey.FULL_TASK_STREAM,
+        "pending": RedisKey.FULL_TASK_PENDING,
+        "enqueued": RedisKey.FULL_TASK_ENQUEUED,
+        "status": RedisKey.FULL_TASK_STATUS,
+        "result": RedisKey.FULL_TASK_RESULT,
+        "progress": RedisKey.FULL_TASK_PROGRESS,
+        "bid_mapping": RedisKey.FULL_TASK_BID_MAPPING
+    },
+    handler="tasks.full_task.process_full_task",
+    empty_result={"subtasks": {}},
+    subtasks=("base", "score", "catalogue")
+))
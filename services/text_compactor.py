@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+'''文本压缩：去除各页重复出现的页眉、页脚、页码和水印行，合并多余空白，清空封面和空白页
+
+各页之间的PAGE_SEPARATOR原样保留，页数和页序不变，章节索引的页码范围仍然适用'''
+import re
+import math
+from collections import Counter
+from config import (
+    logger,
+    PAGE_SEPARATOR,
+    TEXT_COMPACT_ENABLED,
+    TEXT_COMPACT_MIN_PAGES,
+    TEXT_COMPACT_REPEAT_RATIO,
+    TEXT_COMPACT_WATERMARK_RATIO,
+    TEXT_COMPACT_EDGE_LINES,
+    TEXT_COMPACT_DROP_COVER
+)
+from services.chunk_index import estimate_tokens
+
+DIGITS_PATTERN = re.compile(r'\d+')
+SPACES_PATTERN = re.compile(r'[ 　 ]+')
+# 独立成行的页码：3、- 3 -、第3页、第3页 共50页、3/50
+PAGE_NUMBER_PATTERN = re.compile(r'^(?:[-—–]?\s*\d+\s*[-—–]?|第\s*\d+\s*页(?:\s*[,，/]?\s*共\s*\d+\s*页)?|\d+\s*/\s*\d+)$')
+WATERMARK_MAX_CHARS = 30  # 视为水印的重复行的最大长度
+COVER_MAX_CHARS = 300  # 封面页的最大文本长度
+SENTENCE_MARKS = ("。", "；", ";")
+
+
+def _line_key(line: str) -> str:
+    """比较页眉页脚时忽略空白和数字（页码、日期等随页变化）"""
+    return DIGITS_PATTERN.sub("#", _exact_key(line))
+
+
+def _exact_key(line: str) -> str:
+    """比较水印时只忽略空白：数字不同的短行（如"3分"与"10分"、条目序号）是正文内容"""
+    return "".join(line.split())
+
+
+def _page_lines(page: str) -> list:
+    """逐行合并连续空格、去除首尾空白并跳过空行；制表符保留（表格TSV的列分隔）"""
+    lines = []
+    for line in page.split("\n"):
+        line = SPACES_PATTERN.sub(" ", line).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _is_cover(lines: list) -> bool:
+    """封面：文本很短且没有成句的内容"""
+    text = "".join(lines)
+    return len(text) <= COVER_MAX_CHARS and not any(mark in text for mark in SENTENCE_MARKS)
+
+
+def _repeated_keys(pages: list) -> tuple:
+    """统计各页页首、页尾位置和整页范围内出现的行，返回(重复的位置行集合, 水印行集合)
+
+    页首页尾按位置统计，超过TEXT_COMPACT_REPEAT_RATIO的页中出现即视为页眉页脚；
+    水印只在页首页尾范围内识别（提取出的水印文字位于页面内容的开头或末尾，行位置可能因页而异），
+    须逐字相同且几乎每页都出现（TEXT_COMPACT_WATERMARK_RATIO）；
+    正文中反复出现的短行（序号、分值、"合计"等）不参与水印识别
+    """
+    edge = Counter()
+    anywhere = Counter()
+    for lines in pages:
+        keys = set()
+        for i, line in enumerate(lines):
+            # 表格行（如跨页重复的表头）不参与统计
+            if "\t" in line:
+                continue
+            key = _line_key(line)
+            head = i < TEXT_COMPACT_EDGE_LINES
+            tail = len(lines) - 1 - i < TEXT_COMPACT_EDGE_LINES
+            if head:
+                keys.add(("head", i, key))
+            if tail:
+                keys.add(("tail", len(lines) - 1 - i, key))
+            if (head or tail) and len(line) <= WATERMARK_MAX_CHARS:
+                keys.add(("any", _exact_key(line)))
+        # 同一页内重复的行只计一次
+        for key in keys:
+            if key[0] == "any":
+                anywhere[key[1]] += 1
+            else:
+                edge[key] += 1
+    threshold = max(2, int(len(pages) * TEXT_COMPACT_REPEAT_RATIO))
+    watermark_threshold = max(2, math.ceil(len(pages) * TEXT_COMPACT_WATERMARK_RATIO))
+    return (
+        {key for key, count in edge.items() if count >= threshold},
+        {key for key, count in anywhere.items() if count >= watermark_threshold}
+    )
+
+
+def compact_text(text: str, task_type: str = None) -> str:
+    """压缩文档文本并记录压缩前后的长度；未启用时原样返回
+
+    页数达到TEXT_COMPACT_MIN_PAGES时才识别重复行；封面页是否清空按任务类型配置（基础信息常取自封面）
+    """
+    if not TEXT_COMPACT_ENABLED or not text:
+        return text
+    pages = [_page_lines(page) for page in text.split(PAGE_SEPARATOR)]
+
+    removed_lines = 0
+    if len(pages) >= TEXT_COMPACT_MIN_PAGES:
+        edge_keys, watermark_keys = _repeated_keys(pages)
+        seen_watermarks = set()
+        for index, lines in enumerate(pages):
+            kept = []
+            for i, line in enumerate(lines):
+                if "\t" in line:
+                    kept.append(line)
+                    continue
+                key = _line_key(line)
+                at_edge = i < TEXT_COMPACT_EDGE_LINES or len(lines) - 1 - i < TEXT_COMPACT_EDGE_LINES
+                head = i < TEXT_COMPACT_EDGE_LINES and ("head", i, key) in edge_keys
+                tail = len(lines) - 1 - i < TEXT_COMPACT_EDGE_LINES and ("tail", len(lines) - 1 - i, key) in edge_keys
+                page_number = at_edge and PAGE_NUMBER_PATTERN.match(line)
+                # 水印行保留首次出现
+                exact = _exact_key(line)
+                is_watermark = at_edge and exact in watermark_keys
+                watermark = is_watermark and exact in seen_watermarks
+                if is_watermark:
+                    seen_watermarks.add(exact)
+                if head or tail or page_number or watermark:
+                    removed_lines += 1
+                else:
+                    kept.append(line)
+            pages[index] = kept
+
+    first = next((i for i, lines in enumerate(pages) if lines), None)
+    if first is not None and TEXT_COMPACT_DROP_COVER.get(task_type, False) and _is_cover(pages[first]):
+        pages[first] = []
+    empty_pages = sum(1 for lines in pages if not lines)
+
+    compacted = PAGE_SEPARATOR.join("\n".join(lines) for lines in pages)
+    logger.info(
+        f"[{task_type}]文本压缩完成，长度: {len(text)} -> {len(compacted)}字符"
+        f"（-{(1 - len(compacted) / len(text)) * 100:.1f}%），估算token: {estimate_tokens(text)} -> "
+        f"{estimate_tokens(compacted)}，去除重复行{removed_lines}行，空白页（含清空的封面）{empty_pages}页"
+    )
+    return compacted
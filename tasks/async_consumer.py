@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+'''异步消费者：单进程内基于asyncio并发处理多个任务
+
+各任务类型共用，按空闲槽位数从各任务流消费者组批量读取任务（redis.asyncio客户端在事件循环上读取和等待），
+大模型请求由事件循环上的异步HTTP客户端发出；
+文档转换、文本解析等CPU密集或阻塞步骤放入线程池执行，不阻塞事件循环。
+'''
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    logger,
+    EXTRACT_API_URL,
+    ASYNC_CONSUMER_CONCURRENCY,
+    TASK_STREAM_BATCH_SIZE,
+    TASK_STREAM_BLOCK_MS
+)
+from services.llm_client import llm_client, AsyncLlmClient
+from services.redis_service import redis_service, AsyncTaskReader
+from services.task_registry import TASK_TYPES, get_task_type
+from tasks.stream_consumer import HeldTasks, TaskFetcher, run_task_entry
+
+
+class AsyncTaskFetcher(TaskFetcher):
+    """TaskFetcher的异步版本：调度方式相同，通过redis.asyncio读取任务和等待入队通知"""
+
+    def __init__(self, consumer: str, reader: AsyncTaskReader):
+        super().__init__(consumer)
+        self.reader = reader
+
+    async def _poll_async(self, count: int) -> list:
+        entries = []
+        candidates = set(self.scheduler.order)
+        while candidates and len(entries) < count:
+            name = self.scheduler.pick(candidates)
+            read = await self.reader.read_tasks(name, self.consumer, 1)
+            if not read:
+                self.scheduler.idle(name)
+                candidates.discard(name)
+                continue
+            self.scheduler.charge(name)
+            entries.append((name,) + read[0])
+        return entries
+
+    async def fetch_async(self, count: int, block_ms: int) -> list:
+        """最多读取count个任务，返回[(任务类型, 条目ID, 任务)]"""
+        entries = await self._poll_async(count)
+        if not entries and await self.reader.wait_for_tasks(block_ms):
+            entries = await self._poll_async(count)
+        return entries
+
+
+async def _consume(stop_event=None) -> None:
+    concurrency = ASYNC_CONSUMER_CONCURRENCY
+    loop = asyncio.get_running_loop()
+
+    consumer = redis_service.consumer_name()
+    held = HeldTasks(consumer)
+    reader = AsyncTaskReader(redis_service)
+    fetcher = AsyncTaskFetcher(consumer, reader)
+    async_llm = AsyncLlmClient(EXTRACT_API_URL)
+    await async_llm.start()
+    llm_client.bind_async(loop, async_llm)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="task")
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+
+    async def run_task(task_type: str, entry_id, task: dict) -> None:
+        try:
+            await loop.run_in_executor(executor, run_task_entry, task_type, held, entry_id, task)
+        finally:
+            slots.release()
+
+    logger.info(f"任务异步消费者启动（{consumer}），任务类型: {list(TASK_TYPES)}，最大并发: {concurrency}，等待任务...")
+    try:
+        while not (stop_event and stop_event.is_set()):
+            # 有空闲槽位时才读取任务，按空闲槽位数批量读取，未读取的任务留给其他消费者
+            await slots.acquire()
+            count = max(1, min(TASK_STREAM_BATCH_SIZE, concurrency - len(running)))
+            for _ in range(count - 1):
+                await slots.acquire()
+            try:
+                entries = await fetcher.fetch_async(count, TASK_STREAM_BLOCK_MS)
+            except Exception as e:
+                entries = []
+                logger.error(f"任务异步消费者读取队列异常：{str(e)}", exc_info=True)
+                await asyncio.sleep(5)
+            for _ in range(count - len(entries)):
+                slots.release()
+
+            for task_type, entry_id, _ in entries:
+                held.hold(task_type, entry_id)
+            for index, (task_type, entry_id, task) in enumerate(entries):
+                # 阻塞等待时各任务流可能同时返回任务，超出空闲槽位的部分等待槽位释放
+                if index >= count:
+                    await slots.acquire()
+                logger.info(
+                    f"接收到{get_task_type(task_type).label}任务：{task['task_id']} (bid: {task['bid']})，"
+                    f"当前并发: {len(running) + 1}/{concurrency}"
+                )
+                job = asyncio.create_task(run_task(task_type, entry_id, task))
+                running.add(job)
+                job.add_done_callback(running.discard)
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        held.stop()
+        executor.shutdown(wait=True)
+        await reader.close()
+        await async_llm.close()
+        logger.info(f"任务异步消费者已停止（{consumer}）")
+
+
+def run_async_consumer(stop_event=None) -> None:
+    """异步消费者进程入口，stop_event被设置后不再读取新任务，等待处理中的任务完成后退出"""
+    asyncio.run(_consume(stop_event))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+'''综合解析任务处理逻辑：文档只转换和解析一次，基础信息、评分标准和目录三项提取并发执行，
+每项完成后立即写入其自身任务类型的结果键，原有的结果查询接口按bid即可查询'''
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import logger, TaskStatus
+from services.redis_service import redis_service
+from services.text_compactor import compact_text
+from services.task_registry import get_task_type
+from tasks.task_runner import complete_task, fail_task
+
+
+def _run_subtask(subtask_type: str, subtask_id: str, task: dict, pdf_path: str, pdf_content: str) -> bool:
+    """执行单个子任务并保存其结果，返回是否成功"""
+    spec = get_task_type(subtask_type)
+    subtask = {"task_id": subtask_id, "bid": task["bid"], "file_path": task["file_path"]}
+    try:
+        redis_service.set_task_status(subtask_type, subtask_id, TaskStatus.PROCESSING)
+        # 封面等内容是否保留按子任务类型配置
+        content = compact_text(pdf_content, subtask_type)
+        result = spec.handler(
+            subtask, pdf_path, content,
+            lambda progress: redis_service.set_task_progress(subtask_type, subtask_id, progress)
+        )
+        complete_task(subtask_type, subtask_id, result)
+        logger.info(f"综合解析任务 {task['task_id']} 的{spec.label}提取完成（子任务 {subtask_id}）")
+        return True
+    except Exception as e:
+        logger.error(f"综合解析任务 {task['task_id']} 的{spec.label}提取失败：{str(e)}", exc_info=True)
+        fail_task(subtask_type, subtask_id, task["bid"], str(e))
+        return False
+
+
+def process_full_task(task: dict, pdf_path: str, pdf_content: str, on_progress) -> dict:
+    """并发执行各子任务，返回各子任务的任务ID和状态；全部失败时抛出异常"""
+    subtasks = task["subtasks"]
+    statuses = {}
+    lock = threading.Lock()
+
+    def run(item):
+        subtask_type, subtask_id = item
+        succeeded = _run_subtask(subtask_type, subtask_id, task, pdf_path, pdf_content)
+        with lock:
+            statuses[subtask_type] = TaskStatus.SUCCESS.value if succeeded else TaskStatus.FAILED.value
+            progress = {"finished": len(statuses), "total": len(subtasks), "subtasks": dict(statuses)}
+        # 进度上报失败不影响已保存的子任务结果
+        try:
+            on_progress(progress)
+        except Exception as e:
+            logger.warning(f"综合解析任务 {task['task_id']} 进度上报失败: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=len(subtasks), thread_name_prefix="full_subtask") as executor:
+        list(executor.map(run, subtasks.items()))
+
+    failed = [get_task_type(t).label for t, status in statuses.items() if status != TaskStatus.SUCCESS.value]
+    if len(failed) == len(subtasks):
+        raise Exception(f"{'、'.join(failed)}提取均失败，详见各项结果")
+    return {
+        "retCode": "0000",
+        "retMessage": "解析成功" if not failed else f"部分解析失败：{'、'.join(failed)}",
+        "subtasks": {
+            subtask_type: {"task_id": subtask_id, "status": statuses[subtask_type]}
+            for subtask_type, subtask_id in subtasks.items()
+        }
+    }
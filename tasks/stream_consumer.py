@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+'''任务流消费：各任务类型共用消费者进程，按调度权重从有积压的任务类型中取任务，处理完成后确认；
+处理期间后台线程定期续期本消费者持有的任务'''
+import time
+import threading
+from collections import defaultdict
+from config import (
+    logger,
+    TASK_STREAM_BLOCK_MS,
+    TASK_STREAM_HEARTBEAT_INTERVAL
+)
+from services.redis_service import redis_service
+from services.task_registry import TASK_TYPES, get_task_type
+from tasks.task_runner import execute_task
+
+
+class HeldTasks:
+    """本消费者已读取、尚未确认的任务条目，后台线程按间隔续期"""
+
+    def __init__(self, consumer: str):
+        self.consumer = consumer
+        self._entries = set()  # {(任务类型, 条目ID)}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name="task_heartbeat", daemon=True)
+        self._thread.start()
+
+    def hold(self, task_type: str, entry_id) -> None:
+        with self._lock:
+            self._entries.add((task_type, entry_id))
+
+    def release(self, task_type: str, entry_id) -> None:
+        with self._lock:
+            self._entries.discard((task_type, entry_id))
+
+    def _heartbeat(self) -> None:
+        while not self._stopped.wait(TASK_STREAM_HEARTBEAT_INTERVAL):
+            by_type = defaultdict(list)
+            with self._lock:
+                for task_type, entry_id in self._entries:
+                    by_type[task_type].append(entry_id)
+            for task_type, entry_ids in by_type.items():
+                try:
+                    redis_service.touch_tasks(task_type, self.consumer, entry_ids)
+                except Exception as e:
+                    logger.warning(f"任务续期失败（{task_type}）: {str(e)}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class FairScheduler:
+    """赤字轮询（Deficit Round Robin）：轮到有积压的任务类型时累加与权重相同的额度，每取一个任务消耗一个单位，
+    额度不足时轮到下一类型；任务流为空时额度清零，空闲的任务类型不会积累额度"""
+
+    def __init__(self, weights: dict):
+        self.weights = weights
+        self.order = list(weights)
+        self.deficit = {name: 0.0 for name in self.order}
+        self.cursor = 0
+
+    def pick(self, candidates: set) -> str:
+        """从可能有积压的任务类型中选出下一个取任务的类型"""
+        if not candidates:
+            return None
+        while True:
+            name = self.order[self.cursor]
+            if name in candidates:
+                if self.deficit[name] < 1:
+                    self.deficit[name] += self.weights[name]
+                if self.deficit[name] >= 1:
+                    return name
+            self.cursor = (self.cursor + 1) % len(self.order)
+
+    def charge(self, name: str, cost: float = 1.0) -> None:
+        """取到任务后扣减额度，额度用完时轮到下一类型"""
+        self.deficit[name] -= cost
+        if self.deficit[name] < 1 and self.order[self.cursor] == name:
+            self.cursor = (self.cursor + 1) % len(self.order)
+
+    def idle(self, name: str) -> None:
+        self.deficit[name] = 0.0
+
+
+class TaskFetcher:
+    """按赤字轮询依次尝试各任务类型（不阻塞，同一类型内按调度分值取预计耗时最短的任务），
+    均无任务时阻塞等待入队通知后再取一次"""
+
+    def __init__(self, consumer: str):
+        self.consumer = consumer
+        self.scheduler = FairScheduler({name: spec.weight for name, spec in TASK_TYPES.items()})
+
+    def _poll(self, count: int) -> list:
+        entries = []
+        candidates = set(self.scheduler.order)
+        while candidates and len(entries) < count:
+            name = self.scheduler.pick(candidates)
+            read = redis_service.read_tasks(name, self.consumer, 1)
+            if not read:
+                self.scheduler.idle(name)
+                candidates.discard(name)
+                continue
+            self.scheduler.charge(name)
+            entries.append((name,) + read[0])
+        return entries
+
+    def fetch(self, count: int, block_ms: int) -> list:
+        """最多读取count个任务，返回[(任务类型, 条目ID, 任务)]"""
+        entries = self._poll(count)
+        if not entries and redis_service.wait_for_tasks(block_ms):
+            entries = self._poll(count)
+        return entries
+
+
+def run_task_entry(task_type: str, held: HeldTasks, entry_id, task: dict) -> None:
+    """执行单个任务，正常返回后确认；执行中抛出异常时不确认，超时后由消费者重新认领"""
+    try:
+        execute_task(task_type, task)
+        redis_service.ack_task(task_type, entry_id)
+    except Exception as e:
+        label = get_task_type(task_type).label
+        logger.error(f"{label}任务 {task.get('task_id')} 执行异常，未确认，等待重新认领：{str(e)}", exc_info=True)
+    finally:
+        held.release(task_type, entry_id)
+
+
+def run_stream_consumer(stop_event=None) -> None:
+    """同步消费者主循环：每次读取1个任务串行处理（批量读取的任务会在处理前一直占用，使其他消费者空闲）
+
+    stop_event（multiprocessing.Event）被设置后处理完当前任务即退出
+    """
+    consumer = redis_service.consumer_name()
+    held = HeldTasks(consumer)
+    fetcher = TaskFetcher(consumer)
+    logger.info(f"任务消费者启动（{consumer}），任务类型: {list(TASK_TYPES)}，等待任务...")
+    try:
+        while not (stop_event and stop_event.is_set()):
+            try:
+                entries = fetcher.fetch(1, TASK_STREAM_BLOCK_MS)
+            except Exception as e:
+                logger.error(f"任务消费者读取队列异常：{str(e)}", exc_info=True)
+                time.sleep(5)
+                continue
+            for task_type, entry_id, _ in entries:
+                held.hold(task_type, entry_id)
+            for task_type, entry_id, task in entries:
+                logger.info(f"接收到{get_task_type(task_type).label}任务：{task['task_id']} (bid: {task['bid']})")
+                run_task_entry(task_type, held, entry_id, task)
+    finally:
+        held.stop()
+    logger.info(f"任务消费者已停止（{consumer}）")
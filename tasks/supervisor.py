@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+'''消费者进程监督：按各任务流合计的积压情况在配置的上下限之间增减共用的消费者进程，并重启异常退出的进程'''
+import math
+import time
+import signal
+import threading
+from multiprocessing import Process, Event
+from config import (
+    logger,
+    CONSUMER_MODE,
+    WORKER_POOL,
+    WORKER_SUPERVISOR_INTERVAL,
+    WORKER_SCALE_COOLDOWN,
+    WORKER_STOP_TIMEOUT,
+    LIBREOFFICE_POOL_ENABLED
+)
+from services.redis_service import redis_service
+from services.task_registry import TASK_TYPES
+
+
+def _consumer_target():
+    """消费者进程入口，参数为停止事件"""
+    if CONSUMER_MODE == "async":
+        from tasks.async_consumer import run_async_consumer
+        return run_async_consumer
+    from tasks.stream_consumer import run_stream_consumer
+    return run_stream_consumer
+
+
+def _check_office_pool() -> None:
+    """启动时检查LibreOffice常驻进程池能否启用，不能启用时记录警告；检查结果由fork出的消费者进程继承"""
+    if not LIBREOFFICE_POOL_ENABLED:
+        return
+    from services.file_service import FileService
+    from services.office_pool import office_pool
+    try:
+        office_pool.is_available(FileService.get_default_libreoffice_path())
+    except Exception as e:
+        logger.warning(f"LibreOffice常驻进程池检查失败: {str(e)}")
+
+
+def _run_worker(stop_event) -> None:
+    """消费者进程入口：恢复SIGTERM默认处理（强制终止时立即退出），忽略终端的SIGINT，由监督进程通知退出"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _consumer_target()(stop_event)
+
+
+class WorkerPool:
+    """消费者进程集合，每个进程从所有任务流中取任务"""
+
+    def __init__(self, limits: dict):
+        self.limits = limits
+        self.target = limits["min"]
+        self.workers = []  # [(进程, 停止事件)]
+        self.stopping = []  # 缩容中、正在处理完当前任务的进程
+        self.last_scaled = 0.0
+        self.idle_since = None
+
+    def _spawn(self) -> None:
+        stop_event = Event()
+        # 消费者进程需要创建PDF并行提取的子进程，因此不能设为守护进程
+        process = Process(target=_run_worker, args=(stop_event,), daemon=False, name="task_consumer")
+        process.start()
+        self.workers.append((process, stop_event))
+        logger.info(f"消费者进程启动，pid: {process.pid}，当前进程数: {len(self.workers)}")
+
+    def reap(self) -> None:
+        """移除已退出的进程，异常退出的进程在之后的reconcile中按目标数重新启动"""
+        for process, stop_event in list(self.workers):
+            if not process.is_alive():
+                self.workers.remove((process, stop_event))
+                logger.error(f"消费者进程异常退出，pid: {process.pid}，退出码: {process.exitcode}，将重新启动")
+        self.stopping = [(p, e) for p, e in self.stopping if p.is_alive()]
+
+    def autoscale(self, waiting: int, oldest_age: float) -> None:
+        """按积压任务数和最早任务的等待时长调整目标进程数，每次调整后冷却一段时间"""
+        now = time.time()
+        self.idle_since = None if waiting else (self.idle_since or now)
+        if now - self.last_scaled < WORKER_SCALE_COOLDOWN:
+            return
+        limits = self.limits
+        target = self.target
+        # 有未被读取的任务说明现有进程均已占满，按积压数增加进程
+        if waiting >= limits["tasks_per_worker"] or (waiting and oldest_age >= limits["max_wait"]):
+            target = min(limits["max"], target + math.ceil(waiting / limits["tasks_per_worker"]))
+        elif self.idle_since and now - self.idle_since >= limits["idle"]:
+            target = max(limits["min"], target - 1)
+            self.idle_since = now
+        if target != self.target:
+            logger.info(
+                f"消费者进程数 {self.target} -> {target}"
+                f"（积压{waiting}个任务，最早等待{oldest_age:.0f}秒）"
+            )
+            self.target = target
+            self.last_scaled = now
+
+    def reconcile(self) -> None:
+        """启动或停止进程使进程数等于目标数；停止的进程处理完当前任务后退出"""
+        while len(self.workers) < self.target:
+            self._spawn()
+        while len(self.workers) > self.target:
+            process, stop_event = self.workers.pop()
+            stop_event.set()
+            self.stopping.append((process, stop_event))
+            logger.info(f"消费者进程{process.pid}将在当前任务完成后退出")
+
+    def shutdown(self) -> list:
+        """通知所有进程退出，返回需要等待的进程"""
+        processes = self.workers + self.stopping
+        for _, stop_event in processes:
+            stop_event.set()
+        self.workers, self.stopping = [], []
+        return [process for process, _ in processes]
+
+
+def run_supervisor() -> None:
+    """监督进程入口：收到SIGTERM/SIGINT后通知消费者进程退出，超时未退出的强制终止"""
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    for task_type in TASK_TYPES:
+        redis_service.ensure_task_group(task_type)
+    _check_office_pool()
+    pool = WorkerPool(WORKER_POOL)
+    pool.reconcile()
+    logger.info(f"消费者进程监督启动，运行模式: {CONSUMER_MODE}，进程数配置: {WORKER_POOL}")
+
+    while not stopped.wait(WORKER_SUPERVISOR_INTERVAL):
+        try:
+            pool.reap()
+            backlogs = [redis_service.get_task_backlog(task_type) for task_type in TASK_TYPES]
+            pool.autoscale(sum(w for w, _ in backlogs), max(age for _, age in backlogs))
+            pool.reconcile()
+        except Exception as e:
+            logger.error(f"消费者进程监督异常：{str(e)}", exc_info=True)
+
+    processes = pool.shutdown()
+    deadline = time.time() + WORKER_STOP_TIMEOUT
+    for process in processes:
+        process.join(timeout=max(0.0, deadline - time.time()))
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout=10)
+    logger.info("消费者进程已全部停止")
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+'''任务执行：按注册的任务类型统一处理状态更新、文档解析、结果保存和临时文件清理'''
+import os
+import time
+from config import logger, TaskStatus
+from services.redis_service import redis_service
+from services.file_service import file_service
+from services.text_compactor import compact_text
+from services.task_registry import get_task_type
+from services.document_size import estimate_pages
+
+
+def complete_task(task_type: str, task_id: str, result: dict) -> None:
+    """保存结果并置为成功；先保存结果再更新状态，查询到成功状态时结果一定存在"""
+    redis_service.set_task_result(task_type, task_id, result)
+    redis_service.set_task_status(task_type, task_id, TaskStatus.SUCCESS)
+
+
+def fail_task(task_type: str, task_id: str, bid: str, message: str) -> None:
+    """按结果模板保存错误信息并置为失败"""
+    redis_service.set_task_result(task_type, task_id, get_task_type(task_type).make_result(bid, "9999", message))
+    redis_service.set_task_status(task_type, task_id, TaskStatus.FAILED)
+
+
+def execute_task(task_type: str, task: dict) -> None:
+    """执行单个任务：解析文档后调用任务类型的处理函数，失败时按结果模板保存错误信息"""
+    spec = get_task_type(task_type)
+    task_id = task["task_id"]
+    bid = task["bid"]
+    file_path = task["file_path"]
+
+    try:
+        logger.debug(f"进入{spec.label}任务处理，参数: task_id={task_id}, bid={bid}, file_path={file_path}")
+        redis_service.set_task_status(task_type, task_id, TaskStatus.PROCESSING)
+
+        # 获取文档文本（OOXML直接解析，其余格式转PDF后提取；同一文件已解析过时直接复用缓存）
+        logger.debug(f"开始解析文档: {file_path} (大小: {os.path.getsize(file_path)/1024:.2f}KB)")
+        started = time.time()
+        pdf_path, pdf_content = file_service.load_document(file_path, task_type)
+        load_seconds = time.time() - started
+        if not pdf_content:
+            logger.error(f"文档文本提取失败，源文件: {file_path}，PDF路径: {pdf_path}")
+            raise Exception("文档文本提取失败（PDF转换或文本解析未成功）")
+        logger.debug(f"文档解析完成，PDF路径: {pdf_path}，内容长度: {len(pdf_content)}字符")
+        # 去除页眉页脚、页码和水印等重复内容后再发送给模型（有子任务时由各子任务按自身类型压缩）
+        if not spec.subtasks:
+            pdf_content = compact_text(pdf_content, task_type)
+
+        started = time.time()
+        result = spec.handler(
+            task, pdf_path, pdf_content,
+            lambda progress: redis_service.set_task_progress(task_type, task_id, progress)
+        )
+        # 按入队时估计预计耗时所用的页数记录各阶段耗时（OOXML直接解析的文本没有分页符，不能按文本计页），
+        # 用于估计后续任务的预计耗时（调度时优先处理预计耗时短的任务）
+        pages = task.get("pages") or estimate_pages(file_path)
+        redis_service.record_task_timing(task_type, "load", load_seconds, pages)
+        redis_service.record_task_timing(task_type, "extract", time.time() - started, pages)
+        logger.debug(f"{spec.label}任务提取完成，结果预览: {str(result)[:200]}...")
+
+        complete_task(task_type, task_id, result)
+        logger.info(f"{spec.label}任务 {task_id} 处理成功")
+
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"{spec.label}任务 {task_id} 处理失败：{error_msg}", exc_info=True)
+        fail_task(task_type, task_id, bid, error_msg)
+        # 文档解析失败等情况下子任务尚未开始，同样置为失败，避免原有查询接口一直返回解析中
+        for subtask_type, subtask_id in task.get("subtasks", {}).items():
+            if redis_service.get_task_status(subtask_type, subtask_id) not in [TaskStatus.SUCCESS.value, TaskStatus.FAILED.value]:
+                fail_task(subtask_type, subtask_id, bid, error_msg)
+    finally:
+        # 清理临时文件
+        logger.debug(f"清理临时文件: {file_path}")
+        file_service.clean_temp_files(file_path)